@@ -0,0 +1,68 @@
+"""Import-time benchmark for the vaxsim modules.
+
+Each module is imported in a fresh interpreter. The script reports the median import time
+and checks that the numerical core (``vaxsim``, ``vaxsim.model``, ``vaxsim.utils``,
+``vaxsim.waning``, ``vaxsim.calibration``) loads none of the plotting or data-analysis
+stacks. It prints one JSON record per module and exits with status 1 if a module pulls in a
+forbidden dependency or exceeds ``--max-seconds``.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_import.py [--repeat 5] [--max-seconds 1.0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+FORBIDDEN = ('matplotlib', 'seaborn', 'pandas', 'scipy')
+
+CORE_MODULES = ('vaxsim', 'vaxsim.model', 'vaxsim.utils', 'vaxsim.waning', 'vaxsim.diagnostics', 'vaxsim.calibration')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({forbidden!r}))
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+"""
+
+
+def measure(module, repeat):
+    """Import ``module`` ``repeat`` times in fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module, forbidden=FORBIDDEN)],
+                                check=True, capture_output=True, text=True, env=os.environ).stdout
+        runs.append(json.loads(output))
+    return {
+        'benchmark': 'import',
+        'module': module,
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'repeat': repeat,
+        'forbidden_loaded': runs[0]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module. Default is 5.")
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help="Fail if a core module takes longer than this to import.")
+    args = parser.parse_args()
+
+    failed = False
+    for module in CORE_MODULES:
+        record = measure(module, args.repeat)
+        print(json.dumps(record))
+        if record['forbidden_loaded'] or (args.max_seconds is not None and record['seconds'] > args.max_seconds):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
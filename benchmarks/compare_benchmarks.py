@@ -0,0 +1,66 @@
+"""Compare two result files written by ``run_benchmarks.py``.
+
+Prints, for every case present in both files, the wall time and peak memory of the baseline
+and candidate runs and their ratio (candidate / baseline; below 1 is faster or smaller).
+
+Usage::
+
+    python benchmarks/compare_benchmarks.py before.json after.json [--threshold 1.1]
+
+With ``--threshold`` the script exits with status 1 if any case is slower than
+``threshold`` times the baseline.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report['environment'], {record['name']: record for record in report['results']}
+
+
+def ratio(new, old):
+    return new / old if new is not None and old else None
+
+
+def column(value, width, precision):
+    """Right-aligned number, or '-' for a missing value."""
+    return f"{'-' if value is None else f'{value:.{precision}f}':>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Fail if a case's time ratio exceeds this value.")
+    args = parser.parse_args()
+
+    old_env, old = load(args.baseline)
+    new_env, new = load(args.candidate)
+    print(f"baseline:  {old_env.get('commit')} ({old_env.get('timestamp')})")
+    print(f"candidate: {new_env.get('commit')} ({new_env.get('timestamp')})")
+    print(f"{'case':<48} {'old s':>10} {'new s':>10} {'time':>7} {'memory':>7}")
+
+    regressions = []
+    for name in sorted(old.keys() & new.keys()):
+        time_ratio = ratio(new[name]['seconds'], old[name]['seconds'])
+        memory_ratio = ratio(new[name]['peak_memory_bytes'], old[name]['peak_memory_bytes'])
+        print(f"{name:<48} {column(old[name]['seconds'], 10, 4)} {column(new[name]['seconds'], 10, 4)} "
+              f"{column(time_ratio, 7, 2)} {column(memory_ratio, 7, 2)}")
+        if args.threshold is not None and time_ratio is not None and time_ratio > args.threshold:
+            regressions.append(name)
+
+    for name in sorted(old.keys() ^ new.keys()):
+        print(f"{name:<48} only in {'baseline' if name in old else 'candidate'}")
+
+    if regressions:
+        print(f"Slower than {args.threshold}x baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
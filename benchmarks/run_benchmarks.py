@@ -0,0 +1,300 @@
+"""Benchmark suite for the vaxsim simulation kernels and analysis helpers.
+
+Every case is timed over ``--repeat`` runs (median wall time) and then run once more under
+``tracemalloc`` for its peak memory. Results are written as one JSON document with the git
+commit and library versions, so two files can be compared with ``compare_benchmarks.py``.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --output bench.json
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --filter model_random --repeat 5
+
+Population sizes are the baseline scenario rescaled to 1e4, 1e5 and 1e6 head; horizons are
+one and three years. The models run with ``instrumentation='fast'`` and the 'array' waning
+engine unless ``--instrumentation`` or ``--waning`` say otherwise, and nothing is saved to
+``output/``.
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from vaxsim import model
+from vaxsim.calibration import (evaluate_proposals, importance_weights, loss_function,
+                                perturbation_covariances)
+from vaxsim.utils import (ObservationSet, auc_below_threshold, batch_model_loss, load_params, model_loss,
+                          run_parameter_sweep)
+from vaxsim.waning import BatchedDecayTimeHistogram
+
+HEAD_COUNTS = (10_000, 100_000, 1_000_000)
+HORIZONS = (365, 1095)
+
+
+def scaled_params(head_count, days):
+    """Baseline parameters rescaled to ``head_count`` animals over ``days`` days."""
+    params = dict(load_params()['baseline'])
+    total = params['S0'] + params['I0'] + params['R0'] + params['V0']
+    for compartment in ('S0', 'R0', 'V0'):
+        params[compartment] = int(params[compartment] * head_count / total)
+    params['days'] = days
+    return params
+
+
+def synthetic_observations(days):
+    """Monthly seromonitoring and DIVA observations in the format read by ``model_loss``."""
+    import pandas as pd
+
+    dates = pd.date_range('2020-01-15', periods=max(days // 30 - 1, 1), freq='30D')
+    fraction = np.linspace(0, 1, len(dates))
+    return pd.DataFrame({'sero_eff': 0.4 + 0.2 * fraction, 'diva': 0.1 + 0.1 * fraction}, index=dates)
+
+
+def model_cases(wanted, instrumentation, waning):
+    wrappers = {
+        'random': functools.partial(model.sirsv_model_with_weibull_random_vaccination, save_variables=False,
+                                    instrumentation=instrumentation, waning=waning),
+        'targeted': functools.partial(model.sirsv_model_with_weibull_targeted_vaccination, save_variables=False,
+                                      instrumentation=instrumentation, waning=waning),
+    }
+    if waning == 'cohort':
+        # The cohort engine has no individual decay times to target
+        del wrappers['targeted']
+    for name, wrapper in wrappers.items():
+        for head_count in HEAD_COUNTS:
+            for days in HORIZONS:
+                case = f'model_{name}_N{head_count:.0e}_D{days}'
+                if wanted(case):
+                    yield (case, {'head_count': head_count, 'days': days}, 1,
+                           functools.partial(wrapper, scaled_params(head_count, days), 'benchmark'))
+    for head_count in HEAD_COUNTS:
+        for days in HORIZONS:
+            case = f'model_calibration_N{head_count:.0e}_D{days}'
+            if wanted(case):
+                yield (case, {'head_count': head_count, 'days': days}, 1,
+                       functools.partial(model.sirsv_model_with_weibull_calibration, scaled_params(head_count, days),
+                                         instrumentation=instrumentation, waning=waning))
+
+
+def metapopulation_case(wanted, num_patches=500, days=1095):
+    """Patches of 1e4 head with staggered campaigns, coupled to their neighbours on a ring."""
+    import scipy.sparse
+
+    names = (f'model_metapopulation_P{num_patches}_D{days}', f'model_metapopulation_movement_P{num_patches}_D{days}')
+    if not any(wanted(name) for name in names):
+        return
+
+    rng = np.random.default_rng(0)
+    params = scaled_params(10_000, days)
+    params['I0'] = np.where(np.arange(num_patches) == 0, 5, 0)
+    params['start_vax_day'] = rng.integers(1, 200, num_patches)
+    params['vax_period'] = rng.choice([180, 365], num_patches)
+    mixing = scipy.sparse.diags([0.05, 0.9, 0.05], [-1, 0, 1], shape=(num_patches, num_patches), format='csr')
+    yield (names[0], {'patches': num_patches, 'days': days}, num_patches,
+           functools.partial(model.sirsv_model_metapopulation, params, 'benchmark', mixing=mixing,
+                             save_variables=False))
+    # Three random trade links per patch
+    sources = np.repeat(np.arange(num_patches), 3)
+    targets = (sources + rng.integers(1, num_patches, len(sources))) % num_patches
+    movement = scipy.sparse.csr_matrix((np.full(len(sources), 0.001), (sources, targets)),
+                                       shape=(num_patches, num_patches))
+    yield (names[1], {'patches': num_patches, 'days': days, 'links': movement.nnz}, num_patches,
+           functools.partial(model.sirsv_model_metapopulation, params, 'benchmark', mixing=mixing,
+                             movement=movement, save_variables=False))
+
+
+def movement_cases(wanted):
+    """One day of moving vaccinated animals along trade links, for several patch and link counts.
+
+    The cost should follow the number of links (and movers), not the number of patches.
+    """
+    params = load_params()['baseline']
+    for num_patches, num_links in ((500, 1_500), (10_000, 1_500), (10_000, 15_000)):
+        name = f'batched_move_P{num_patches}_E{num_links}'
+        if not wanted(name):
+            continue
+        rng = np.random.default_rng(0)
+        decay_times = BatchedDecayTimeHistogram(params['weibull_shape_vax'], params['weibull_scale_vax'],
+                                                num_patches, rng)
+        decay_times.add(np.full(num_patches, 2_000))
+        sources = rng.integers(0, num_patches, num_links)
+        targets = (sources + rng.integers(1, num_patches, num_links)) % num_patches
+        # About two animals per link, as for a daily trade probability of 0.001 per link
+        movers = rng.poisson(2, num_links)
+        yield (name, {'patches': num_patches, 'links': num_links, 'movers': int(movers.sum())}, 1,
+               functools.partial(decay_times.move, np.repeat(sources, movers), np.repeat(targets, movers)))
+
+
+def sweep_case(wanted, instrumentation, workers):
+    name = 'run_parameter_sweep_3x3_N1e+04_D365'
+    if not wanted(name):
+        return
+    params = scaled_params(10_000, 365)
+    sirsv_model = functools.partial(model.sirsv_model_with_weibull_random_vaccination, save_variables=False,
+                                    instrumentation=instrumentation)
+    vax_rates = np.linspace(0.005, 0.03, 3)
+    vax_periods = np.array([90, 180, 335])
+    yield (name, {'grid': 9, 'workers': workers}, 9,
+           functools.partial(run_parameter_sweep, sirsv_model, params, 'vax_rate', vax_rates, 'vax_period',
+                             vax_periods, workers=workers))
+
+
+def analysis_cases(wanted):
+    names = ('model_loss_D1095', 'model_loss_observations_D1095', 'batch_model_loss_P200_D1095',
+             'auc_below_threshold_D1095')
+    # The inputs are a 1e6-head, three-year simulation; skip it when no case is wanted
+    if not any(wanted(name) for name in names):
+        return
+    params = scaled_params(1_000_000, 1095)
+    S, I, R, V = model.sirsv_model_with_weibull_random_vaccination(params, 'benchmark', save_variables=False,
+                                                                   instrumentation='fast')
+    data = synthetic_observations(1095)
+    yield ('model_loss_D1095', {'days': 1095}, 1, functools.partial(model_loss, S, I, R, V, data))
+    observations = ObservationSet.from_frame(data)
+    yield ('model_loss_observations_D1095', {'days': 1095}, 1,
+           functools.partial(model_loss, S, I, R, V, observations))
+    batch = [np.repeat(compartment[None], 200, axis=0) for compartment in (S, I, R, V)]
+    yield ('batch_model_loss_P200_D1095', {'particles': 200, 'days': 1095}, 200,
+           functools.partial(batch_model_loss, *batch, observations))
+    yield ('auc_below_threshold_D1095', {'days': 1095}, 1, functools.partial(auc_below_threshold, S, I, R, V, 1095))
+
+
+def smc_generation_case(wanted, num_particles, head_count, days):
+    """One weighted SMC-ABC generation: perturb, evaluate every proposal and reweight."""
+    name = f'smc_abc_generation_P{num_particles}_N{head_count:.0e}_D{days}'
+    if not wanted(name):
+        return
+    all_params = load_params()
+    bounds_keys = list(all_params['bounds'])
+    bounds = np.array([all_params['bounds'][key] for key in bounds_keys], dtype=float)
+    baseline = scaled_params(head_count, days)
+    scale = head_count / 1_000_000
+    for j, key in enumerate(bounds_keys):
+        if key in ('S0', 'R0', 'V0'):
+            bounds[j] *= scale
+    data = ObservationSet.from_frame(synthetic_observations(days))
+    rng = np.random.default_rng(0)
+    particles = rng.uniform(bounds[:, 0], bounds[:, 1], size=(num_particles, len(bounds_keys)))
+    weights = np.full(num_particles, 1 / num_particles)
+    losses = rng.uniform(size=num_particles)
+
+    def generation():
+        covariances = perturbation_covariances(particles, weights, losses, 0.5)
+        chol = np.linalg.cholesky(covariances)
+        parents = rng.choice(num_particles, size=num_particles, p=weights)
+        proposals = particles[parents] + np.einsum('nij,nj->ni', chol[parents], rng.standard_normal(particles.shape))
+        proposals = np.clip(proposals, bounds[:, 0], bounds[:, 1])
+        evaluate = functools.partial(loss_function, bounds_keys=bounds_keys, baseline=baseline, data=data)
+        evaluate_proposals(evaluate, proposals)
+        return importance_weights(proposals, particles, weights, covariances)
+
+    yield (name, {'particles': num_particles, 'head_count': head_count, 'days': days}, num_particles, generation)
+
+
+def measure(run, repeat, memory):
+    """Median wall time over ``repeat`` runs and, optionally, peak traced memory of one run."""
+    # The loss functions print every evaluation; keep stdout for the JSON report
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _measure(run, repeat, memory)
+
+
+def _measure(run, repeat, memory):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.median(times), min(times), peak
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', type=Path, help="Write the results to this JSON file.")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="Only run cases whose name contains this string (may be repeated).")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case. Default is 3.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak memory run.")
+    parser.add_argument('--instrumentation', choices=['fast', 'checked', 'trace'], default='fast',
+                        help="Instrumentation level of the models. Default is 'fast'.")
+    parser.add_argument('--waning', choices=['array', 'histogram', 'cohort'], default='array',
+                        help="Waning engine of the model cases. Default is 'array'.")
+    parser.add_argument('--workers', type=int, default=1, help="Workers for the parameter sweep. Default is 1.")
+    parser.add_argument('--particles', type=int, default=20, help="Particles in the SMC-ABC generation. Default is 20.")
+    args = parser.parse_args()
+
+    def wanted(name):
+        return not args.filter or any(pattern in name for pattern in args.filter)
+
+    # The case generators skip building the inputs of cases that are not wanted
+    groups = [
+        model_cases(wanted, args.instrumentation, args.waning),
+        metapopulation_case(wanted),
+        movement_cases(wanted),
+        sweep_case(wanted, args.instrumentation, args.workers),
+        analysis_cases(wanted),
+        smc_generation_case(wanted, args.particles, 10_000, 365),
+    ]
+
+    results = []
+    for group in groups:
+        for name, case_params, simulations, run in group:
+            if not wanted(name):
+                continue
+            seconds, best, peak = measure(run, args.repeat, not args.no_memory)
+            record = {
+                'name': name,
+                'params': case_params,
+                'seconds': seconds,
+                'min_seconds': best,
+                'peak_memory_bytes': peak,
+                'simulations': simulations,
+                'simulations_per_second': simulations / seconds if seconds > 0 else None,
+                'repeat': args.repeat,
+            }
+            results.append(record)
+            print(json.dumps(record), file=sys.stderr)
+
+    report = {'environment': environment(), 'instrumentation': args.instrumentation, 'waning': args.waning,
+              'results': results}
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
 """VAXSIM: FMD Vaccination Strategy Simulator"""
 
+import importlib
+
 __version__ = "0.1.1"
 
-from . import model
-from . import plot
-from . import utils
-from . import calibration
+__all__ = ["model", "plot", "utils", "calibration", "waning", "diagnostics", "cache", "store"]
+
 
-__all__ = ["model", "plot", "utils", "calibration"]
\ No newline at end of file
+def __getattr__(name):
+    # Submodules are imported on first access, so ``import vaxsim.model`` does not load
+    # the plotting stack pulled in by ``vaxsim.plot`` and ``vaxsim.calibration``.
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,283 @@
+"""Content-addressed cache of simulation results.
+
+A result is stored under a SHA-256 key derived from the model function (including the
+options bound with :func:`functools.partial`), every argument of the call with defaults
+filled in (parameters, random seed, seeding configuration, ...) and the version of the
+vaxsim source code. Re-running an unchanged scenario therefore loads its result instead of
+simulating it again, while editing a parameter, the seed or the code produces a new key.
+
+Results are kept in two tiers: a small least-recently-used memory tier per process and an
+on-disk tier of ``.npz`` files under ``output/saved_variables/cache``, shared by worker
+processes and later runs and bounded in total size by evicting the least recently used
+files. Wrap a model with :class:`CachedModel` to use the cache::
+
+    cache = ResultCache()
+    sirsv_model = CachedModel(sirsv_model_with_weibull_random_vaccination, cache)
+    analyse_scenarios(sirsv_model, params)
+
+Only the return value is cached: files a model writes as a side effect (saved variables,
+diagnostics, traces) are not written again on a cache hit.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+import vaxsim
+
+DEFAULT_CACHE_DIR = os.path.join("output/saved_variables", "cache")
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """Hash of the vaxsim version and the source of its modules."""
+    digest = hashlib.sha256(vaxsim.__version__.encode())
+    for path in sorted(Path(vaxsim.__file__).parent.glob('*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    """JSON-serialisable form of ``value`` that is equal for equal inputs.
+
+    Raises
+    ------
+    TypeError
+        If ``value`` has no canonical form, e.g. an arbitrary object or a snapshot callback
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return [_canonical(item) for item in value.tolist()]
+        return {'__ndarray__': value.dtype.str, 'shape': list(value.shape),
+                'sha256': hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, functools.partial):
+        return {'__partial__': _canonical(value.func), 'args': _canonical(value.args),
+                'keywords': _canonical(value.keywords)}
+    if isinstance(value, os.PathLike):
+        # Files and stores, e.g. a TrajectoryStore written to by the model
+        return {'__path__': os.fspath(value)}
+    if hasattr(value, 'columns') and hasattr(value, 'index') and hasattr(value, 'to_numpy'):
+        # pandas DataFrame, e.g. the observations of a loss function
+        return {'__frame__': _canonical(list(value.columns)), 'index': _canonical(value.index.to_numpy()),
+                'values': _canonical(value.to_numpy())}
+    owner = getattr(value, '__self__', None)
+    if callable(value) and '<' not in getattr(value, '__qualname__', '<') \
+            and (owner is None or inspect.ismodule(owner)):
+        # Module-level functions and classes are identified by name; bound methods, lambdas
+        # and closures carry state that the name does not capture
+        return {'__callable__': f"{value.__module__}.{value.__qualname__}"}
+    raise TypeError(f"Cannot derive a cache key from a {type(value).__name__}")
+
+
+def result_key(function, args=(), kwargs=None):
+    """Cache key of calling ``function(*args, **kwargs)``.
+
+    Arguments left at their defaults are filled in, so ``f(params)`` and
+    ``f(params, random_seed=42)`` share a key when 42 is the default seed.
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest
+    """
+    bound = inspect.signature(function).bind(*args, **(kwargs or {}))
+    bound.apply_defaults()
+    payload = {'function': _canonical(function), 'arguments': _canonical(dict(bound.arguments)),
+               'code': code_version()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _to_arrays(result):
+    """Flatten a result into named arrays for ``np.savez``, or None if it cannot be stored."""
+    if isinstance(result, np.ndarray):
+        return {'__kind__': np.array('array'), 'value': result}
+    if isinstance(result, (int, float, np.integer, np.floating)) and not isinstance(result, bool):
+        return {'__kind__': np.array('scalar'), 'value': np.asarray(result)}
+    if isinstance(result, (tuple, list)) and all(isinstance(item, np.ndarray) for item in result):
+        arrays = {f'item_{i}': item for i, item in enumerate(result)}
+        return {'__kind__': np.array(type(result).__name__), **arrays}
+    if isinstance(result, dict) and all(isinstance(key, str) and isinstance(item, (np.ndarray, int, float))
+                                        for key, item in result.items()):
+        return {'__kind__': np.array('dict'), **{f'key_{key}': np.asarray(item) for key, item in result.items()}}
+    return None
+
+
+def _from_arrays(data):
+    kind = str(data['__kind__'])
+    if kind == 'array':
+        return data['value']
+    if kind == 'scalar':
+        return data['value'][()]
+    if kind in ('tuple', 'list'):
+        items = [data[f'item_{i}'] for i in range(len(data.files) - 1)]
+        return tuple(items) if kind == 'tuple' else items
+    return {name[len('key_'):]: data[name] for name in data.files if name.startswith('key_')}
+
+
+def _copy(result):
+    """Copy of a cached result, so callers cannot modify the memory tier."""
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    if isinstance(result, (tuple, list)):
+        return type(result)(_copy(item) for item in result)
+    if isinstance(result, dict):
+        return {key: _copy(item) for key, item in result.items()}
+    return result
+
+
+class ResultCache:
+    """Two-tier least-recently-used store of simulation results keyed by :func:`result_key`.
+
+    Parameters
+    ----------
+    directory : str or Path, optional
+        Directory of the on-disk tier, by default output/saved_variables/cache.
+        None keeps results in memory only.
+    max_bytes : int, optional
+        Total size of the on-disk tier; the least recently used files are deleted beyond
+        it, by default 1 GiB. Each process adds the files it writes to the size it last
+        found on disk and only rescans the directory once that exceeds the limit.
+    memory_entries : int, optional
+        Number of results kept in memory, by default 128
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=2**30, memory_entries=128):
+        self.directory = None if directory is None else Path(directory)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._disk_bytes = None
+
+    def __getstate__(self):
+        # Worker processes share the disk tier but start with an empty memory tier
+        return {**self.__dict__, 'memory': OrderedDict()}
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached result for ``key``, or None."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return _copy(self.memory[key])
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with np.load(path) as data:
+                    result = _from_arrays(data)
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                result = None
+            if result is not None:
+                self._remember(key, result)
+                self.hits += 1
+                return _copy(result)
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        """Store ``result`` under ``key``; return False if the result type cannot be cached."""
+        arrays = _to_arrays(result)
+        if arrays is None:
+            return False
+        self._remember(key, _copy(result))
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name first, so concurrent readers never see a partial file;
+            # the name must not end in .npz, or evict() in another process could delete it
+            path = self._path(key)
+            temporary = self.directory / f"{key}.{os.getpid()}.npz.tmp"
+            with open(temporary, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, path)
+            if self._disk_bytes is not None:
+                self._disk_bytes += path.stat().st_size
+            if self._disk_bytes is None or self._disk_bytes > self.max_bytes:
+                self.evict()
+        return True
+
+    def evict(self):
+        """Delete the least recently used files until the on-disk tier fits in ``max_bytes``."""
+        entries = []
+        for path in self.directory.glob('*.npz'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
+
+    def clear(self):
+        """Remove every cached result."""
+        self.memory.clear()
+        if self.directory is not None:
+            for path in self.directory.glob('*.npz'):
+                path.unlink(missing_ok=True)
+            self._disk_bytes = 0
+
+
+class CachedModel:
+    """Model function whose results are looked up in a :class:`ResultCache` before running it.
+
+    Calls whose arguments have no canonical form, e.g. an ``initial_state`` or a snapshot
+    callback, and results that cannot be stored, e.g. nested dictionaries, bypass the cache.
+
+    Parameters
+    ----------
+    function : callable
+        Model function, e.g. :func:`vaxsim.model.sirsv_model_with_weibull_random_vaccination`
+        or a :func:`functools.partial` of it
+    cache : ResultCache, optional
+        Cache to use, by default a new :class:`ResultCache` in the default directory
+    """
+
+    def __init__(self, function, cache=None):
+        self.function = function
+        self.cache = ResultCache() if cache is None else cache
+        functools.update_wrapper(self, function)
+
+    def __call__(self, *args, **kwargs):
+        try:
+            key = result_key(self.function, args, kwargs)
+        except TypeError as error:
+            logging.debug(f"Not caching call of {self.function!r}: {error}")
+            return self.function(*args, **kwargs)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        result = self.function(*args, **kwargs)
+        self.cache.put(key, result)
+        return result
@@ -2,29 +2,38 @@
 Calibration module using Sequential Monte Carlo ABC sampling.
 """
 
+import contextlib
+import functools
+import json
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-import seaborn as sns
-from scipy.stats import gaussian_kde
 
+from vaxsim.cache import CachedModel
 from vaxsim.model import sirsv_model_with_weibull_calibration
-from vaxsim.utils import model_loss, load_params
+from vaxsim.utils import ObservationSet, RunningLoss, model_loss, load_params
 
 
 def log_results(params, loss, iteration, log_file):
     """Log calibration results to a CSV file."""
+    import pandas as pd
+
     log_data = {'iteration': iteration, 'loss': loss, **params}
     log_df = pd.DataFrame([log_data])
     log_df.to_csv(log_file, mode='a', header=not log_file.exists(), index=False)
 
-def loss_function(params, bounds_keys, baseline, data):
+def loss_function(params, bounds_keys, baseline, data, sirsv_model=sirsv_model_with_weibull_calibration,
+                  epsilon=None):
     """
     Compute loss for given parameters.
 
+    The model is only simulated up to the day after the last observation, as later days
+    do not enter the loss. With an ``epsilon`` the simulation also stops as soon as the running loss
+    over the observations so far exceeds it.
+
     Parameters
     ----------
     params : array-like
@@ -33,39 +42,66 @@ def loss_function(params, bounds_keys, baseline, data):
         List of parameter names.
     baseline : dict
         Baseline parameter values.
-    data : pd.DataFrame
-        Input data with seromonitoring and diva columns.
+    data : pd.DataFrame or ObservationSet
+        Input data with seromonitoring and diva columns, or its
+        :class:`~vaxsim.utils.ObservationSet` built once for many evaluations.
+    sirsv_model : callable, optional
+        Calibration model, e.g. wrapped in a :class:`~vaxsim.cache.CachedModel`.
+        Default is :func:`~vaxsim.model.sirsv_model_with_weibull_calibration`.
+    epsilon : float, optional
+        Stop the simulation early once the running loss exceeds this threshold, see
+        :class:`~vaxsim.utils.RunningLoss`. Default is None (always simulate to the last
+        observation). Calls with a threshold bypass a result cache.
 
     Returns
     -------
     float
-       Computed loss value.
+       Computed loss value, or for a run stopped early the running loss, which is a lower
+       bound of the full loss above ``epsilon``.
     """
     # Reconstruct parameter dictionary and extract scale_diva
     param_dict = {key: val for key, val in zip(bounds_keys, params)}
     scale_diva = param_dict.pop('scale_diva', 0.5)
     param_dict = {**baseline, **param_dict}
 
-    S, I, R, V = sirsv_model_with_weibull_calibration(param_dict)
-    loss = model_loss(S, I, R, V, data, scale_diva)
+    observations = data if isinstance(data, ObservationSet) else ObservationSet.from_frame(data)
+    # The calibration ordering applies a day's vaccinations to the previous day, so the
+    # last observed day is final once the day after it has been simulated
+    param_dict['days'] = min(param_dict['days'], observations.max_day + 2)
+
+    if epsilon is None:
+        S, I, R, V = sirsv_model(param_dict)
+    else:
+        running_loss = RunningLoss(observations, scale_diva, epsilon)
+        S, I, R, V = sirsv_model(param_dict, stop_condition=running_loss)
+        if running_loss.rejected:
+            print(f"Loss: {running_loss.loss:.4f} (stopped on day {len(S)})")
+            return running_loss.loss
+    loss = model_loss(S, I, R, V, observations, scale_diva)
     print(f"Loss: {loss:.4f}")
     return loss
 
-def plot_parameter_distributions(samples, param_names, output_dir):
+def plot_parameter_distributions(samples, param_names, output_dir, weights=None):
     """
     Plot KDE distributions for each parameter with the mode indicated by a vertical dashed line.
     
     The mode value is annotated with 90° rotated text, positioned inside the plot area.
+    Pass the importance weights of an SMC-ABC population as ``weights``.
     """
+    # The plotting stack is only loaded here, so proposal workers never import it
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from scipy.stats import gaussian_kde
+
     output_dir.mkdir(parents=True, exist_ok=True)
     for i, param in enumerate(param_names):
         plt.figure(figsize=(6, 4))
-        kde = gaussian_kde(samples[:, i])
+        kde = gaussian_kde(samples[:, i], weights=weights)
         xs = np.linspace(samples[:, i].min(), samples[:, i].max(), 1000)
         ys = kde(xs)
         mode_value = xs[np.argmax(ys)]
         
-        sns.kdeplot(samples[:, i], fill=True, color='lightblue', linewidth=2)
+        sns.kdeplot(x=samples[:, i], weights=weights, fill=True, color='lightblue', linewidth=2)
         plt.axvline(mode_value, color='r', linestyle='dashed', linewidth=1)
         
         # Get current axis limits for better placement
@@ -83,25 +119,233 @@ def plot_parameter_distributions(samples, param_names, output_dir):
         plt.savefig(output_dir / f"{param}_distribution.png")
         plt.close()
 
-def smc_abc_sampling(num_particles=200, num_generations=5, initial_epsilon=1.0, final_epsilon=0.1):
+def save_checkpoint(checkpoint_dir, generation, particles, weights, losses, epsilon,
+                    num_evaluations, rng, run_id):
+    """
+    Save the accepted particles of a completed generation.
+
+    Each generation is written to its own ``generation_XXX.npz`` file, first to a
+    temporary file and then moved into place, so a run killed mid-write never leaves
+    a truncated checkpoint behind.
+
+    Parameters
+    ----------
+    checkpoint_dir : Path
+        Directory holding the run's checkpoints.
+    generation : int
+        Index of the completed generation.
+    particles : np.ndarray
+        Accepted particles, shape (num_accepted, num_params).
+    weights : np.ndarray
+        Normalised importance weight of each accepted particle.
+    losses : np.ndarray
+        Loss of each accepted particle.
+    epsilon : float
+        Epsilon threshold used for the generation.
+    num_evaluations : int
+        Model evaluations spent so far, across all generations.
+    rng : np.random.Generator
+        Proposal generator; its state is stored so a resumed run draws the same
+        proposals an uninterrupted run would have.
+    run_id : str
+        Run identifier, reused for the log file and plots on resume.
+
+    Returns
+    -------
+    Path
+        Path of the written checkpoint.
+    """
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    path = checkpoint_dir / f"generation_{generation:03d}.npz"
+    tmp_path = path.with_suffix('.tmp.npz')
+    np.savez(tmp_path, generation=generation, particles=particles, weights=weights, losses=losses,
+             epsilon=epsilon, num_evaluations=num_evaluations,
+             rng_state=json.dumps(rng.bit_generator.state), run_id=run_id)
+    os.replace(tmp_path, path)
+    return path
+
+def load_checkpoint(checkpoint_dir):
+    """
+    Load the last completed generation from a checkpoint directory.
+
+    Parameters
+    ----------
+    checkpoint_dir : Path
+        Directory passed as ``checkpoint_dir`` to the interrupted run.
+
+    Returns
+    -------
+    dict or None
+        Keys ``generation``, ``particles``, ``weights``, ``losses``, ``epsilon``,
+        ``num_evaluations``, ``rng_state`` and ``run_id``, or None if no generation
+        has been completed yet.
+    """
+    paths = sorted(Path(checkpoint_dir).glob("generation_[0-9][0-9][0-9].npz"))
+    if not paths:
+        return None
+    with np.load(paths[-1]) as checkpoint:
+        return {
+            'generation': int(checkpoint['generation']),
+            'particles': checkpoint['particles'],
+            'weights': checkpoint['weights'],
+            'losses': checkpoint['losses'],
+            'epsilon': float(checkpoint['epsilon']),
+            'num_evaluations': int(checkpoint['num_evaluations']),
+            'rng_state': json.loads(str(checkpoint['rng_state'])),
+            'run_id': str(checkpoint['run_id']),
+        }
+
+def evaluate_proposals(evaluate, proposals, executor=None, chunksize=1):
+    """
+    Evaluate the loss of a batch of proposals, in parallel if an executor is given.
+
+    Losses are returned in proposal order, so accepting the first particles under
+    epsilon gives the same result for any number of workers.
+    """
+    if executor is None:
+        return [evaluate(proposal) for proposal in proposals]
+    return list(executor.map(evaluate, proposals, chunksize=chunksize))
+
+def effective_sample_size(weights):
+    """Kish effective sample size of a set of normalised importance weights."""
+    return 1.0 / np.sum(weights ** 2)
+
+def perturbation_covariances(particles, weights, losses, epsilon, kernel='covariance'):
     """
-    Perform Sequential Monte Carlo ABC sampling with profiling.
+    Per-parent covariance of the Gaussian perturbation kernel.
+
+    Parameters
+    ----------
+    particles : np.ndarray
+        Previous population, shape (num_particles, num_params).
+    weights : np.ndarray
+        Normalised importance weights of the previous population.
+    losses : np.ndarray
+        Loss of each particle in the previous population.
+    epsilon : float
+        Epsilon threshold of the generation about to be sampled.
+    kernel : {'covariance', 'olcm'}, optional
+        'covariance' uses twice the weighted population covariance for every
+        parent (Beaumont et al., 2009). 'olcm' uses the optimal local covariance
+        matrix (Filippi et al., 2013): the weighted second moment about each parent
+        of the particles that already satisfy the new epsilon, which shrinks the
+        kernel around parents in well-fitting regions.
+
+    Returns
+    -------
+    np.ndarray
+        Covariance matrices, shape (num_particles, num_params, num_params).
+    """
+    num_params = particles.shape[1]
+    jitter = 1e-6 * np.eye(num_params)
+    if kernel == 'covariance':
+        cov = 2 * np.atleast_2d(np.cov(particles, rowvar=False, aweights=weights)) + jitter
+        return np.broadcast_to(cov, (len(particles), num_params, num_params))
+    if kernel != 'olcm':
+        raise ValueError(f"Unknown perturbation kernel '{kernel}'. Expected 'covariance' or 'olcm'")
+    close = losses <= epsilon
+    if close.sum() < 2:
+        close = np.ones(len(particles), dtype=bool)
+    local_weights = weights[close] / weights[close].sum()
+    local_mean = local_weights @ particles[close]
+    centred = particles[close] - local_mean
+    local_cov = (centred * local_weights[:, None]).T @ centred
+    offsets = local_mean - particles
+    return local_cov + offsets[:, :, None] * offsets[:, None, :] + jitter
+
+def importance_weights(new_particles, particles, weights, covariances):
+    """
+    Normalised importance weights of a new population under a uniform prior.
+
+    The weight of each new particle is the prior density (constant inside the
+    bounds) over the mixture density it was proposed from,
+    ``sum_j w_j K(theta | theta_j, Sigma_j)``, evaluated in log space.
+    """
+    precisions = np.linalg.inv(covariances)
+    _, logdets = np.linalg.slogdet(covariances)
+    diffs = new_particles[:, None, :] - particles[None, :, :]
+    mahalanobis = np.einsum('mnd,nde,mne->mn', diffs, precisions, diffs)
+    log_kernel = np.log(weights) - 0.5 * (mahalanobis + logdets)
+    peak = log_kernel.max(axis=1, keepdims=True)
+    log_mixture = peak[:, 0] + np.log(np.exp(log_kernel - peak).sum(axis=1))
+    log_weights = -log_mixture
+    new_weights = np.exp(log_weights - log_weights.max())
+    return new_weights / new_weights.sum()
+
+def smc_abc_sampling(num_particles=200, num_generations=5, initial_epsilon=1.0, final_epsilon=0.1,
+                     epsilon_quantile=0.5, kernel='covariance', min_acceptance_rate=0.01,
+                     workers=1, batch_size=None, chunksize=1, random_seed=None,
+                     checkpoint_dir=None, resume=False, return_weights=False, cache=None,
+                     early_rejection=False):
+    """
+    Perform weighted Sequential Monte Carlo ABC sampling with profiling.
+
+    Each generation resamples parents by importance weight, perturbs them with a
+    Gaussian kernel adapted to the previous population and reweights the accepted
+    particles against the proposal mixture. Epsilon is set adaptively to the
+    ``epsilon_quantile`` of the previous generation's losses, never going below
+    ``final_epsilon``. Sampling stops after the generation run at ``final_epsilon``,
+    after ``num_generations`` generations, or once a generation's acceptance rate
+    falls below ``min_acceptance_rate``, whichever comes first. The run ends with a
+    report of model evaluations per effective posterior sample.
+
+    Proposals are drawn in batches and their losses evaluated across a process pool
+    when ``workers > 1``. After every generation the accepted particles, weights and
+    epsilon are checkpointed, so an interrupted run can be resumed from the last
+    completed generation with ``resume=True``.
 
     Parameters
     ----------
     num_particles : int
         Number of particles per generation.
     num_generations : int
-        Total number of generations.
+        Maximum number of generations.
     initial_epsilon : float
         Epsilon threshold for the first generation.
     final_epsilon : float
-        Epsilon threshold for the final generation.
+        Target epsilon threshold; the generation that reaches it is the last.
+    epsilon_quantile : float, optional
+        Quantile of the previous generation's losses used as the next epsilon.
+        Default is 0.5.
+    kernel : {'covariance', 'olcm'}, optional
+        Perturbation kernel, see :func:`perturbation_covariances`. Default is
+        'covariance'.
+    min_acceptance_rate : float, optional
+        A generation is abandoned, and sampling stops with the previous population,
+        once it has spent ``num_particles / min_acceptance_rate`` evaluations
+        without filling up; a completed generation below this rate is the last.
+        Default is 0.01.
+    workers : int, optional
+        Number of worker processes evaluating proposals. Default is 1 (serial).
+    batch_size : int, optional
+        Number of proposals evaluated per batch. Defaults to ``workers``; larger
+        batches keep the pool busier at the cost of a few surplus simulations at
+        the end of each generation.
+    chunksize : int, optional
+        Number of proposals sent to a worker at a time. Default is 1.
+    random_seed : int, optional
+        Seed of the proposal generator. Default is None (fresh entropy).
+    checkpoint_dir : str or Path, optional
+        Directory for per-generation checkpoints. Defaults to
+        ``output/calibration/checkpoints/<run_id>``.
+    resume : bool, optional
+        Continue from the last generation saved in ``checkpoint_dir``.
+    return_weights : bool, optional
+        Also return the importance weights of the final population.
+    cache : vaxsim.cache.ResultCache, optional
+        Look up model runs with identical parameters, e.g. the proposals replayed
+        after a resume, in this cache. Default is None (no caching).
+    early_rejection : bool, optional
+        Stop each simulation as soon as its running loss exceeds the generation's
+        epsilon, see :func:`loss_function`. Accepted particles and their losses are
+        unchanged; rejected proposals cost only the days up to the observation that
+        rejected them. Runs stopped early are not cached. Default is False.
 
     Returns
     -------
-    np.ndarray
-        Final set of accepted particles.
+    np.ndarray or tuple of np.ndarray
+        Final set of accepted particles, and their normalised importance weights
+        if ``return_weights`` is True.
     """
     overall_start = time.time()
     params_dict = load_params()
@@ -110,65 +354,139 @@ def smc_abc_sampling(num_particles=200, num_generations=5, initial_epsilon=1.0,
     bounds_keys = list(bounds_dict.keys())
     bounds = np.array([bounds_dict[key] for key in bounds_keys])
 
+    import pandas as pd
+
     data_path = Path(__file__).parent.parent.parent / 'data copy.csv'
-    data = pd.read_csv(data_path, parse_dates=['date'], index_col='date')
+    # Index the observations once instead of in every loss evaluation
+    data = ObservationSet.from_frame(pd.read_csv(data_path, parse_dates=['date'], index_col='date'))
+
+    if resume and checkpoint_dir is None:
+        raise ValueError("resume=True requires the checkpoint_dir of the interrupted run")
+    checkpoint = load_checkpoint(checkpoint_dir) if resume else None
 
-    # Create a unique run identifier based on timestamp and input settings
-    run_id = f"Run_{time.strftime('%Y%m%d_%H%M%S')}_P{num_particles}_G{num_generations}_E{initial_epsilon}-{final_epsilon}"
+    if checkpoint is not None:
+        run_id = checkpoint['run_id']
+    else:
+        # Create a unique run identifier based on timestamp and input settings
+        run_id = f"Run_{time.strftime('%Y%m%d_%H%M%S')}_P{num_particles}_G{num_generations}_E{initial_epsilon}-{final_epsilon}"
     # Use run_id for log file and plots folder
     log_file = Path(__file__).parent.parent.parent / 'output' / 'calibration' / f"calibration_log_{run_id}.csv"
     plots_dir = Path(__file__).parent.parent.parent / 'output' / 'calibration' / "plots" / run_id
+    if checkpoint_dir is None:
+        checkpoint_dir = Path(__file__).parent.parent.parent / 'output' / 'calibration' / "checkpoints" / run_id
+    checkpoint_dir = Path(checkpoint_dir)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # The model reseeds the global NumPy generator on every run, so proposals come
+    # from a dedicated generator that is independent of how losses are evaluated.
+    rng = np.random.default_rng(random_seed)
+    batch_size = batch_size or workers
+    max_evaluations = int(np.ceil(num_particles / min_acceptance_rate))
+    sirsv_model = sirsv_model_with_weibull_calibration if cache is None else CachedModel(sirsv_model_with_weibull_calibration, cache)
+    evaluate = functools.partial(loss_function, bounds_keys=bounds_keys, baseline=baseline, data=data,
+                                 sirsv_model=sirsv_model)
 
-    epsilons = np.linspace(initial_epsilon, final_epsilon, num_generations)
-
-    # Generation 0: Uniform sampling within bounds
-    particles = []
-    for i in range(num_particles):
-        sampled_params = np.random.uniform(bounds[:, 0], bounds[:, 1])
-        loss = loss_function(sampled_params, bounds_keys, baseline, data)
-        if loss <= epsilons[0]:
-            particles.append(sampled_params)
-            log_results(dict(zip(bounds_keys, sampled_params)), loss, iteration=f"Gen0_{i}", log_file=log_file)
-            print(f"Gen0_{i}: Loss = {loss:.4f}")
-    particles = np.array(particles)
-    print(f"Generation 0: Accepted {particles.shape[0]} out of {num_particles} particles.")
-
-    # Sequential generations: perturb accepted particles
-    for gen in range(1, num_generations):
-        gen_start = time.time()
-        new_particles = []
-        current_epsilon = epsilons[gen]
-        print(f"\nStarting Generation {gen} with epsilon = {current_epsilon}")
-
-        if particles.shape[0] == 0:
-            print("No accepted particles in previous generation; terminating SMC ABC sampling.")
-            break
-
-        cov = np.cov(particles, rowvar=False) + 1e-6 * np.eye(particles.shape[1])
+    def sample_generation(gen, epsilon, propose):
+        """Evaluate batches of proposals until num_particles are accepted under epsilon."""
+        accepted, accepted_losses = [], []
         iteration_counter = 0
-        while len(new_particles) < num_particles:
-            idx = np.random.choice(len(particles))
-            base_particle = particles[idx]
-            perturbed = np.random.multivariate_normal(base_particle, cov)
-            if not all(bounds[j, 0] <= perturbed[j] <= bounds[j, 1] for j in range(len(bounds_keys))):
-                continue
-            loss = loss_function(perturbed, bounds_keys, baseline, data)
-            iteration_id = f"Gen{gen}_{iteration_counter}"
-            print(f"{iteration_id}: Loss = {loss:.4f}")
-            if loss <= current_epsilon:
-                new_particles.append(perturbed)
-                log_results(dict(zip(bounds_keys, perturbed)), loss, iteration=iteration_id, log_file=log_file)
-            iteration_counter += 1
-        particles = np.array(new_particles)
-        print(f"Generation {gen}: Accepted {particles.shape[0]} particles in {time.time() - gen_start:.2f} seconds")
+        while len(accepted) < num_particles and iteration_counter < max_evaluations:
+            proposals = propose(min(batch_size, max_evaluations - iteration_counter))
+            batch_losses = evaluate_proposals(functools.partial(evaluate, epsilon=epsilon) if early_rejection else evaluate,
+                                              proposals, executor, chunksize)
+            # Every proposal of the batch was evaluated and counts, even once the generation is full
+            for proposal, loss in zip(proposals, batch_losses):
+                iteration_id = f"Gen{gen}_{iteration_counter}"
+                print(f"{iteration_id}: Loss = {loss:.4f}")
+                if loss <= epsilon and len(accepted) < num_particles:
+                    accepted.append(proposal)
+                    accepted_losses.append(loss)
+                    log_results(dict(zip(bounds_keys, proposal)), loss, iteration=iteration_id, log_file=log_file)
+                iteration_counter += 1
+        return np.array(accepted).reshape(-1, len(bounds_keys)), np.array(accepted_losses), iteration_counter
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 1 else None
+
+        if checkpoint is not None:
+            if checkpoint['particles'].shape[1] != len(bounds_keys):
+                raise ValueError(f"Checkpoint in {checkpoint_dir} has {checkpoint['particles'].shape[1]} "
+                                 f"parameters, expected {len(bounds_keys)}")
+            particles = checkpoint['particles']
+            weights = checkpoint['weights']
+            losses = checkpoint['losses']
+            epsilon = checkpoint['epsilon']
+            num_evaluations = checkpoint['num_evaluations']
+            rng.bit_generator.state = checkpoint['rng_state']
+            first_gen = checkpoint['generation'] + 1
+            print(f"Resuming from generation {checkpoint['generation']} in {checkpoint_dir} "
+                  f"({particles.shape[0]} accepted particles)")
+        else:
+            # Generation 0: Uniform sampling within bounds
+            epsilon = initial_epsilon
+            particles, losses, num_evaluations = sample_generation(
+                0, epsilon, lambda n: rng.uniform(bounds[:, 0], bounds[:, 1], size=(n, len(bounds_keys))))
+            weights = np.full(len(particles), 1.0 / max(len(particles), 1))
+            save_checkpoint(checkpoint_dir, 0, particles, weights, losses, epsilon, num_evaluations, rng, run_id)
+            print(f"Generation 0: Accepted {particles.shape[0]} out of {num_evaluations} particles.")
+            first_gen = 1
+            if particles.shape[0] < num_particles:
+                print(f"Generation 0 fell below the minimum acceptance rate of {min_acceptance_rate}; "
+                      "increase initial_epsilon.")
+                first_gen = num_generations
+
+        # Sequential generations: resample by weight, perturb and reweight
+        for gen in range(first_gen, num_generations):
+            if epsilon <= final_epsilon:
+                break
+            gen_start = time.time()
+            # epsilon stays that of the last accepted generation if this one is abandoned
+            gen_epsilon = max(np.quantile(losses, epsilon_quantile), final_epsilon)
+            print(f"\nStarting Generation {gen} with epsilon = {gen_epsilon}")
+
+            covariances = perturbation_covariances(particles, weights, losses, gen_epsilon, kernel)
+            chol = np.linalg.cholesky(covariances)
+
+            def propose(n):
+                proposals = []
+                while len(proposals) < n:
+                    parent = rng.choice(len(particles), p=weights)
+                    perturbed = particles[parent] + chol[parent] @ rng.standard_normal(len(bounds_keys))
+                    if np.all((bounds[:, 0] <= perturbed) & (perturbed <= bounds[:, 1])):
+                        proposals.append(perturbed)
+                return proposals
+
+            new_particles, new_losses, gen_evaluations = sample_generation(gen, gen_epsilon, propose)
+            num_evaluations += gen_evaluations
+            acceptance_rate = len(new_particles) / gen_evaluations
+            if len(new_particles) < num_particles:
+                print(f"Generation {gen}: Accepted only {len(new_particles)} particles in {gen_evaluations} "
+                      f"evaluations; stopping with the previous generation.")
+                break
+            weights = importance_weights(new_particles, particles, weights, covariances)
+            particles, losses, epsilon = new_particles, new_losses, gen_epsilon
+            save_checkpoint(checkpoint_dir, gen, particles, weights, losses, epsilon, num_evaluations, rng, run_id)
+            print(f"Generation {gen}: Accepted {particles.shape[0]} particles in {gen_evaluations} evaluations "
+                  f"(acceptance rate {acceptance_rate:.4f}, ESS {effective_sample_size(weights):.1f}) "
+                  f"in {time.time() - gen_start:.2f} seconds")
+            if acceptance_rate < min_acceptance_rate:
+                print(f"Acceptance rate fell below {min_acceptance_rate}; stopping.")
+                break
 
     overall_time = time.time() - overall_start
-    acceptance_rate = particles.shape[0] / (num_particles * num_generations)
-    print(f"\nFinal acceptance rate: {acceptance_rate:.4f}")
+    ess = effective_sample_size(weights) if len(weights) else 0.0
+    print(f"\nFinal epsilon: {epsilon}")
+    print(f"Total model evaluations: {num_evaluations}")
+    print(f"Effective sample size: {ess:.1f} of {particles.shape[0]} particles")
+    if ess > 0:
+        print(f"Model evaluations per effective sample: {num_evaluations / ess:.1f}")
     print(f"Total SMC ABC sampling time: {overall_time:.2f} seconds")
 
-    plot_parameter_distributions(particles, bounds_keys, plots_dir)
+    if particles.shape[0] > 1:
+        plot_parameter_distributions(particles, bounds_keys, plots_dir, weights=weights)
 
+    if return_weights:
+        return particles, weights
     return particles
 
 if __name__ == "__main__":
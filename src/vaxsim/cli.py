@@ -1,4 +1,5 @@
 import argparse
+import functools
 import logging
 import os
 import platform
@@ -11,10 +12,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import yaml
-from tqdm import tqdm
-from vaxsim.model import sirsv_model_with_weibull_random_vaccination, sirsv_model_with_weibull_targeted_vaccination
-from vaxsim.plot import plot_model, plot_parameter_sweep, plot_waning
-from vaxsim.utils import analyse_scenarios, compute_total_infections, run_parameter_sweep
+from vaxsim.model import (brute_force_seeding, sirsv_model_with_weibull_random_vaccination,
+                          sirsv_model_with_weibull_targeted_vaccination)
+from vaxsim.cache import CachedModel, ResultCache
+from vaxsim.diagnostics import default_diagnostics_file
+from vaxsim.plot import plot_decay_time_diagnostics, plot_model, plot_parameter_sweep, plot_waning
+from vaxsim.store import TrajectoryStore
+from vaxsim.utils import analyse_scenarios, run_parameter_sweep
 
 logger = logging.getLogger("vaxsim.run")
 warnings.filterwarnings('ignore')
@@ -50,6 +54,30 @@ def main():
     parser.add_argument("--model_type", choices=["targeted", "random"], default="random",
                         help="Select the model type to run. Default is 'random'.")
 
+    parser.add_argument("--waning", choices=["array", "histogram", "cohort"], default="array",
+                        help="Select the waning engine tracking remaining immunity. Default is 'array'.")
+
+    parser.add_argument("--mode", choices=["stochastic", "mean_field", "chain_binomial"], default="stochastic",
+                        help="Select 'stochastic' runs, the deterministic 'mean_field' expected trajectory or integer 'chain_binomial' runs. Default is 'stochastic'.")
+
+    parser.add_argument("--instrumentation", choices=["fast", "checked", "trace"], default="checked",
+                        help="Per-day instrumentation of the simulation loop: 'fast' (no per-day logging or checks), 'checked' (daily logging and invariant checks) or 'trace' (structured per-day records in output/traces). Default is 'checked'.")
+
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes for parameter sweeps, scenario analysis and brute force seeding. Default is 1 (serial).")
+
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="Number of sweep grid points sent to a worker at a time. Default is 1.")
+
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse the results of model runs with identical parameters, seeds and code from output/saved_variables/cache instead of simulating them again. Single-scenario runs always simulate, as they plot the decay-time diagnostics the model writes.")
+
+    parser.add_argument("--cache_size", type=int, default=1024,
+                        help="Size limit of the result cache in MB; the least recently used results are evicted beyond it. Default is 1024.")
+
+    parser.add_argument("--store", default=None,
+                        help="Append the trajectories of every model run to this study in output/saved_variables/store, one data file with a run index, instead of writing one .npz file per run.")
+
     def parse_seed_infection(value):
         try:
             method, rate = value.split(":") if ":" in value else (value, "0")
@@ -64,6 +92,8 @@ def main():
                         help="Select the seed method (random, brute, event_series, none) and rate (integer) for importing external infections, formatted as 'method:rate'. Example: 'random:10'. Default is 'none:0'.")
 
     args = parser.parse_args()
+    if args.waning == "cohort" and args.model_type == "targeted":
+        parser.error("--waning cohort keeps no individual decay times and cannot be combined with --model_type targeted.")
 
     log_filename = f"output/logs/sirsv_model_{args.scenario}_{datetime.now().strftime('%Y%m%d_%H%M')}.log"
     os.makedirs("output/logs/", exist_ok=True)
@@ -76,6 +106,9 @@ def main():
     try:
         logging.info(f"Running simulation with scenario: {args.scenario}")
         logging.info(f"Selected model types: {args.model_type}")
+        logging.info(f"Selected waning engine: {args.waning}")
+        logging.info(f"Selected simulation mode: {args.mode}")
+        logging.info(f"Selected instrumentation: {args.instrumentation}")
         log_system_info()
 
         param = load_params()
@@ -88,19 +121,39 @@ def main():
             sirsv_model = sirsv_model_with_weibull_random_vaccination
         else:
             raise ValueError("Invalid model type specified.")
+        sirsv_model = functools.partial(sirsv_model, waning=args.waning, mode=args.mode,
+                                        instrumentation=args.instrumentation)
+        if args.store:
+            sirsv_model = functools.partial(sirsv_model, store=TrajectoryStore(args.store))
+        seeding_analysis = brute_force_seeding
+        # Runs that plot decay-time diagnostics need the file the model writes as a side
+        # effect, which a cache hit would skip, so they always simulate
+        diagnosis_model = sirsv_model
+        if args.cache:
+            cache = ResultCache(max_bytes=args.cache_size * 2**20)
+            sirsv_model = CachedModel(sirsv_model, cache)
+            seeding_analysis = CachedModel(brute_force_seeding, cache)
 
         if args.scenario == "parameter_sweep":
             base_params = param['sweep']
             vax_rate_range = np.linspace(0.003, 0.033334, 20)
             vax_period_range = np.arange(30, 360, 30)
-            results = run_parameter_sweep(sirsv_model, base_params, 'vax_rate', vax_rate_range, 'vax_period', vax_period_range, model_type=args.model_type)
-            plot_parameter_sweep(results, 'vax_rate', 'vax_period', model_type=args.model_type)
+            # Grid points share one saved-variables file, which concurrent workers would race to
+            # overwrite; a trajectory store keeps every point as its own run
+            sweep_model = sirsv_model if args.store else functools.partial(sirsv_model, save_variables=False)
+            # The results are keyed by the analysis function, which the plot must read
+            analysis_function = 'auc'
+            results = run_parameter_sweep(sweep_model, base_params, 'vax_rate', vax_rate_range, 'vax_period', vax_period_range,
+                                          analysis_function=analysis_function, model_type=args.model_type,
+                                          workers=args.workers, chunksize=args.chunksize)
+            plot_parameter_sweep(results, 'vax_rate', 'vax_period', output_variable=analysis_function,
+                                 model_type=args.model_type)
             logging.info("Parameter sweep completed. Check the output directory for results.")
 
         elif args.scenario == "run_scenarios":
             output_dir = 'output/scenario_analysis'
             Path(output_dir).mkdir(parents=True, exist_ok=True)
-            analyse_scenarios(sirsv_model, param, output_dir, model_type=args.model_type)
+            analyse_scenarios(sirsv_model, param, output_dir, model_type=args.model_type, workers=args.workers)
             logging.info(f"Scenario analysis completed. Check the {output_dir} directory for results.")
 
         else:
@@ -112,7 +165,8 @@ def main():
 
             if seed_method == "none":
                 # Run vaccination models and store outputs
-                S, I, R, V = sirsv_model(scenario_params, args.scenario, diagnosis=True, seed_method='none')
+                S, I, R, V = diagnosis_model(scenario_params, args.scenario, diagnosis=True, seed_method='none')
+                plot_decay_time_diagnostics(default_diagnostics_file(args.scenario), args.scenario)
                 if args.scenario != "baseline" and scenario_params['seed_rate'] == 0 and scenario_params['I0'] == 0:
                     plot_waning(S, I, R, V, scenario_params['days'], scenario=args.scenario, model_type=args.model_type)
                 else:
@@ -120,22 +174,18 @@ def main():
 
             elif seed_method == "random":
                 # Run vaccination models with random seeding
-                S, I, R, V = sirsv_model(scenario_params, args.scenario, diagnosis=True, seed_method='random')
+                S, I, R, V = diagnosis_model(scenario_params, args.scenario, diagnosis=True, seed_method='random')
+                plot_decay_time_diagnostics(default_diagnostics_file(args.scenario), args.scenario)
                 plot_model(S, I, R, V, scenario_params['days'], scenario=args.scenario, model_type=args.model_type)
 
             elif seed_method == "brute":
-                logging.warning("Brute force seed infection will be implemented.")
                 output_dir = 'output/bruteforceseeding'
                 os.makedirs(output_dir, exist_ok=True)
-                total_infections_per_seeded_day = []
                 normalized_infections_per_seeded_day = []
 
-                for day in tqdm(range(scenario_params['days']), desc="Running Brute Force Simulations"):
-                    event_series = [0] * scenario_params['days']
-                    event_series[day] = 1
-                    S, I, R, V = sirsv_model(scenario_params, args.scenario, diagnosis=False, seed_method='event_series', event_series=event_series, save_variables=False)
-                    total_infections = compute_total_infections(I)
-                    total_infections_per_seeded_day.append(total_infections)
+                revaccination = 'targeted' if "targeted" in args.model_type else 'random'
+                total_infections_per_seeded_day = seeding_analysis(scenario_params, args.scenario, revaccination=revaccination,
+                                                                      waning=args.waning, mode=args.mode, workers=args.workers)
 
                 for day in range(len(total_infections_per_seeded_day)):
                     remaining_days = scenario_params['days'] - day
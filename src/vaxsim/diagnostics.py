@@ -0,0 +1,103 @@
+"""In-memory diagnostics collected by the simulation loop.
+
+The loop appends the decay-time histograms of the vaccinated and recovered animals at the
+beginning and end of every vaccination round to a :class:`DiagnosticsBuffer`, which is saved
+once as a compact ``.npz`` file when the run finishes. Rendering is done offline, e.g. with
+:func:`vaxsim.plot.plot_decay_time_diagnostics`, so no figures are drawn mid-simulation and the
+diagnostics of two runs can be compared array by array.
+"""
+
+import os
+
+import numpy as np
+
+
+def default_diagnostics_file(scenario):
+    """Default location of the diagnostics file of a scenario."""
+    return os.path.join("output/diagnosis", scenario, f"decay_times_{scenario}.npz")
+
+
+class DiagnosticsBuffer:
+    """Columnar buffer of decay-time histograms recorded during a simulation.
+
+    Each record holds the day, the vaccination round, whether it was taken at the beginning
+    or end of the round and the head counts per ``bin_width`` days until expiry of the
+    vaccinated and recovered animals.
+
+    Parameters
+    ----------
+    bin_width : int, optional
+        Width of the histogram bins in days, by default 10
+    """
+
+    def __init__(self, bin_width=10):
+        self.bin_width = bin_width
+        self.day = []
+        self.round = []
+        self.start = []
+        self.counts_vax = []
+        self.counts_rec = []
+
+    def __len__(self):
+        return len(self.day)
+
+    def _bin(self, day_counts):
+        day_counts = np.trim_zeros(np.asarray(day_counts), 'b')
+        padded = np.pad(day_counts, (0, -len(day_counts) % self.bin_width))
+        return padded.reshape(-1, self.bin_width).sum(axis=1)
+
+    def record(self, day, round_counter, start, decay_times_vax, decay_times_rec):
+        """Append the histograms of two waning engines.
+
+        Parameters
+        ----------
+        day : int
+            Simulation day
+        round_counter : int
+            Current vaccination round
+        start : bool
+            True at the beginning of the round, False at its end
+        decay_times_vax, decay_times_rec : waning engine
+            Engines tracking the vaccinated and recovered animals
+        """
+        self.day.append(day)
+        self.round.append(round_counter)
+        self.start.append(start)
+        self.counts_vax.append(self._bin(decay_times_vax.day_counts()))
+        self.counts_rec.append(self._bin(decay_times_rec.day_counts()))
+
+    def to_arrays(self):
+        """Return the records as arrays, with the histograms padded to common bin edges.
+
+        Returns
+        -------
+        dict
+            - day, round, start : (records,) arrays
+            - bin_edges : (bins + 1,) array of days until expiry
+            - counts_vax, counts_rec : (records, bins) arrays
+        """
+        num_bins = max((len(counts) for counts in self.counts_vax + self.counts_rec), default=0)
+
+        def stack(histograms):
+            return np.array([np.pad(counts, (0, num_bins - len(counts))) for counts in histograms]).reshape(-1, num_bins)
+
+        return {
+            'day': np.array(self.day, dtype=np.int64),
+            'round': np.array(self.round, dtype=np.int64),
+            'start': np.array(self.start, dtype=bool),
+            'bin_edges': np.arange(num_bins + 1) * self.bin_width,
+            'counts_vax': stack(self.counts_vax),
+            'counts_rec': stack(self.counts_rec),
+        }
+
+    def save(self, path):
+        """Save the records to an ``.npz`` file and return its path."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, **self.to_arrays())
+        return path
+
+
+def load_diagnostics(path):
+    """Load diagnostics saved with :meth:`DiagnosticsBuffer.save` as a dict of arrays."""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
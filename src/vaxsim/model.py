@@ -1,61 +1,239 @@
+import contextlib
+import copy
 import logging
 import os
 import random
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 
 import numpy as np
 from tqdm import tqdm
 
-from vaxsim.plot import plot_histogram
-from vaxsim.utils import generate_seed_schedule, seed_infection
+from vaxsim.diagnostics import DiagnosticsBuffer, default_diagnostics_file
+from vaxsim.store import run_metadata
+from vaxsim.utils import build_seed_counts, compute_total_infections, summarise_ensemble
+from vaxsim.waning import BatchedDecayTimeHistogram, DecayTimeExpected, create_waning_engine, restore_waning_engine
 
 warnings.filterwarnings('ignore')
 
 
-def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42, diagnosis=None, 
-                                              seed_method='none', event_series=None, save_variables=True):
-    """Simulate SIRSV model with random vaccination strategy and Weibull-distributed immunity waning.
-    
+def revaccinate_random(decay_times_vax, num_vax_to_reset):
+    """Re-vaccinate randomly selected animals, regardless of their immunity status."""
+    decay_times_vax.reset_random(num_vax_to_reset)
+
+
+def revaccinate_lowest(decay_times_vax, num_vax_to_reset):
+    """Re-vaccinate the animals with the lowest remaining immunity first."""
+    decay_times_vax.reset_lowest(num_vax_to_reset)
+
+
+REVACCINATION_STRATEGIES = {
+    'random': revaccinate_random,
+    'targeted': revaccinate_lowest,
+}
+
+INSTRUMENTATION_LEVELS = ('fast', 'checked', 'trace')
+
+MODES = ('stochastic', 'mean_field', 'chain_binomial')
+
+PATCH_PARAMS = ('S0', 'I0', 'R0', 'V0', 'beta', 'gamma', 'vax_rate', 'vax_period', 'vax_duration', 'start_vax_day')
+
+TRACE_FIELDS = ('day', 'round', 'S', 'I', 'R', 'V', 'new_seeds', 'new_infections', 'new_recoveries',
+                'new_vaccinations', 'revaccinated', 'waned_vax', 'waned_rec', 'tracked_vax', 'tracked_rec',
+                'population_error')
+
+
+def save_trace(trace, trace_file):
+    """Write per-day trace records, one row per day with a ``TRACE_FIELDS`` header, to a CSV file."""
+    os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+    np.savetxt(trace_file, trace, delimiter=',', header=','.join(TRACE_FIELDS), comments='', fmt='%.10g')
+
+
+@dataclass
+class SimulationState:
+    """State of a simulation at the start of a day, before that day's updates.
+
+    Snapshots are emitted by the models through ``snapshot_days`` and any model can resume
+    from one through ``initial_state``. A state is saved to and loaded from a single ``.npz``
+    file without pickling, so it can be kept alongside the saved trajectories.
+
+    Attributes
+    ----------
+    day : int
+        First day still to be simulated
+    S, I, R, V : numpy.ndarray
+        Compartment values for days ``0 .. day - 1``
+    N : float
+        Total population
+    decay_times_vax, decay_times_rec : waning engine
+        Remaining immunity of vaccinated and recovered animals
+    round_counter : int
+        Number of vaccination rounds started so far
+    to_vaccinate : float
+        Daily vaccinations of the current round
+    numpy_random_state, python_random_state : tuple
+        States of the global NumPy and ``random`` generators
+    """
+    day: int
+    S: np.ndarray
+    I: np.ndarray
+    R: np.ndarray
+    V: np.ndarray
+    N: float
+    decay_times_vax: object
+    decay_times_rec: object
+    round_counter: int
+    to_vaccinate: float
+    numpy_random_state: tuple
+    python_random_state: tuple
+
+    def save(self, path):
+        """Save the state to an ``.npz`` file."""
+        bit_generator, keys, pos, has_gauss, cached_gaussian = self.numpy_random_state
+        version, internal_state, gauss_next = self.python_random_state
+        arrays = {
+            'day': self.day, 'S': self.S, 'I': self.I, 'R': self.R, 'V': self.V, 'N': self.N,
+            'round_counter': self.round_counter, 'to_vaccinate': self.to_vaccinate,
+            'numpy_bit_generator': bit_generator, 'numpy_keys': keys, 'numpy_pos': pos,
+            'numpy_has_gauss': has_gauss, 'numpy_cached_gaussian': cached_gaussian,
+            'python_version': version, 'python_internal_state': np.array(internal_state, dtype=np.uint64),
+            'python_gauss_next': np.nan if gauss_next is None else gauss_next,
+        }
+        for prefix, engine in (('vax', self.decay_times_vax), ('rec', self.decay_times_rec)):
+            arrays.update({f'{prefix}_{key}': value for key, value in engine.state_dict().items()})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Load a state saved with :meth:`save`."""
+        with np.load(path) as data:
+            engines = [restore_waning_engine({key[len(prefix) + 1:]: data[key] for key in data.files
+                                              if key.startswith(f'{prefix}_')})
+                       for prefix in ('vax', 'rec')]
+            gauss_next = float(data['python_gauss_next'])
+            return cls(
+                day=int(data['day']), S=data['S'], I=data['I'], R=data['R'], V=data['V'], N=data['N'].item(),
+                decay_times_vax=engines[0], decay_times_rec=engines[1],
+                round_counter=int(data['round_counter']), to_vaccinate=data['to_vaccinate'].item(),
+                numpy_random_state=(str(data['numpy_bit_generator']), data['numpy_keys'], int(data['numpy_pos']),
+                                    int(data['numpy_has_gauss']), float(data['numpy_cached_gaussian'])),
+                python_random_state=(int(data['python_version']), tuple(int(x) for x in data['python_internal_state']),
+                                     None if np.isnan(gauss_next) else gauss_next),
+            )
+
+
+def sirsv_model_with_weibull(params, scenario, revaccination='random', random_seed=42, diagnosis=None,
+                             seed_method='none', event_series=None, waning='array', mode='stochastic',
+                             vaccination_target='round', ordering='scenario', clip_negative=False,
+                             instrumentation='checked', seed_counts=None, initial_state=None, snapshot_days=(),
+                             on_snapshot=None, trace_file=None, diagnostics_file=None, output=None,
+                             stop_condition=None):
+    """Simulate the SIRSV model with Weibull-distributed immunity waning.
+
+    This is the daily simulation kernel shared by the random, targeted and calibration models.
+
     Parameters
     ----------
     params : dict
-        Model parameters including:
-        - beta : float, transmission rate
-        - gamma : float, recovery rate
-        - vax_rate : float, vaccination rate
-        - weibull_shape_vax : float, shape parameter for vaccine immunity
-        - weibull_scale_vax : float, scale parameter for vaccine immunity
-        - weibull_shape_rec : float, shape parameter for natural immunity
-        - weibull_scale_rec : float, scale parameter for natural immunity
-        - days : int, simulation duration
-        - S0, I0, R0, V0 : int, initial population states
+        Model parameters, see :func:`sirsv_model_with_weibull_random_vaccination`
     scenario : str
         Name of simulation scenario
+    revaccination : str, callable or None, optional
+        Re-vaccination selection strategy applied at the start of every vaccination round,
+        by default 'random'. Either a key of ``REVACCINATION_STRATEGIES``, a callable
+        ``(decay_times_vax, num_vax_to_reset)`` or None to skip re-vaccination.
     random_seed : int, optional
         Random seed for reproducibility, by default 42
     diagnosis : bool, optional
-        Enable diagnostic plots, by default None
+        Record the decay-time histograms at the beginning and end of every vaccination round
+        in a :class:`~vaxsim.diagnostics.DiagnosticsBuffer`, saved to ``diagnostics_file`` when
+        the run finishes, by default None
     seed_method : str, optional
-        Method for seeding infections ('none', 'random', 'periodic'), by default 'none'
+        Method for seeding infections ('none', 'random', 'event_series', 'continuous',
+        'poisson'), by default 'none', see :func:`vaxsim.utils.build_seed_counts`.
+        'continuous' seeds ``seed_rate`` infections every day.
     event_series : array-like, optional
         Time series of seeding events, by default None
-    save_variables : bool, optional
-        Save simulation results to file, by default True
+    waning : str, optional
+        Waning engine tracking remaining immunity, by default 'array'. The 'cohort' engine
+        keeps no individual decay times and so cannot be used with 'targeted' re-vaccination.
+    mode : str, optional
+        'stochastic' samples individual decay times, 'mean_field' propagates expected cohort
+        sizes through the discretised Weibull survival function, by default 'stochastic'.
+        In 'mean_field' mode ``waning`` is ignored and head counts are not rounded.
+        'chain_binomial' keeps the compartments as int64 head counts and draws the day's
+        infections and recoveries as binomials with probabilities ``1 - exp(-beta * I / N)``
+        and ``1 - exp(-gamma)``, so the population is conserved exactly and every recovered
+        animal enters the waning engine. Vaccinated and seeded animals leave the susceptibles
+        before infections are drawn, also under the 'calibration' ordering.
+    vaccination_target : str, optional
+        'round' fixes the daily vaccinations at the start of each round from the susceptibles
+        on that day, 'daily' recomputes them from the susceptibles of the previous day,
+        by default 'round'
+    ordering : str, optional
+        Order of the daily updates, by default 'scenario'. 'calibration' reproduces the
+        calibration model: vaccinations are applied to the previous day's compartments before
+        transmission, waning is counted on the day a decay time reaches zero and recovered
+        animals join the waning pool after the day's waning step.
+    clip_negative : bool, optional
+        Clip compartments at zero after every day, by default False
+    instrumentation : str, optional
+        Per-day instrumentation, by default 'checked'. 'fast' does no per-day logging,
+        formatting or invariant checks and shows no progress bar. 'checked' logs daily progress
+        and checks population conservation, non-negative compartments and the waning engine
+        head count. 'trace' writes one structured record per day (``TRACE_FIELDS``) to
+        ``trace_file`` instead of log lines.
+    seed_counts : array-like, optional
+        Infections seeded on each day, overriding ``seed_method``, by default None.
+        Build multi-event or importation patterns with :func:`vaxsim.utils.build_seed_counts`.
+    initial_state : SimulationState, optional
+        Continue a simulation from this state instead of the initial conditions in ``params``,
+        by default None. The state is not modified.
+    snapshot_days : iterable of int, optional
+        Days at whose start ``on_snapshot`` receives a :class:`SimulationState`, by default none.
+        The global random state is restored after each call, so the callback may run other
+        simulations.
+    on_snapshot : callable, optional
+        Callback receiving each snapshot, by default None
+    trace_file : str, optional
+        CSV file for 'trace' instrumentation, by default output/traces/{scenario}_trace.csv
+    diagnostics_file : str, optional
+        File for the ``diagnosis`` records, by default
+        output/diagnosis/{scenario}/decay_times_{scenario}.npz
+    output : TrajectoryStream, optional
+        Stream the compartments to a file in chunks while the simulation runs, by default
+        None. Only one chunk of days is kept in memory, so memory use does not grow with
+        ``days`` (except for the 'trace' records). Cannot be combined with ``snapshot_days``.
+    stop_condition : callable, optional
+        Called after the update of every day ``t`` as ``stop_condition(t - 1, S, I, R, V)``
+        with the compartments of the previous day, which no later update changes, by default
+        None. The simulation stops as soon as it returns True, e.g. once a running loss
+        exceeds the ABC epsilon (see :class:`vaxsim.utils.RunningLoss`). Cannot be combined
+        with an ``output`` stream.
 
     Returns
     -------
     tuple
-        (S, I, R, V) arrays containing compartment values over time
-        S : numpy.ndarray, Susceptible population
-        I : numpy.ndarray, Infected population
-        R : numpy.ndarray, Recovered population
-        V : numpy.ndarray, Vaccinated population
-    
-    Notes
-    -----
-    The random vaccination strategy selects animals randomly for re-vaccination,
-    regardless of their immunity status.
+        (S, I, R, V) arrays containing compartment values over time. With an ``output``
+        stream these are read-only memory-mapped views of its file, holding the days it keeps.
+        A run stopped by ``stop_condition`` on day ``t`` returns days ``0 .. t - 1``.
     """
+    if instrumentation not in INSTRUMENTATION_LEVELS:
+        raise ValueError(f"Invalid instrumentation '{instrumentation}'. Choose one of {list(INSTRUMENTATION_LEVELS)}.")
+    checks = instrumentation == 'checked'
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode '{mode}'. Choose one of {list(MODES)}.")
+    if ordering not in ('scenario', 'calibration'):
+        raise ValueError(f"Invalid ordering '{ordering}'. Choose 'scenario' or 'calibration'.")
+    if isinstance(revaccination, str):
+        if revaccination not in REVACCINATION_STRATEGIES:
+            raise ValueError(f"Invalid revaccination strategy '{revaccination}'. Choose one of {list(REVACCINATION_STRATEGIES)}.")
+        revaccination = REVACCINATION_STRATEGIES[revaccination]
+    if revaccination is revaccinate_lowest and waning == 'cohort' and mode != 'mean_field':
+        raise ValueError("Targeted re-vaccination needs individual decay times, which the 'cohort' waning "
+                         "engine does not keep. Choose the 'array' or 'histogram' engine.")
+
     np.random.seed(random_seed)
     random.seed(random_seed)
 
@@ -75,156 +253,380 @@ def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42
 
     # Initial conditions
     S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
+    chain_binomial = mode == 'chain_binomial'
+    if chain_binomial:
+        S0, I0, R0, V0 = (int(round(x)) for x in (S0, I0, R0, V0))
     N = S0 + I0 + R0 + V0
 
-    S, I, R, V = [np.zeros(days) for _ in range(4)]
+    # Compartments of day t are held at index i = t - offset; with an output stream only a
+    # window of chunk_days + 1 days is kept and the window is shifted after every chunk
+    if output is not None and snapshot_days:
+        raise ValueError("Snapshots need the full trajectories; they cannot be combined with an output stream.")
+    if output is not None and stop_condition is not None:
+        raise ValueError("A stopped run would leave the output stream incomplete; use stop_condition without it.")
+    window = days if output is None else min(days, output.chunk_days + 1)
+    offset = 0
+    S, I, R, V = [np.zeros(window, dtype=np.int64 if chain_binomial else float) for _ in range(4)]
     S[0], I[0], R[0], V[0] = S0, I0, R0, V0
+    if output is not None:
+        output.open(days)
 
-    decay_times_vax = []
-    decay_times_rec = []
-
-    # Seed initial vaccinated and recovered individuals' waning times
-    if V0 > 0:
-        decay_times_vax.extend((weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V0))).astype(int).tolist())
-    if R0 > 0:
-        decay_times_rec.extend((weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R0))).astype(int).tolist())
+    head_count = float if mode == 'mean_field' else int
 
-    round_counter = 0
+    # Counting waning when a decay time reaches zero is the same as waning a day earlier
+    decay_offset = -1 if ordering == 'calibration' else 0
 
-    logging.info(f"Starting simulation for scenario: {scenario}")
-
-    if seed_method == 'none':
-        seed_schedule = [0] * days
-    else :
-        seed_schedule = generate_seed_schedule(method=seed_method, min_day=1, max_day=days, days=days, num_seeds=3, event_series=event_series)
-
-    for t in tqdm(range(1, days), desc=f"Running {scenario} simulation", unit="day"):
-
-        new_seeds = min(seed_infection(t, seed_schedule, seed_rate), S[t-1])
+    if initial_state is None:
+        if mode == 'mean_field':
+            decay_times_vax = DecayTimeExpected(weibull_shape_vax, weibull_scale_vax)
+            decay_times_rec = DecayTimeExpected(weibull_shape_rec, weibull_scale_rec)
+        else:
+            decay_times_vax = create_waning_engine(waning, weibull_shape_vax, weibull_scale_vax)
+            decay_times_rec = create_waning_engine(waning, weibull_shape_rec, weibull_scale_rec)
+
+        # Seed initial vaccinated and recovered individuals' waning times
+        if V0 > 0:
+            decay_times_vax.add(V0, decay_offset)
+        if R0 > 0:
+            decay_times_rec.add(R0, decay_offset)
+
+        round_counter = 0
+        to_vaccinate = 0
+        start_day = 1
+    else:
+        start_day = initial_state.day
+        if not 1 <= start_day <= days:
+            raise ValueError(f"Cannot resume from day {start_day} of a {days}-day simulation.")
+        history = (initial_state.S, initial_state.I, initial_state.R, initial_state.V)
+        if output is None:
+            for compartment, values in zip((S, I, R, V), history):
+                compartment[:start_day] = values[:start_day]
+        else:
+            output.write(0, *(values[:start_day - 1] for values in history))
+            offset = start_day - 1
+            for compartment, values in zip((S, I, R, V), history):
+                compartment[0] = values[start_day - 1]
+        N = initial_state.N
+        decay_times_vax = copy.deepcopy(initial_state.decay_times_vax)
+        decay_times_rec = copy.deepcopy(initial_state.decay_times_rec)
+        round_counter = initial_state.round_counter
+        to_vaccinate = initial_state.to_vaccinate
+
+    if checks:
+        logging.info(f"Starting simulation for scenario: {scenario}")
+
+    if seed_counts is None:
+        seed_counts = build_seed_counts(seed_method, days, seed_rate, min_day=1, max_day=days, num_seeds=3,
+                                        event_series=event_series, expected=(mode == 'mean_field'))
+    elif len(seed_counts) < days:
+        raise ValueError(f"seed_counts covers {len(seed_counts)} days, expected at least {days}.")
+
+    if initial_state is not None:
+        np.random.set_state(initial_state.numpy_random_state)
+        random.setstate(initial_state.python_random_state)
+
+    snapshot_days = set(snapshot_days)
+
+    day_range = range(start_day, days)
+    if checks:
+        day_range = tqdm(day_range, desc=f"Running {scenario} simulation", unit="day")
+    trace = np.zeros((days, len(TRACE_FIELDS))) if instrumentation == 'trace' else None
+    diagnostics = DiagnosticsBuffer() if diagnosis else None
+    end = days
+
+    for t in day_range:
+        i = t - offset
+        if i == window:
+            output.write(offset, S[:-1], I[:-1], R[:-1], V[:-1])
+            for compartment in (S, I, R, V):
+                compartment[0] = compartment[-1]
+            offset += window - 1
+            i = 1
+
+        if t in snapshot_days and on_snapshot is not None:
+            state = SimulationState(t, S[:t].copy(), I[:t].copy(), R[:t].copy(), V[:t].copy(), N,
+                                    copy.deepcopy(decay_times_vax), copy.deepcopy(decay_times_rec),
+                                    round_counter, to_vaccinate, np.random.get_state(), random.getstate())
+            on_snapshot(state)
+            np.random.set_state(state.numpy_random_state)
+            random.setstate(state.python_random_state)
+
+        new_seeds = min(seed_counts[t], S[i-1])
+        num_revaccinated = 0
 
         # VACCINATION ROUND
         if t == start_vax_day or (t > start_vax_day and (t - start_vax_day) % vax_period == 0):
             round_counter += 1
-            to_vaccinate = min(vax_rate * S[t-1], S[t-1])
-            logging.info(f"Round {round_counter} start day: {t}")
+            to_vaccinate = min(vax_rate * S[i-1], S[i-1])
+            if checks:
+                logging.info(f"Round {round_counter} start day: {t}")
 
             # Calculate the number of vaccinations to reset, considering the vaccination period
-            num_vax_to_reset = int(min(vax_rate * vax_period * V[t-1], V[t-1]))
-            if num_vax_to_reset > 0 and len(decay_times_vax) > 0:
+            num_vax_to_reset = head_count(min(vax_rate * vax_period * V[i-1], V[i-1]))
+            if revaccination is not None and num_vax_to_reset > 0 and len(decay_times_vax) > 0:
                 num_vax_to_reset = min(num_vax_to_reset, len(decay_times_vax))
+                revaccination(decay_times_vax, num_vax_to_reset)
+                num_revaccinated = num_vax_to_reset
+                if checks:
+                    logging.info(f"Day {t}: Re-vaccination reset: {num_vax_to_reset} decay times reset")
 
-                # Method 1: Randomly select decay times to reset
-                indices_to_reset = random.sample(range(len(decay_times_vax)), num_vax_to_reset)
-
-                # Method 2: Sort decay times and select indices with the lowest decay times
-                # sorted_indices = np.argsort(decay_times_vax)
-                # indices_to_reset = sorted_indices[:num_vax_to_reset]
-
-                for i in indices_to_reset:
-                    decay_times_vax[i] = weibull_scale_vax * np.random.weibull(weibull_shape_vax)
-                logging.info(f"Day {t}: Re-vaccination reset: {num_vax_to_reset} decay times reset")
-
-            if diagnosis:
-                plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=True)
+            if diagnostics is not None:
+                diagnostics.record(t, round_counter, True, decay_times_vax, decay_times_rec)
 
         # Check if it's within a vaccination period
         is_vax_period = (t >= start_vax_day) and ((t - start_vax_day) % vax_period < vax_duration)
         if is_vax_period:
-            new_vaccinations = int(min(to_vaccinate, S[t-1]))
-            logging.info(f"Day {t}: Daily vaccinations: {new_vaccinations}")
+            if vaccination_target == 'daily':
+                to_vaccinate = vax_rate * S[i-1]
+            new_vaccinations = head_count(min(to_vaccinate, S[i-1]))
+            if checks:
+                logging.info(f"Day {t}: Daily vaccinations: {new_vaccinations}")
+
+            if ordering == 'calibration' and not chain_binomial:
+                S[i-1] -= new_vaccinations
+                V[i-1] += new_vaccinations
 
             # Update compartments for new vaccinations
             if new_vaccinations > 0:
-                new_susceptible_decay_times = (weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)).astype(int).tolist()
                 initial_len = len(decay_times_vax)
-                decay_times_vax.extend(new_susceptible_decay_times)
-                updated_len = len(decay_times_vax)
-                logging.info(f"Day {t}: New vaccinations: {new_vaccinations}, Length of decay_times_vax: {initial_len}, Length of decay_times_vax: {updated_len}")
-            else:
-                S[t] = S[t-1]
-                R[t] = R[t-1]
-                V[t] = V[t-1]
+                decay_times_vax.add(new_vaccinations, decay_offset)
+                if checks:
+                    logging.info(f"Day {t}: New vaccinations: {new_vaccinations}, Length of decay_times_vax: {initial_len}, Length of decay_times_vax: {len(decay_times_vax)}")
 
         else:
             new_vaccinations = 0
 
         # Calculate transitions
-        new_infections = beta * S[t-1] * I[t-1] / N + new_seeds
-        new_recoveries = gamma * I[t-1]
+        if chain_binomial:
+            new_seeds = min(int(new_seeds), S[i-1] - new_vaccinations)
+            exposed = S[i-1] - new_vaccinations - new_seeds
+            new_infections = np.random.binomial(exposed, -np.expm1(-beta * I[i-1] / N)) + new_seeds
+            new_recoveries = np.random.binomial(I[i-1], -np.expm1(-gamma))
+        else:
+            new_infections = beta * S[i-1] * I[i-1] / N + new_seeds
+            new_recoveries = gamma * I[i-1]
 
         # Update compartments
-        S[t] = S[t-1] - new_infections - new_vaccinations
-        I[t] = I[t-1] + new_infections - new_recoveries
-        R[t] = R[t-1] + new_recoveries
-        V[t] = V[t-1] + new_vaccinations
+        S[i] = S[i-1] - new_infections - new_vaccinations
+        I[i] = I[i-1] + new_infections - new_recoveries
+        R[i] = R[i-1] + new_recoveries
+        V[i] = V[i-1] + new_vaccinations
 
-        if new_recoveries > 0:
-            new_recovered_decay_times = (weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))).astype(int).tolist()
-            decay_times_rec.extend(new_recovered_decay_times)
+        if new_recoveries > 0 and ordering == 'scenario':
+            decay_times_rec.add(new_recoveries)
 
         # IMMUNITY WANING
-        logging.info(f"Day {t}: Before waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
+        if checks:
+            logging.info(f"Day {t}: Before waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
 
-        decay_times_vax_before = len(decay_times_vax)
-        decay_times_vax = [x - 1 for x in decay_times_vax if x > 0]
-        num_waned_vax = decay_times_vax_before - len(decay_times_vax)
+        num_waned_vax = decay_times_vax.wane()
+        num_waned_rec = decay_times_rec.wane()
 
-        decay_times_rec_before = len(decay_times_rec)
-        decay_times_rec = [x - 1 for x in decay_times_rec if x > 0]
-        num_waned_rec = decay_times_rec_before - len(decay_times_rec)
+        # Move waned individuals back to susceptible compartment
+        S[i] += num_waned_vax + num_waned_rec
+        V[i] -= num_waned_vax
+        R[i] -= num_waned_rec
 
-        logging.info(f"Day {t}: Waned vaccinated: {num_waned_vax}, Waned recovered: {num_waned_rec}")
-        logging.info(f"Day {t}: After waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
+        if new_recoveries > 0 and ordering == 'calibration':
+            decay_times_rec.add(new_recoveries, decay_offset)
 
-        # Move waned individuals back to susceptible compartment
-        S[t] += num_waned_vax + num_waned_rec
-        V[t] -= num_waned_vax
-        R[t] -= num_waned_rec
+        if clip_negative:
+            S[i] = max(S[i], 0)
+            I[i] = max(I[i], 0)
+            R[i] = max(R[i], 0)
+            V[i] = max(V[i], 0)
 
         # DIAGNOSIS AND LOG
-        logging.info(f"Day {t}: Length of decay_times_vax={len(decay_times_vax)}, V[{t}]={V[t]}, Difference={V[t] - len(decay_times_vax)}")
-        logging.info(f"Day {t}: S[t]={S[t]}, I[t]={I[t]}, R[t]={R[t]}, V[t]={V[t]}, Waned_vax={num_waned_vax}")
+        if checks:
+            logging.info(f"Day {t}: Waned vaccinated: {num_waned_vax}, Waned recovered: {num_waned_rec}")
+            logging.info(f"Day {t}: After waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
+            logging.info(f"Day {t}: Length of decay_times_vax={len(decay_times_vax)}, V[{t}]={V[i]}, Difference={V[i] - len(decay_times_vax)}")
+            logging.info(f"Day {t}: S[t]={S[i]}, I[t]={I[i]}, R[t]={R[i]}, V[t]={V[i]}, Waned_vax={num_waned_vax}")
+
+            if mode != 'mean_field' and len(decay_times_vax) != V[i]:
+                logging.warning(f"Day {t}: Length discrepancy: Length of decay_times_vax={len(decay_times_vax)}, V[t]={V[i]}")
+
+            total_population = S[i] + I[i] + R[i] + V[i]
+            if total_population != N if chain_binomial else not np.isclose(total_population, N):
+                logging.error(f"Population not conserved on day {t}: Total={total_population}, Expected={N}")
+
+            if S[i] < 0 or I[i] < 0 or R[i] < 0 or V[i] < 0:
+                logging.error(f"Negative compartment values on day {t}: S={S[i]}, I={I[i]}, R={R[i]}, V={V[i]}")
+
+        if trace is not None:
+            trace[t] = (t, round_counter, S[i], I[i], R[i], V[i], new_seeds, new_infections, new_recoveries,
+                        new_vaccinations, num_revaccinated, num_waned_vax, num_waned_rec, len(decay_times_vax),
+                        len(decay_times_rec), S[i] + I[i] + R[i] + V[i] - N)
+
+        if is_vax_period and ((t - start_vax_day) % vax_period == vax_duration - 1) and diagnostics is not None:
+            diagnostics.record(t, round_counter, False, decay_times_vax, decay_times_rec)
+
+        if checks and (t % 30 == 0 or is_vax_period):
+            logging.info(f"Day {t}: S={S[i]:.2f}, I={I[i]:.2f}, R={R[i]:.2f}, V={V[i]:.2f}, New Vaccinations={new_vaccinations if is_vax_period else 0}")
+
+        if stop_condition is not None and stop_condition(t - 1, S[i-1], I[i-1], R[i-1], V[i-1]):
+            if checks:
+                logging.info(f"Day {t}: Stop condition met on day {t - 1}")
+            end = t
+            break
+
+    if checks:
+        logging.info(f"Simulation of the {scenario.capitalize()} model completed.")
+
+    if trace is not None:
+        save_trace(trace[start_day:end], trace_file or os.path.join("output/traces", f"{scenario}_trace.csv"))
+
+    if diagnostics is not None:
+        diagnostics.save(diagnostics_file or default_diagnostics_file(scenario))
+
+    if output is not None:
+        output.write(offset, S[:days - offset], I[:days - offset], R[:days - offset], V[:days - offset])
+        output.close()
+        return output.compartments()
+    if end < days:
+        return S[:end], I[:end], R[:end], V[:end]
+    return S, I, R, V
 
-        if len(decay_times_vax) != V[t]:
-            logging.warning(f"Day {t}: Length discrepancy: Length of decay_times_vax={len(decay_times_vax)}, V[t]={V[t]}")
 
-        total_population = S[t] + I[t] + R[t] + V[t]
-        if not np.isclose(total_population, N):
-            logging.error(f"Population not conserved on day {t}: Total={total_population}, Expected={N}")
+def _seeded_fork_total_infections(params, scenario, revaccination, state, seed_day, kernel_options):
+    """Total infections of a fork of ``state`` seeded with ``seed_rate`` infections on ``seed_day``."""
+    seed_counts = np.zeros(params['days'])
+    seed_counts[seed_day] = params['seed_rate']
+    _, I, _, _ = sirsv_model_with_weibull(params, scenario, revaccination=revaccination, seed_counts=seed_counts,
+                                          initial_state=state, instrumentation='fast', **kernel_options)
+    return compute_total_infections(I)
 
-        if S[t] < 0 or I[t] < 0 or R[t] < 0 or V[t] < 0:
-            logging.error(f"Negative compartment values on day {t}: S={S[t]}, I={I[t]}, R={R[t]}, V={V[t]}")
 
-        if is_vax_period and ((t - start_vax_day) % vax_period == vax_duration - 1) and diagnosis:
-            plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=False)
+def brute_force_seeding(params, scenario, revaccination='random', random_seed=42, waning='array',
+                        mode='stochastic', workers=1):
+    """Total infections when ``seed_rate`` infections are seeded on each day of the simulation.
+
+    Every seeded run is identical to the unseeded run up to its seeding day, so the unseeded
+    run is simulated once, a :class:`SimulationState` is taken at the start of every day and
+    each seeded run is forked from its snapshot for the remaining days only. The result equals
+    running the model separately for every seeding day with an 'event_series' seed schedule.
+
+    Parameters
+    ----------
+    params : dict
+        Model parameters, see :func:`sirsv_model_with_weibull_random_vaccination`
+    scenario : str
+        Name of simulation scenario
+    revaccination : str or callable, optional
+        Re-vaccination selection strategy, see :func:`sirsv_model_with_weibull`, by default 'random'
+    random_seed : int, optional
+        Random seed for reproducibility, by default 42
+    waning : str, optional
+        Waning engine tracking remaining immunity, by default 'array'
+    mode : str, optional
+        'stochastic', 'mean_field' or 'chain_binomial', by default 'stochastic'
+    workers : int, optional
+        Number of worker processes running the forks, by default 1 (serial)
 
-        if t % 30 == 0 or is_vax_period:
-            logging.info(f"Day {t}: S={S[t]:.2f}, I={I[t]:.2f}, R={R[t]:.2f}, V={V[t]:.2f}, New Vaccinations={new_vaccinations if is_vax_period else 0}")
+    Returns
+    -------
+    numpy.ndarray
+        Total infections for each seeding day ``0 .. days - 1``. Seeding on day 0 has no effect,
+        as in the full model.
+    """
+    kernel_options = {'waning': waning, 'mode': mode}
+    total_infections = np.zeros(params['days'])
+    progress = tqdm(total=params['days'] - 1, desc=f"Running {scenario} brute force seeding", unit="day")
+    pending = {}
+
+    def collect(limit):
+        while len(pending) > limit:
+            seed_day = min(pending)
+            total_infections[seed_day] = pending.pop(seed_day).result()
+            progress.update()
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 1 else None
+
+        def fork(state):
+            if executor is None:
+                total_infections[state.day] = _seeded_fork_total_infections(params, scenario, revaccination, state,
+                                                                            state.day, kernel_options)
+                progress.update()
+            else:
+                pending[state.day] = executor.submit(_seeded_fork_total_infections, params, scenario, revaccination,
+                                                     state, state.day, kernel_options)
+                # Bound the number of snapshots held in memory while the unseeded run goes on
+                collect(2 * workers)
 
-    logging.info(f"Simulation of the {scenario.capitalize()} model completed.")
+        _, I, _, _ = sirsv_model_with_weibull(params, scenario, revaccination=revaccination, random_seed=random_seed,
+                                              instrumentation='fast', snapshot_days=range(1, params['days']),
+                                              on_snapshot=fork, **kernel_options)
+        collect(0)
+    progress.close()
 
-    parent_folder = "output/saved_variables/random_vaccination"
-    scenario_folder = os.path.join(parent_folder, scenario)
+    total_infections[0] = compute_total_infections(I)
+    return total_infections
 
-    if not os.path.exists(scenario_folder):
-        os.makedirs(scenario_folder)
 
+def save_simulation_results(S, I, R, V, scenario, model_type, seed_method='none', seed_rate=0, mode='stochastic',
+                            store=None, params=None, random_seed=None, waning=None):
+    """Save simulation results under output/saved_variables/{model_type}_vaccination/{scenario}/.
+
+    Mean-field and chain-binomial results get a ``_mean_field`` or ``_chain_binomial`` suffix
+    so they do not overwrite stochastic runs. With a ``store`` the run is appended to the
+    :class:`~vaxsim.store.TrajectoryStore` instead, indexed by the hash of ``params``, the
+    random seed and the remaining arguments.
+
+    Returns
+    -------
+    str or int
+        Path of the saved ``.npz`` file, or the run number in ``store``
+    """
+    if store is not None:
+        run = store.append(S, I, R, V, **run_metadata(params, scenario, model_type, random_seed, mode=mode,
+                                                      waning=waning, seed_method=seed_method, seed_rate=seed_rate))
+        logging.info(f"Simulation results saved as run {run} of study {store.study}")
+        return run
+
+    scenario_folder = os.path.join("output/saved_variables", f"{model_type}_vaccination", scenario)
+    os.makedirs(scenario_folder, exist_ok=True)
+
+    suffix = '' if mode == 'stochastic' else f'_{mode}'
     if seed_method == 'none':
-        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results.npz")
+        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results{suffix}.npz")
     else:
-        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results_with_{seed_method}_{seed_rate}_seeding.npz")
+        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results_with_{seed_method}_{seed_rate}_seeding{suffix}.npz")
 
-    if save_variables:
-        np.savez(output_filename, S=S, I=I, R=R, V=V)
-        logging.info(f"Simulation results saved to {output_filename}")
+    np.savez(output_filename, S=S, I=I, R=R, V=V)
+    logging.info(f"Simulation results saved to {output_filename}")
+    return output_filename
 
-    return S, I, R, V
 
+def save_simulation_state(state, scenario, model_type):
+    """Save a :class:`SimulationState` under output/saved_variables/{model_type}_vaccination/{scenario}/states/.
+
+    Returns
+    -------
+    str
+        Path of the saved ``.npz`` file
+    """
+    states_folder = os.path.join("output/saved_variables", f"{model_type}_vaccination", scenario, "states")
+    os.makedirs(states_folder, exist_ok=True)
+    output_filename = os.path.join(states_folder, f"{scenario}_state_day_{state.day}.npz")
+    state.save(output_filename)
+    logging.info(f"Simulation state of day {state.day} saved to {output_filename}")
+    return output_filename
+
+
+def _snapshot_handler(on_snapshot, snapshot_days, scenario, model_type):
+    """Default to saving snapshots to file when days are requested without a callback."""
+    if on_snapshot is None and snapshot_days:
+        return lambda state: save_simulation_state(state, scenario, model_type)
+    return on_snapshot
+
+
+def sirsv_model_with_weibull_random_vaccination(params, scenario, random_seed=42, diagnosis=None,
+                                              seed_method='none', event_series=None, save_variables=True,
+                                              waning='array', mode='stochastic', initial_state=None, snapshot_days=(),
+                                              on_snapshot=None, instrumentation='checked', store=None, output=None):
+    """Simulate SIRSV model with random vaccination strategy and Weibull-distributed immunity waning.
 
-def sirsv_model_with_weibull_targeted_vaccination(params, scenario, random_seed=42, diagnosis=None, 
-                                                seed_method='none', event_series=None, save_variables=True):
-    """Simulate SIRSV model with targeted vaccination strategy and Weibull-distributed immunity waning.
-    
     Parameters
     ----------
     params : dict
@@ -243,13 +645,39 @@ def sirsv_model_with_weibull_targeted_vaccination(params, scenario, random_seed=
     random_seed : int, optional
         Random seed for reproducibility, by default 42
     diagnosis : bool, optional
-        Enable diagnostic plots, by default None
+        Record decay-time diagnostics, see :func:`sirsv_model_with_weibull`, by default None
     seed_method : str, optional
         Method for seeding infections ('none', 'random', 'periodic'), by default 'none'
     event_series : array-like, optional
         Time series of seeding events, by default None
     save_variables : bool, optional
         Save simulation results to file, by default True
+    waning : str, optional
+        Waning engine tracking remaining immunity, by default 'array'.
+        'array' keeps one decay time per animal; 'histogram' keeps head counts per day until
+        expiry, which makes daily waning independent of the population size.
+    mode : str, optional
+        'stochastic', 'mean_field' or 'chain_binomial', by default 'stochastic'. 'mean_field' is
+        a deterministic expected-value run that propagates cohort sizes through the discretised
+        Weibull survival function without drawing random numbers. 'chain_binomial' keeps integer
+        head counts and draws infections and recoveries as binomials, see
+        :func:`sirsv_model_with_weibull`.
+    initial_state : SimulationState, optional
+        Resume from a saved state instead of ``S0, I0, R0, V0``, by default None. The
+        remaining days are simulated with the rates in ``params``.
+    snapshot_days : iterable of int, optional
+        Days at whose start a :class:`SimulationState` is emitted, by default none
+    on_snapshot : callable, optional
+        Callback receiving each state, by default None, which saves the states under
+        ``output/saved_variables``
+    instrumentation : str, optional
+        'fast', 'checked' or 'trace', see :func:`sirsv_model_with_weibull`, by default 'checked'
+    store : TrajectoryStore, optional
+        Append the results to this :class:`~vaxsim.store.TrajectoryStore` instead of saving
+        an ``.npz`` file when ``save_variables`` is set, by default None
+    output : TrajectoryStream, optional
+        Stream the compartments to a file while simulating, see
+        :func:`sirsv_model_with_weibull`, by default None
 
     Returns
     -------
@@ -259,182 +687,117 @@ def sirsv_model_with_weibull_targeted_vaccination(params, scenario, random_seed=
         I : numpy.ndarray, Infected population
         R : numpy.ndarray, Recovered population
         V : numpy.ndarray, Vaccinated population
-    
+
     Notes
     -----
-    The targeted vaccination strategy prioritizes animals with lowest immunity levels
-    (highest waning time) for re-vaccination.
+    The random vaccination strategy selects animals randomly for re-vaccination,
+    regardless of their immunity status.
     """
-    np.random.seed(random_seed)
-    random.seed(random_seed)
-
-    # Extract parameters
-    beta = params['beta']
-    gamma = params['gamma']
-    vax_rate = params['vax_rate']
-    weibull_shape_vax = params['weibull_shape_vax']
-    weibull_scale_vax = params['weibull_scale_vax']
-    weibull_shape_rec = params['weibull_shape_rec']
-    weibull_scale_rec = params['weibull_scale_rec']
-    days = params['days']
-    seed_rate = params['seed_rate']
-    vax_period = params['vax_period']
-    vax_duration = params['vax_duration']
-    start_vax_day = params['start_vax_day']
-
-    # Initial conditions
-    S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
-    N = S0 + I0 + R0 + V0
-
-    S, I, R, V = [np.zeros(days) for _ in range(4)]
-    S[0], I[0], R[0], V[0] = S0, I0, R0, V0
-
-    decay_times_vax = []
-    decay_times_rec = []
-
-    # Seed initial vaccinated and recovered individuals' waning times
-    if V0 > 0:
-        decay_times_vax.extend((weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V0))).astype(int).tolist())
-    if R0 > 0:
-        decay_times_rec.extend((weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R0))).astype(int).tolist())
-
-    round_counter = 0
-
-    logging.info(f"Starting simulation for scenario: {scenario}")
-
-    if seed_method == 'none':
-        seed_schedule = [0] * days
-    else :
-        seed_schedule = generate_seed_schedule(method=seed_method, min_day=1, max_day=days, days=days, num_seeds=3, event_series=event_series)
-
-    for t in tqdm(range(1, days), desc=f"Running {scenario} simulation", unit="day"):
-
-        new_seeds = min(seed_infection(t, seed_schedule, seed_rate), S[t-1])
-
-        # VACCINATION ROUND
-        if t == start_vax_day or (t > start_vax_day and (t - start_vax_day) % vax_period == 0):
-            round_counter += 1
-            to_vaccinate = min(vax_rate * S[t-1], S[t-1])
-            logging.info(f"Round {round_counter} start day: {t}")
-
-            # Calculate the number of vaccinations to reset, considering the vaccination period
-            num_vax_to_reset = int(min(vax_rate * vax_period * V[t-1], V[t-1]))
-            if num_vax_to_reset > 0 and len(decay_times_vax) > 0:
-                num_vax_to_reset = min(num_vax_to_reset, len(decay_times_vax))
-
-                # Method 1: Randomly select decay times to reset
-                # indices_to_reset = random.sample(range(len(decay_times_vax)), num_vax_to_reset)
-
-                # Method 2: Sort decay times and select indices with the lowest decay times
-                sorted_indices = np.argsort(decay_times_vax)
-                indices_to_reset = sorted_indices[:num_vax_to_reset]
-
-                for i in indices_to_reset:
-                    decay_times_vax[i] = weibull_scale_vax * np.random.weibull(weibull_shape_vax)
-                logging.info(f"Day {t}: Re-vaccination reset: {num_vax_to_reset} decay times reset")
-
-            if diagnosis:
-                plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=True)
-
-        # Check if it's within a vaccination period
-        is_vax_period = (t >= start_vax_day) and ((t - start_vax_day) % vax_period < vax_duration)
-        if is_vax_period:
-            new_vaccinations = int(min(to_vaccinate, S[t-1]))
-            logging.info(f"Day {t}: Daily vaccinations: {new_vaccinations}")
-
-            # Update compartments for new vaccinations
-            if new_vaccinations > 0:
-                new_susceptible_decay_times = (weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)).astype(int).tolist()
-                initial_len = len(decay_times_vax)
-                decay_times_vax.extend(new_susceptible_decay_times)
-                updated_len = len(decay_times_vax)
-                logging.info(f"Day {t}: New vaccinations: {new_vaccinations}, Length of decay_times_vax: {initial_len}, Length of decay_times_vax: {updated_len}")
-            else:
-                S[t] = S[t-1]
-                R[t] = R[t-1]
-                V[t] = V[t-1]
-
-        else:
-            new_vaccinations = 0
-
-        # Calculate transitions
-        new_infections = beta * S[t-1] * I[t-1] / N + new_seeds
-        new_recoveries = gamma * I[t-1]
-
-        # Update compartments
-        S[t] = S[t-1] - new_infections - new_vaccinations
-        I[t] = I[t-1] + new_infections - new_recoveries
-        R[t] = R[t-1] + new_recoveries
-        V[t] = V[t-1] + new_vaccinations
-
-        if new_recoveries > 0:
-            new_recovered_decay_times = (weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))).astype(int).tolist()
-            decay_times_rec.extend(new_recovered_decay_times)
-
-        # IMMUNITY WANING
-        logging.info(f"Day {t}: Before waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
-
-        decay_times_vax_before = len(decay_times_vax)
-        decay_times_vax = [x - 1 for x in decay_times_vax if x > 0]
-        num_waned_vax = decay_times_vax_before - len(decay_times_vax)
-
-        decay_times_rec_before = len(decay_times_rec)
-        decay_times_rec = [x - 1 for x in decay_times_rec if x > 0]
-        num_waned_rec = decay_times_rec_before - len(decay_times_rec)
-
-        logging.info(f"Day {t}: Waned vaccinated: {num_waned_vax}, Waned recovered: {num_waned_rec}")
-        logging.info(f"Day {t}: After waning: Length of decay_times_vax={len(decay_times_vax)}, Length of decay_times_rec={len(decay_times_rec)}")
-
-        # Move waned individuals back to susceptible compartment
-        S[t] += num_waned_vax + num_waned_rec
-        V[t] -= num_waned_vax
-        R[t] -= num_waned_rec
-
-        # DIAGNOSIS AND LOG
-        logging.info(f"Day {t}: Length of decay_times_vax={len(decay_times_vax)}, V[{t}]={V[t]}, Difference={V[t] - len(decay_times_vax)}")
-        logging.info(f"Day {t}: S[t]={S[t]}, I[t]={I[t]}, R[t]={R[t]}, V[t]={V[t]}, Waned_vax={num_waned_vax}")
-
-        if len(decay_times_vax) != V[t]:
-            logging.warning(f"Day {t}: Length discrepancy: Length of decay_times_vax={len(decay_times_vax)}, V[t]={V[t]}")
-
-        total_population = S[t] + I[t] + R[t] + V[t]
-        if not np.isclose(total_population, N):
-            logging.error(f"Population not conserved on day {t}: Total={total_population}, Expected={N}")
-
-        if S[t] < 0 or I[t] < 0 or R[t] < 0 or V[t] < 0:
-            logging.error(f"Negative compartment values on day {t}: S={S[t]}, I={I[t]}, R={R[t]}, V={V[t]}")
-
-        if is_vax_period and ((t - start_vax_day) % vax_period == vax_duration - 1) and diagnosis:
-            plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, start=False)
+    S, I, R, V = sirsv_model_with_weibull(params, scenario, revaccination='random', random_seed=random_seed,
+                                          diagnosis=diagnosis, seed_method=seed_method,
+                                          event_series=event_series, waning=waning, mode=mode,
+                                          initial_state=initial_state, snapshot_days=snapshot_days,
+                                          on_snapshot=_snapshot_handler(on_snapshot, snapshot_days, scenario, 'random'),
+                                          instrumentation=instrumentation, output=output)
+    if save_variables:
+        save_simulation_results(S, I, R, V, scenario, 'random', seed_method, params['seed_rate'], mode,
+                                store=store, params=params, random_seed=random_seed, waning=waning)
 
-        if t % 30 == 0 or is_vax_period:
-            logging.info(f"Day {t}: S={S[t]:.2f}, I={I[t]:.2f}, R={R[t]:.2f}, V={V[t]:.2f}, New Vaccinations={new_vaccinations if is_vax_period else 0}")
+    return S, I, R, V
 
-    logging.info(f"Simulation of the {scenario.capitalize()} model completed.")
 
-    parent_folder = "output/saved_variables/targeted_vaccination"
-    scenario_folder = os.path.join(parent_folder, scenario)
+def sirsv_model_with_weibull_targeted_vaccination(params, scenario, random_seed=42, diagnosis=None,
+                                                seed_method='none', event_series=None, save_variables=True,
+                                                waning='array', mode='stochastic', initial_state=None, snapshot_days=(),
+                                                on_snapshot=None, instrumentation='checked', store=None, output=None):
+    """Simulate SIRSV model with targeted vaccination strategy and Weibull-distributed immunity waning.
 
-    if not os.path.exists(scenario_folder):
-        os.makedirs(scenario_folder)
+    Parameters
+    ----------
+    params : dict
+        Model parameters including:
+        - beta : float, transmission rate
+        - gamma : float, recovery rate
+        - vax_rate : float, vaccination rate
+        - weibull_shape_vax : float, shape parameter for vaccine immunity
+        - weibull_scale_vax : float, scale parameter for vaccine immunity
+        - weibull_shape_rec : float, shape parameter for natural immunity
+        - weibull_scale_rec : float, scale parameter for natural immunity
+        - days : int, simulation duration
+        - S0, I0, R0, V0 : int, initial population states
+    scenario : str
+        Name of simulation scenario
+    random_seed : int, optional
+        Random seed for reproducibility, by default 42
+    diagnosis : bool, optional
+        Record decay-time diagnostics, see :func:`sirsv_model_with_weibull`, by default None
+    seed_method : str, optional
+        Method for seeding infections ('none', 'random', 'periodic'), by default 'none'
+    event_series : array-like, optional
+        Time series of seeding events, by default None
+    save_variables : bool, optional
+        Save simulation results to file, by default True
+    waning : str, optional
+        Waning engine tracking remaining immunity, by default 'array'.
+        'array' keeps one decay time per animal; 'histogram' keeps head counts per day until
+        expiry, which makes daily waning independent of the population size.
+    mode : str, optional
+        'stochastic', 'mean_field' or 'chain_binomial', by default 'stochastic'. 'mean_field' is
+        a deterministic expected-value run that propagates cohort sizes through the discretised
+        Weibull survival function without drawing random numbers. 'chain_binomial' keeps integer
+        head counts and draws infections and recoveries as binomials, see
+        :func:`sirsv_model_with_weibull`.
+    initial_state : SimulationState, optional
+        Resume from a saved state instead of ``S0, I0, R0, V0``, by default None. The
+        remaining days are simulated with the rates in ``params``.
+    snapshot_days : iterable of int, optional
+        Days at whose start a :class:`SimulationState` is emitted, by default none
+    on_snapshot : callable, optional
+        Callback receiving each state, by default None, which saves the states under
+        ``output/saved_variables``
+    instrumentation : str, optional
+        'fast', 'checked' or 'trace', see :func:`sirsv_model_with_weibull`, by default 'checked'
+    store : TrajectoryStore, optional
+        Append the results to this :class:`~vaxsim.store.TrajectoryStore` instead of saving
+        an ``.npz`` file when ``save_variables`` is set, by default None
+    output : TrajectoryStream, optional
+        Stream the compartments to a file while simulating, see
+        :func:`sirsv_model_with_weibull`, by default None
 
-    if seed_method == 'none':
-        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results.npz")
-    else:
-        output_filename = os.path.join(scenario_folder, f"{scenario}_simulation_results_with_{seed_method}_{seed_rate}_seeding.npz")
+    Returns
+    -------
+    tuple
+        (S, I, R, V) arrays containing compartment values over time
+        S : numpy.ndarray, Susceptible population
+        I : numpy.ndarray, Infected population
+        R : numpy.ndarray, Recovered population
+        V : numpy.ndarray, Vaccinated population
 
+    Notes
+    -----
+    The targeted vaccination strategy prioritizes animals with lowest immunity levels
+    (highest waning time) for re-vaccination.
+    """
+    S, I, R, V = sirsv_model_with_weibull(params, scenario, revaccination='targeted', random_seed=random_seed,
+                                          diagnosis=diagnosis, seed_method=seed_method,
+                                          event_series=event_series, waning=waning, mode=mode,
+                                          initial_state=initial_state, snapshot_days=snapshot_days,
+                                          on_snapshot=_snapshot_handler(on_snapshot, snapshot_days, scenario, 'targeted'),
+                                          instrumentation=instrumentation, output=output)
     if save_variables:
-        np.savez(output_filename, S=S, I=I, R=R, V=V)
-        logging.info(f"Simulation results saved to {output_filename}")
+        save_simulation_results(S, I, R, V, scenario, 'targeted', seed_method, params['seed_rate'], mode,
+                                store=store, params=params, random_seed=random_seed, waning=waning)
 
     return S, I, R, V
 
 
-def sirsv_model_with_weibull_calibration(params, random_seed=42):
+def sirsv_model_with_weibull_calibration(params, random_seed=42, waning='array', mode='stochastic',
+                                         initial_state=None, snapshot_days=(), on_snapshot=None,
+                                         instrumentation='fast', stop_condition=None):
     """Simulates SIRSV model with Weibull-distributed immunity waning for parameter calibration.
-    
+
     A simplified version of the model used for calibrating parameters against data.
-    
+
     Parameters
     ----------
     params : dict
@@ -450,6 +813,23 @@ def sirsv_model_with_weibull_calibration(params, random_seed=42):
         - S0, I0, R0, V0 : int, initial population states
     random_seed : int, optional
         Random seed for reproducibility, by default 42
+    waning : str, optional
+        Waning engine tracking remaining immunity, by default 'array'
+    mode : str, optional
+        'stochastic', 'mean_field' (deterministic expected values) or 'chain_binomial'
+        (integer head counts), by default 'stochastic'
+    initial_state : SimulationState, optional
+        Resume from a saved state instead of ``S0, I0, R0, V0``, by default None
+    snapshot_days : iterable of int, optional
+        Days at whose start a :class:`SimulationState` is emitted, by default none
+    on_snapshot : callable, optional
+        Callback receiving each state, by default None, which saves the states under
+        ``output/saved_variables``
+    instrumentation : str, optional
+        'fast', 'checked' or 'trace', see :func:`sirsv_model_with_weibull`, by default 'fast'
+    stop_condition : callable, optional
+        Stop the run early, e.g. with a :class:`vaxsim.utils.RunningLoss`, see
+        :func:`sirsv_model_with_weibull`, by default None
 
     Returns
     -------
@@ -459,18 +839,98 @@ def sirsv_model_with_weibull_calibration(params, random_seed=42):
         I : numpy.ndarray, Infected population
         R : numpy.ndarray, Recovered population
         V : numpy.ndarray, Vaccinated population
+
+    Notes
+    -----
+    Unlike the scenario models, there is no re-vaccination of already vaccinated animals,
+    daily vaccinations follow the current number of susceptibles, infections are seeded
+    every day at ``seed_rate``, the daily updates follow the 'calibration' ordering and
+    compartments are clipped at zero. Nothing is logged by default.
     """
-    np.random.seed(random_seed)
+    return sirsv_model_with_weibull(params, 'calibration', revaccination=None, random_seed=random_seed,
+                                    seed_method='continuous', waning=waning, mode=mode, vaccination_target='daily',
+                                    ordering='calibration', clip_negative=True, instrumentation=instrumentation,
+                                    initial_state=initial_state, snapshot_days=snapshot_days,
+                                    on_snapshot=_snapshot_handler(on_snapshot, snapshot_days, 'calibration', 'calibration'),
+                                    stop_condition=stop_condition)
+
+
+def sirsv_model_ensemble(params, scenario, num_replicates=100, revaccination='random', random_seed=42,
+                         seed_method='none', event_series=None, quantiles=(0.025, 0.5, 0.975),
+                         save_variables=True, seed_counts=None, initial_state=None, mode='stochastic', store=None, output=None):
+    """Simulate an ensemble of stochastic SIRSV replicates in one vectorised pass.
+
+    All replicates are stepped together: compartments are (replicates, days) arrays and the
+    immunity waning state of every replicate is held in a :class:`~vaxsim.waning.BatchedDecayTimeHistogram`,
+    so the daily work is a handful of array operations regardless of the number of replicates.
+    The daily updates follow :func:`sirsv_model_with_weibull` with the default 'scenario' ordering.
+
+    Parameters
+    ----------
+    params : dict
+        Model parameters, see :func:`sirsv_model_with_weibull_random_vaccination`
+    scenario : str
+        Name of simulation scenario
+    num_replicates : int, optional
+        Number of replicates, by default 100
+    revaccination : str or callable, optional
+        Re-vaccination selection strategy, see :func:`sirsv_model_with_weibull`, by default 'random'
+    random_seed : int, optional
+        Random seed for reproducibility, by default 42
+    seed_method : str, optional
+        Method for seeding infections, see :func:`sirsv_model_with_weibull`, by default 'none'.
+        The seeding schedule is shared by all replicates, except that 'poisson' importations
+        are drawn independently for every replicate.
+    event_series : array-like, optional
+        Time series of seeding events, by default None
+    quantiles : tuple of float, optional
+        Quantile levels of the returned bands, by default (0.025, 0.5, 0.975)
+    save_variables : bool, optional
+        Save the replicate trajectories to file, by default True
+    seed_counts : array-like, optional
+        Infections seeded on each day, shape (days,) or (replicates, days), overriding
+        ``seed_method``, by default None
+    initial_state : SimulationState, optional
+        Start every replicate from this state, e.g. a calibrated equilibrium, by default None.
+        The replicates diverge from the state's day on; its random state is not used.
+    mode : str, optional
+        'stochastic' or 'chain_binomial', by default 'stochastic'. 'chain_binomial' draws
+        infections and recoveries as binomials, see :func:`sirsv_model_with_weibull`, and
+        keeps the trajectories as int32 head counts, half the memory of float trajectories.
+    store : TrajectoryStore, optional
+        Append every replicate as a run of this :class:`~vaxsim.store.TrajectoryStore`, with
+        its replicate number in the metadata, instead of saving an ``.npz`` file when
+        ``save_variables`` is set, by default None
+    output : TrajectoryStream, optional
+        Stream the trajectories to a file in chunks while simulating, by default None. Only
+        one chunk of days of every replicate is kept in memory and the summaries are computed
+        chunk by chunk, for the days the stream keeps. The stream replaces ``save_variables``
+        and ``store``.
+
+    Returns
+    -------
+    dict
+        - S, I, R, V : numpy.ndarray, (replicates, days) trajectories, read-only memory-mapped
+          views of the stream's file with an ``output`` stream
+        - mean : dict of (days,) mean trajectories per compartment
+        - quantiles : dict of (len(quantiles), days) quantile bands per compartment
+        - quantile_levels : tuple of the quantile levels
+    """
+    if isinstance(revaccination, str):
+        if revaccination not in REVACCINATION_STRATEGIES:
+            raise ValueError(f"Invalid revaccination strategy '{revaccination}'. Choose one of {list(REVACCINATION_STRATEGIES)}.")
+        revaccination = REVACCINATION_STRATEGIES[revaccination]
+    if mode not in ('stochastic', 'chain_binomial'):
+        raise ValueError(f"Invalid ensemble mode '{mode}'. Choose 'stochastic' or 'chain_binomial'.")
+    chain_binomial = mode == 'chain_binomial'
+
+    rng = np.random.default_rng(random_seed)
     random.seed(random_seed)
 
     # Extract parameters
     beta = params['beta']
     gamma = params['gamma']
     vax_rate = params['vax_rate']
-    weibull_shape_vax = params['weibull_shape_vax']
-    weibull_scale_vax = params['weibull_scale_vax']
-    weibull_shape_rec = params['weibull_shape_rec']
-    weibull_scale_rec = params['weibull_scale_rec']
     days = params['days']
     seed_rate = params['seed_rate']
     vax_period = params['vax_period']
@@ -479,67 +939,407 @@ def sirsv_model_with_weibull_calibration(params, random_seed=42):
 
     # Initial conditions
     S0, I0, R0, V0 = params['S0'], params['I0'], params['R0'], params['V0']
+    if chain_binomial:
+        S0, I0, R0, V0 = (int(round(x)) for x in (S0, I0, R0, V0))
     N = S0 + I0 + R0 + V0
 
-    S, I, R, V = [np.zeros(days) for _ in range(4)]
-    S[0], I[0], R[0], V[0] = S0, I0, R0, V0
-
-    decay_times_vax = []
-    decay_times_rec = []
-
-    # Seed initial vaccinated and recovered individuals' waning times
-    if V0 > 0:
-        decay_times_vax.extend((weibull_scale_vax * np.random.weibull(weibull_shape_vax, int(V0))).astype(int).tolist())
-    if R0 > 0:
-        decay_times_rec.extend((weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(R0))).astype(int).tolist())
+    # As in sirsv_model_with_weibull, day t is held at index i = t - offset of a window that
+    # covers all days, or chunk_days + 1 days with an output stream
+    window = days if output is None else min(days, output.chunk_days + 1)
+    offset = 0
+    S, I, R, V = [np.zeros((num_replicates, window), dtype=np.int32 if chain_binomial else float) for _ in range(4)]
+    S[:, 0], I[:, 0], R[:, 0], V[:, 0] = S0, I0, R0, V0
+    if output is not None:
+        output.open(days, (num_replicates,))
+        summaries = {compartment: ([], []) for compartment in ('S', 'I', 'R', 'V')}
+
+    def flush(start_day, compartments):
+        """Write days of (replicates, days) compartments and summarise the days kept."""
+        output.write(start_day, *(values.T for values in compartments))
+        keep = output.kept(start_day, compartments[0].shape[1])
+        for compartment, values in zip(('S', 'I', 'R', 'V'), compartments):
+            mean, bands = summarise_ensemble(values[:, keep], quantiles)
+            summaries[compartment][0].append(mean)
+            summaries[compartment][1].append(bands)
+
+    decay_times_vax = BatchedDecayTimeHistogram(params['weibull_shape_vax'], params['weibull_scale_vax'], num_replicates, rng)
+    decay_times_rec = BatchedDecayTimeHistogram(params['weibull_shape_rec'], params['weibull_scale_rec'], num_replicates, rng)
+    if initial_state is None:
+        decay_times_vax.add(np.full(num_replicates, int(V0)))
+        decay_times_rec.add(np.full(num_replicates, int(R0)))
+        to_vaccinate = 0
+        start_day = 1
+    else:
+        start_day = initial_state.day
+        if not 1 <= start_day <= days:
+            raise ValueError(f"Cannot resume from day {start_day} of a {days}-day simulation.")
+        history = [np.rint(values[:start_day]) if chain_binomial else values[:start_day]
+                   for values in (initial_state.S, initial_state.I, initial_state.R, initial_state.V)]
+        if output is None:
+            for compartment, values in zip((S, I, R, V), history):
+                compartment[:, :start_day] = values
+        else:
+            flush(0, [np.broadcast_to(values[:-1], (num_replicates, start_day - 1)) for values in history])
+            offset = start_day - 1
+            for compartment, values in zip((S, I, R, V), history):
+                compartment[:, 0] = values[-1]
+        N = initial_state.N
+        decay_times_vax.add_decay_times(initial_state.decay_times_vax.decay_times())
+        decay_times_rec.add_decay_times(initial_state.decay_times_rec.decay_times())
+        to_vaccinate = np.full(num_replicates, float(initial_state.to_vaccinate))
+
+    if seed_counts is None:
+        seed_counts = build_seed_counts(seed_method, days, seed_rate, min_day=1, max_day=days, num_seeds=3,
+                                        event_series=event_series, rng=rng, size=(num_replicates,))
+    seed_counts = np.asarray(seed_counts, dtype=float)
+    if seed_counts.shape[-1] < days:
+        raise ValueError(f"seed_counts covers {seed_counts.shape[-1]} days, expected at least {days}.")
+
+    logging.info(f"Starting ensemble of {num_replicates} replicates for scenario: {scenario}")
+
+    for t in tqdm(range(start_day, days), desc=f"Running {scenario} ensemble", unit="day"):
+        i = t - offset
+        if i == window:
+            flush(offset, [compartment[:, :-1] for compartment in (S, I, R, V)])
+            for compartment in (S, I, R, V):
+                compartment[:, 0] = compartment[:, -1]
+            offset += window - 1
+            i = 1
+
+        new_seeds = np.minimum(seed_counts[..., t], S[:, i-1])
 
-    for t in range(1, days):
-        # Calculate seeding infections
-        new_seeds = min(seed_rate, S[t-1])
+        # VACCINATION ROUND
+        if t == start_vax_day or (t > start_vax_day and (t - start_vax_day) % vax_period == 0):
+            to_vaccinate = np.minimum(vax_rate * S[:, i-1], S[:, i-1])
+            num_vax_to_reset = np.minimum(vax_rate * vax_period * V[:, i-1], V[:, i-1]).astype(np.int64)
+            num_vax_to_reset = np.clip(num_vax_to_reset, 0, decay_times_vax.totals())
+            if revaccination is not None and num_vax_to_reset.any():
+                revaccination(decay_times_vax, num_vax_to_reset)
 
-        # Vaccination logic
         is_vax_period = (t >= start_vax_day) and ((t - start_vax_day) % vax_period < vax_duration)
         if is_vax_period:
-            new_vaccinations = int(min(vax_rate * S[t-1], S[t-1]))
-            S[t-1] -= new_vaccinations
-            V[t-1] += new_vaccinations
-            if new_vaccinations > 0:
-                decay_times_vax.extend(
-                    (weibull_scale_vax * np.random.weibull(weibull_shape_vax, new_vaccinations)).astype(int).tolist()
-                )
+            new_vaccinations = np.minimum(to_vaccinate, S[:, i-1]).astype(np.int64)
+            decay_times_vax.add(np.maximum(new_vaccinations, 0))
         else:
             new_vaccinations = 0
 
         # Calculate transitions
-        new_infections = beta * S[t-1] * I[t-1] / N + new_seeds
-        new_recoveries = gamma * I[t-1]
+        if chain_binomial:
+            new_seeds = np.minimum(new_seeds.astype(np.int64), S[:, i-1] - new_vaccinations)
+            exposed = S[:, i-1] - new_vaccinations - new_seeds
+            new_infections = rng.binomial(exposed, -np.expm1(-beta * I[:, i-1] / N)) + new_seeds
+            new_recoveries = rng.binomial(I[:, i-1], -np.expm1(-gamma))
+        else:
+            new_infections = beta * S[:, i-1] * I[:, i-1] / N + new_seeds
+            new_recoveries = gamma * I[:, i-1]
 
         # Update compartments
-        S[t] = S[t-1] - new_infections - new_vaccinations
-        I[t] = I[t-1] + new_infections - new_recoveries
-        R[t] = R[t-1] + new_recoveries
-        V[t] = V[t-1] + new_vaccinations
-
-        # Update decay times for immunity waning
-        decay_times_vax = [x - 1 for x in decay_times_vax if x > 0]
-        decay_times_rec = [x - 1 for x in decay_times_rec if x > 0]
-        num_waned_vax = len([x for x in decay_times_vax if x == 0])
-        num_waned_rec = len([x for x in decay_times_rec if x == 0])
-
-        S[t] += num_waned_vax + num_waned_rec
-        V[t] -= num_waned_vax
-        R[t] -= num_waned_rec
-
-        if new_recoveries > 0:
-            decay_times_rec.extend(
-                (weibull_scale_rec * np.random.weibull(weibull_shape_rec, int(new_recoveries))).astype(int).tolist()
-            )
+        S[:, i] = S[:, i-1] - new_infections - new_vaccinations
+        I[:, i] = I[:, i-1] + new_infections - new_recoveries
+        R[:, i] = R[:, i-1] + new_recoveries
+        V[:, i] = V[:, i-1] + new_vaccinations
 
-        # Ensure no negative values
-        S[t] = max(S[t], 0)
-        I[t] = max(I[t], 0)
-        R[t] = max(R[t], 0)
-        V[t] = max(V[t], 0)
+        decay_times_rec.add(np.maximum(new_recoveries, 0).astype(np.int64))
 
-    return S, I, R, V
+        # IMMUNITY WANING
+        num_waned_vax = decay_times_vax.wane()
+        num_waned_rec = decay_times_rec.wane()
+        S[:, i] += num_waned_vax + num_waned_rec
+        V[:, i] -= num_waned_vax
+        R[:, i] -= num_waned_rec
+
+    logging.info(f"Ensemble of the {scenario.capitalize()} model completed.")
+
+    if output is not None:
+        flush(offset, [compartment[:, :days - offset] for compartment in (S, I, R, V)])
+        output.close()
+        S, I, R, V = output.compartments()
+
+    results = {'S': S, 'I': I, 'R': R, 'V': V, 'mean': {}, 'quantiles': {}, 'quantile_levels': tuple(quantiles)}
+    for compartment in ('S', 'I', 'R', 'V'):
+        if output is None:
+            results['mean'][compartment], results['quantiles'][compartment] = summarise_ensemble(results[compartment], quantiles)
+        else:
+            means, bands = summaries[compartment]
+            results['mean'][compartment] = np.concatenate(means)
+            results['quantiles'][compartment] = np.concatenate(bands, axis=1)
+
+    if output is not None:
+        logging.info(f"Ensemble results streamed to {output.path}")
+    elif save_variables and store is not None:
+        metadata = run_metadata(params, scenario, 'ensemble', random_seed, mode=mode, seed_method=seed_method,
+                                revaccination=getattr(revaccination, '__name__', None), num_replicates=num_replicates)
+        for replicate in range(num_replicates):
+            store.append(S[replicate], I[replicate], R[replicate], V[replicate], replicate=replicate, **metadata)
+        logging.info(f"Ensemble results saved as {num_replicates} runs of study {store.study}")
+    elif save_variables:
+        scenario_folder = os.path.join("output/saved_variables", "ensemble", scenario)
+        os.makedirs(scenario_folder, exist_ok=True)
+        output_filename = os.path.join(scenario_folder, f"{scenario}_ensemble_{num_replicates}_replicates.npz")
+        np.savez(output_filename, S=S, I=I, R=R, V=V)
+        logging.info(f"Ensemble results saved to {output_filename}")
+
+    return results
+
+
+def _patch_params(params, mixing=None):
+    """Broadcast the per-patch entries of ``params`` (``PATCH_PARAMS``) to arrays over the patches.
+
+    Returns the number of patches, the broadcast entries and ``mixing`` as a float array,
+    or unchanged if it is a scipy.sparse matrix.
+    """
+    lengths = {len(np.atleast_1d(params[key])) for key in PATCH_PARAMS} - {1}
+    if mixing is not None:
+        import scipy.sparse
+
+        if not scipy.sparse.issparse(mixing):
+            mixing = np.asarray(mixing, dtype=float)
+        lengths.add(mixing.shape[0])
+    if len(lengths) > 1:
+        raise ValueError(f"Per-patch parameters and the mixing matrix disagree on the number of patches: {sorted(lengths)}.")
+    num_patches = lengths.pop() if lengths else 1
+    if mixing is not None and mixing.shape != (num_patches, num_patches):
+        raise ValueError(f"Mixing matrix has shape {mixing.shape}, expected ({num_patches}, {num_patches}).")
+    return num_patches, {key: np.broadcast_to(np.asarray(params[key]), (num_patches,)) for key in PATCH_PARAMS}, mixing
+
+
+@dataclass
+class MovementEdges:
+    """Links of a sparse movement matrix, grouped for drawing the daily movers.
+
+    Built by :meth:`from_matrix` from a (patches, patches) matrix whose entry ``[i, j]`` is the
+    daily probability that an animal in patch ``i`` moves to patch ``j``, e.g. from
+    :func:`vaxsim.utils.load_movement_matrix`.
+    """
+    sources: np.ndarray
+    targets: np.ndarray
+    rates: np.ndarray
+    conditional: np.ndarray
+    by_rank: list
+    leaving: np.ndarray
+    inflow: object
+
+    @classmethod
+    def from_matrix(cls, movement):
+        import scipy.sparse
+
+        movement = scipy.sparse.csr_matrix(movement, dtype=float)
+        movement.sum_duplicates()
+        movement.eliminate_zeros()
+        if movement.shape[0] != movement.shape[1]:
+            raise ValueError(f"Movement matrix must be square, got shape {movement.shape}.")
+        if movement.diagonal().any():
+            raise ValueError("Movement matrix must not move animals within a patch (non-zero diagonal).")
+        rates = movement.data
+        leaving = np.asarray(movement.sum(axis=1)).ravel()
+        if (rates < 0).any() or (leaving > 1 + 1e-12).any():
+            raise ValueError("Movement probabilities must be non-negative and sum to at most one per patch.")
+
+        indptr = movement.indptr
+        sources = np.repeat(np.arange(movement.shape[0]), np.diff(indptr))
+        rank = np.arange(len(rates)) - indptr[sources]
+        # Probability of taking a link given that the animal took none of the patch's earlier links
+        cumulative = np.concatenate([[0.0], np.cumsum(rates)])
+        earlier = cumulative[:-1] - cumulative[indptr[sources]]
+        conditional = np.clip(np.divide(rates, 1 - earlier, out=np.ones_like(rates), where=earlier < 1), 0, 1)
+        by_rank = np.split(np.argsort(rank, kind='stable'), np.cumsum(np.bincount(rank))[:-1]) if len(rank) else []
+        return cls(sources, movement.indices.astype(np.int64), rates, conditional, by_rank, leaving,
+                   movement.T.tocsr())
+
+    def draw_movers(self, rng, counts):
+        """Number of animals taking every link: a multinomial split of the integer ``counts`` of each patch."""
+        movers = np.zeros(len(self.sources), dtype=np.int64)
+        remaining = np.array(counts, dtype=np.int64)
+        for links in self.by_rank:
+            movers[links] = rng.binomial(remaining[self.sources[links]], self.conditional[links])
+            remaining[self.sources[links]] -= movers[links]
+        return movers
+
+    def net_flow(self, movers):
+        """Net number of animals gained by every patch when ``movers`` animals take each link."""
+        num_patches = len(self.leaving)
+        return (np.bincount(self.targets, movers, minlength=num_patches)
+                - np.bincount(self.sources, movers, minlength=num_patches)).astype(np.int64)
+
+
+def sirsv_model_metapopulation(params, scenario, mixing=None, revaccination='random', random_seed=42,
+                               seed_method='none', event_series=None, mode='stochastic', save_variables=True,
+                               seed_counts=None, movement=None):
+    """Simulate the SIRSV model on a metapopulation of patches (e.g. districts or herds) in one vectorised pass.
+
+    Compartments are (patches, days) arrays and the immunity waning state of every patch is
+    held in a :class:`~vaxsim.waning.BatchedDecayTimeHistogram`, so the daily work is a handful
+    of array operations over the patches. The daily updates follow :func:`sirsv_model_ensemble`,
+    with the force of infection on patch ``p``
+
+        ``beta[p] * sum_q mixing[p, q] * I[q] / N[q]``
+
+    Each patch runs its own vaccination campaign: vaccination rounds start on the patch's
+    ``start_vax_day`` and repeat every ``vax_period`` days.
+
+    With a ``movement`` matrix, animals move between patches at the end of every day. Vaccinated
+    and recovered animals move as integer head counts drawn per link and keep their remaining
+    immunity. Susceptible and infectious animals move as expected flows (one sparse
+    matrix-vector product each) or, in 'chain_binomial' mode, as integer head counts too. The
+    force of infection then uses the patch sizes of the previous day.
+
+    Parameters
+    ----------
+    params : dict
+        Model parameters, see :func:`sirsv_model_with_weibull_random_vaccination`. The entries
+        in ``PATCH_PARAMS`` (initial compartments, ``beta``, ``gamma`` and the campaign
+        parameters ``vax_rate``, ``vax_period``, ``vax_duration`` and ``start_vax_day``) may be
+        sequences with one value per patch; scalars apply to every patch. The Weibull
+        parameters, ``days`` and ``seed_rate`` are shared.
+    scenario : str
+        Name of simulation scenario
+    mixing : array-like or scipy.sparse matrix, optional
+        (patches, patches) mixing matrix, by default None (isolated patches). Row ``p`` holds
+        the share of the contacts of the animals in patch ``p`` made with each patch and
+        usually sums to one. Sparse matrices keep the daily product linear in the number of
+        links between patches.
+    revaccination : str or callable, optional
+        Re-vaccination selection strategy, see :func:`sirsv_model_with_weibull`, by default 'random'
+    random_seed : int, optional
+        Random seed for reproducibility, by default 42
+    seed_method : str, optional
+        Method for seeding infections, see :func:`sirsv_model_ensemble`, by default 'none'.
+        The seeding schedule is shared by all patches, except that 'poisson' importations
+        are drawn independently for every patch.
+    event_series : array-like, optional
+        Time series of seeding events, by default None
+    mode : str, optional
+        'stochastic' or 'chain_binomial', see :func:`sirsv_model_ensemble`, by default 'stochastic'
+    save_variables : bool, optional
+        Save the patch trajectories to file, by default True
+    seed_counts : array-like, optional
+        Infections seeded on each day, shape (days,) or (patches, days), overriding
+        ``seed_method``, by default None
+    movement : array-like, scipy.sparse matrix or MovementEdges, optional
+        (patches, patches) daily movement probabilities, ``[i, j]`` for an animal in patch ``i``
+        moving to patch ``j``, by default None (no movement). Load one from an edge-list file
+        with :func:`vaxsim.utils.load_movement_matrix`.
+
+    Returns
+    -------
+    dict
+        - S, I, R, V : numpy.ndarray, (patches, days) trajectories
+        - total : dict of (days,) trajectories summed over the patches per compartment
+    """
+    if isinstance(revaccination, str):
+        if revaccination not in REVACCINATION_STRATEGIES:
+            raise ValueError(f"Invalid revaccination strategy '{revaccination}'. Choose one of {list(REVACCINATION_STRATEGIES)}.")
+        revaccination = REVACCINATION_STRATEGIES[revaccination]
+    if mode not in ('stochastic', 'chain_binomial'):
+        raise ValueError(f"Invalid metapopulation mode '{mode}'. Choose 'stochastic' or 'chain_binomial'.")
+    chain_binomial = mode == 'chain_binomial'
+
+    rng = np.random.default_rng(random_seed)
+    random.seed(random_seed)
+
+    num_patches, patch, mixing = _patch_params(params, mixing)
+    if movement is not None:
+        if not isinstance(movement, MovementEdges):
+            movement = MovementEdges.from_matrix(movement)
+        if len(movement.leaving) != num_patches:
+            raise ValueError(f"Movement matrix covers {len(movement.leaving)} patches, expected {num_patches}.")
+    beta, gamma, vax_rate = patch['beta'], patch['gamma'], patch['vax_rate']
+    vax_period, vax_duration, start_vax_day = patch['vax_period'], patch['vax_duration'], patch['start_vax_day']
+    days = params['days']
+    seed_rate = params['seed_rate']
+
+    # Initial conditions
+    S0, I0, R0, V0 = patch['S0'], patch['I0'], patch['R0'], patch['V0']
+    if chain_binomial:
+        S0, I0, R0, V0 = (np.rint(x).astype(np.int64) for x in (S0, I0, R0, V0))
+    N = S0 + I0 + R0 + V0
+
+    S, I, R, V = [np.zeros((num_patches, days), dtype=np.int32 if chain_binomial else float) for _ in range(4)]
+    S[:, 0], I[:, 0], R[:, 0], V[:, 0] = S0, I0, R0, V0
+
+    decay_times_vax = BatchedDecayTimeHistogram(params['weibull_shape_vax'], params['weibull_scale_vax'], num_patches, rng)
+    decay_times_rec = BatchedDecayTimeHistogram(params['weibull_shape_rec'], params['weibull_scale_rec'], num_patches, rng)
+    decay_times_vax.add(V0.astype(np.int64))
+    decay_times_rec.add(R0.astype(np.int64))
+    to_vaccinate = np.zeros(num_patches)
+
+    if seed_counts is None:
+        seed_counts = build_seed_counts(seed_method, days, seed_rate, min_day=1, max_day=days, num_seeds=3,
+                                        event_series=event_series, rng=rng, size=(num_patches,))
+    seed_counts = np.asarray(seed_counts, dtype=float)
+    if seed_counts.shape[-1] < days:
+        raise ValueError(f"seed_counts covers {seed_counts.shape[-1]} days, expected at least {days}.")
+
+    logging.info(f"Starting metapopulation of {num_patches} patches for scenario: {scenario}")
+
+    for t in tqdm(range(1, days), desc=f"Running {scenario} metapopulation", unit="day"):
+        new_seeds = np.minimum(seed_counts[..., t], S[:, t-1])
+
+        # VACCINATION ROUNDS, each patch on its own schedule
+        since_start = t - start_vax_day
+        round_start = (since_start >= 0) & (since_start % vax_period == 0)
+        if round_start.any():
+            to_vaccinate = np.where(round_start, np.minimum(vax_rate * S[:, t-1], S[:, t-1]), to_vaccinate)
+            num_vax_to_reset = np.where(round_start, np.minimum(vax_rate * vax_period * V[:, t-1], V[:, t-1]), 0)
+            num_vax_to_reset = np.clip(num_vax_to_reset.astype(np.int64), 0, decay_times_vax.totals())
+            if revaccination is not None and num_vax_to_reset.any():
+                revaccination(decay_times_vax, num_vax_to_reset)
+
+        is_vax_period = (since_start >= 0) & (since_start % vax_period < vax_duration)
+        new_vaccinations = np.where(is_vax_period, np.minimum(to_vaccinate, S[:, t-1]), 0).astype(np.int64)
+        decay_times_vax.add(np.maximum(new_vaccinations, 0))
+
+        # Calculate transitions
+        prevalence = np.divide(I[:, t-1], N, out=np.zeros(num_patches), where=N > 0)
+        if mixing is not None:
+            prevalence = mixing @ prevalence
+        if chain_binomial:
+            new_seeds = np.minimum(new_seeds.astype(np.int64), S[:, t-1] - new_vaccinations)
+            exposed = S[:, t-1] - new_vaccinations - new_seeds
+            new_infections = rng.binomial(exposed, -np.expm1(-beta * prevalence)) + new_seeds
+            new_recoveries = rng.binomial(I[:, t-1], -np.expm1(-gamma))
+        else:
+            new_infections = beta * S[:, t-1] * prevalence + new_seeds
+            new_recoveries = gamma * I[:, t-1]
+
+        # Update compartments
+        S[:, t] = S[:, t-1] - new_infections - new_vaccinations
+        I[:, t] = I[:, t-1] + new_infections - new_recoveries
+        R[:, t] = R[:, t-1] + new_recoveries
+        V[:, t] = V[:, t-1] + new_vaccinations
+
+        decay_times_rec.add(np.maximum(new_recoveries, 0).astype(np.int64))
+
+        # IMMUNITY WANING
+        num_waned_vax = decay_times_vax.wane()
+        num_waned_rec = decay_times_rec.wane()
+        S[:, t] += num_waned_vax + num_waned_rec
+        V[:, t] -= num_waned_vax
+        R[:, t] -= num_waned_rec
+
+        # MOVEMENT between patches
+        if movement is not None:
+            for X in (S, I):
+                if chain_binomial:
+                    X[:, t] += movement.net_flow(movement.draw_movers(rng, X[:, t]))
+                else:
+                    X[:, t] += movement.inflow @ X[:, t] - movement.leaving * X[:, t]
+            for X, decay_times in ((R, decay_times_rec), (V, decay_times_vax)):
+                movers = movement.draw_movers(rng, decay_times.totals())
+                decay_times.move(np.repeat(movement.sources, movers), np.repeat(movement.targets, movers))
+                X[:, t] += movement.net_flow(movers)
+            N = S[:, t] + I[:, t] + R[:, t] + V[:, t]
+
+    logging.info(f"Metapopulation of the {scenario.capitalize()} model completed.")
+
+    results = {'S': S, 'I': I, 'R': R, 'V': V}
+    results['total'] = {compartment: results[compartment].sum(axis=0) for compartment in ('S', 'I', 'R', 'V')}
+
+    if save_variables:
+        scenario_folder = os.path.join("output/saved_variables", "metapopulation", scenario)
+        os.makedirs(scenario_folder, exist_ok=True)
+        output_filename = os.path.join(scenario_folder, f"{scenario}_metapopulation_{num_patches}_patches.npz")
+        np.savez(output_filename, S=S, I=I, R=R, V=V)
+        logging.info(f"Metapopulation results saved to {output_filename}")
 
+    return results
@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from vaxsim.diagnostics import load_diagnostics
 from vaxsim.utils import auc_below_threshold
 
 plt.rcParams.update({
@@ -55,6 +56,43 @@ def plot_histogram(decay_times_vax, decay_times_rec, scenario, round_counter, st
     plt.close()
 
 
+def plot_decay_time_diagnostics(diagnostics_file, scenario, output_dir='output/diagnosis'):
+    """Plot the decay-time histograms recorded by a run with ``diagnosis=True``.
+
+    Parameters
+    ----------
+    diagnostics_file : str
+        File saved by :class:`vaxsim.diagnostics.DiagnosticsBuffer`
+    scenario : str
+        Name of simulation scenario
+    output_dir : str, optional
+        Base output directory, by default 'output/diagnosis'
+
+    Notes
+    -----
+    Saves one plot per record to:
+    output/diagnosis/{scenario}/decay_times_{scenario}_round_{round}_[begin|end].png
+    """
+    diagnostics = load_diagnostics(diagnostics_file)
+    scenario_dir = os.path.join(output_dir, scenario)
+    os.makedirs(scenario_dir, exist_ok=True)
+
+    edges = diagnostics['bin_edges']
+    for day, round_counter, start, counts_vax, counts_rec in zip(diagnostics['day'], diagnostics['round'], diagnostics['start'],
+                                                                 diagnostics['counts_vax'], diagnostics['counts_rec']):
+        plt.figure(figsize=(10, 6))
+        plt.stairs(counts_vax, edges, fill=True, alpha=0.5, label='Vaccinated')
+        plt.stairs(counts_rec, edges, fill=True, alpha=0.5, label='Recovered')
+        plt.xlabel('Decay Time')
+        plt.ylabel('Frequency')
+        plt.title(f'Decay Times for {scenario.capitalize()} - Round {round_counter} {"Beginning" if start else "End"}')
+        plt.legend()
+
+        plt.text(0.95, 0.05, f"Vaccinated Count: {counts_vax.sum():.0f}", transform=plt.gca().transAxes, fontsize=10, horizontalalignment='center', bbox=dict(facecolor='white', alpha=0.5))
+        plt.savefig(os.path.join(scenario_dir, f'decay_times_{scenario}_round_{round_counter}_{"begin" if start else "end"}.png'))
+        plt.close()
+
+
 def plot_model(S, I, R, V, days, scenario, model_type, output_dir='output/plots'):
     """Plot SIRSV model simulation results showing protected and recovered fractions.
 
@@ -346,11 +384,36 @@ def plot_parameter_sweep(results, param1_name, param2_name, output_variable='pro
     plt.ylabel(f'{param1_name} units')
     plt.title(f'Minimum {output_variable} for different {param1_name} and {param2_name}')
     plt.legend()
+    os.makedirs('output/sweep', exist_ok=True)
     plt.savefig(f'output/sweep/parameter_sweep_{param1_name}_{param2_name}_{output_variable}_{vaccine_efficacy}_{model_type}.png', dpi=300, bbox_inches='tight')
     plt.close()
 
 
-def compare_infections(scenario, model_type='random', output_dir='output/plots'):
+def load_infections(scenario, model_type='random', store=None):
+    """Infected trajectory of a saved scenario run.
+
+    Parameters
+    ----------
+    scenario : str
+        Name of the scenario
+    model_type : str, optional
+        Type of vaccination strategy (default: 'random')
+    store : TrajectoryStore, optional
+        Read the most recent matching run from this store instead of
+        output/saved_variables/{model_type}_vaccination/{scenario}/ (default: None)
+
+    Returns
+    -------
+    numpy.ndarray
+        Infected individuals per day
+    """
+    if store is not None:
+        return store.trajectory(store.latest(scenario=scenario, model=model_type), 'I')
+    with np.load(f'output/saved_variables/{model_type}_vaccination/{scenario}/{scenario}_simulation_results.npz') as data:
+        return data['I']
+
+
+def compare_infections(scenario, model_type='random', output_dir='output/plots', store=None):
     """Compare infection dynamics between baseline and scenario simulations.
 
     Parameters
@@ -361,25 +424,26 @@ def compare_infections(scenario, model_type='random', output_dir='output/plots')
         Type of vaccination strategy (default: 'random')
     output_dir : str, optional
         Output directory for plots
+    store : TrajectoryStore, optional
+        Store holding the baseline and scenario runs, see :func:`load_infections` (default: None)
 
     Notes
     -----
     Saves plot to: {output_dir}/infections_comparison_{scenario}_{model_type}.png
-    Loads data from: output/saved_variables/{model_type}_vaccination/
+    Loads data from: output/saved_variables/{model_type}_vaccination/ or ``store``
     """
-    input_dir = 'output/saved_variables'
     os.makedirs(output_dir, exist_ok=True)
-    baseline_inf = np.load(f'{input_dir}/{model_type}_vaccination/baseline/baseline_simulation_results.npz')
-    scenario_inf = np.load(f'{input_dir}/{model_type}_vaccination/{scenario}/{scenario}_simulation_results.npz')
+    baseline_inf = load_infections('baseline', model_type, store)
+    scenario_inf = load_infections(scenario, model_type, store)
 
     # Assume simulation time is in days; convert to dates starting 2020-01-01
-    num_days = baseline_inf['I'].shape[0]
+    num_days = baseline_inf.shape[0]
     start_date = pd.to_datetime("2020-01-01")
     dates = start_date + pd.to_timedelta(np.arange(num_days), unit='D')
 
     plt.figure(figsize=(16, 6))
-    plt.plot(dates, baseline_inf['I'], label='Baseline', color='red', linestyle='-')
-    plt.plot(dates, scenario_inf['I'], label='Bi-annual', color='orange', linestyle='--')
+    plt.plot(dates, baseline_inf, label='Baseline', color='red', linestyle='-')
+    plt.plot(dates, scenario_inf, label='Bi-annual', color='orange', linestyle='--')
 
     plt.xlabel('Date')
     plt.ylabel('Number of infected individuals')
@@ -395,7 +459,7 @@ def compare_infections(scenario, model_type='random', output_dir='output/plots')
     plt.close()
 
 
-def compare_cases_and_infections(scenario, model_type='random', output_dir='output/plots'):
+def compare_cases_and_infections(scenario, model_type='random', output_dir='output/plots', store=None):
     """Compare observed FMD cases with simulated infections.
 
     Parameters
@@ -406,13 +470,15 @@ def compare_cases_and_infections(scenario, model_type='random', output_dir='outp
         Type of vaccination strategy (default: 'random')
     output_dir : str, optional
         Output directory for plots
+    store : TrajectoryStore, optional
+        Store holding the baseline run, see :func:`load_infections` (default: None)
 
     Notes
     -----
     Saves plot to: {output_dir}/cases_and_infections_{scenario}_{model_type}.png
     Loads data from: 
     - data copy.csv (observed cases)
-    - output/saved_variables/{model_type}_vaccination/baseline/
+    - output/saved_variables/{model_type}_vaccination/baseline/ or ``store``
     """
     # Load observed data from CSV
     data = pd.read_csv('data copy.csv', parse_dates=['date'], index_col='date')
@@ -433,9 +499,8 @@ def compare_cases_and_infections(scenario, model_type='random', output_dir='outp
         smoothed = None
 
     # Load baseline simulation results
-    input_dir = 'output/saved_variables'
-    baseline_inf = np.load(f'{input_dir}/{model_type}_vaccination/baseline/baseline_simulation_results.npz')
-    num_days = baseline_inf['I'].shape[0]
+    baseline_inf = load_infections('baseline', model_type, store)
+    num_days = baseline_inf.shape[0]
     start_date = pd.to_datetime("2020-01-01")
     sim_dates = start_date + pd.to_timedelta(np.arange(num_days), unit='D')
 
@@ -457,7 +522,7 @@ def compare_cases_and_infections(scenario, model_type='random', output_dir='outp
                     ha='center', fontsize=14)
 
     # Bottom panel: Baseline Simulation Infections
-    axs[1].plot(sim_dates, baseline_inf['I'], label='Baseline',
+    axs[1].plot(sim_dates, baseline_inf, label='Baseline',
                 color='red', linestyle='-')
     axs[1].set_ylabel('Number of Infected Individuals')
     axs[1].tick_params(axis='y')
@@ -0,0 +1,316 @@
+"""Consolidated trajectory store for many simulation runs, and streamed output of long runs.
+
+A study, e.g. a parameter sweep with its replicates, is kept as two files under
+``output/saved_variables/store/<study>/`` instead of one ``.npz`` file per run:
+
+- ``trajectories.bin``: the runs back to back, each a contiguous (compartments, days) block
+  so that one compartment of a run is a contiguous slice
+- ``index.jsonl``: one line per run with its byte offset, dtype, shape and metadata such as
+  the parameter hash, random seed, scenario and model variant
+
+Writers append runs; an advisory file lock serialises appends from worker processes, and a
+run becomes visible to readers once its index line is written. Readers memory-map the data
+file, so selecting runs by metadata and reading, say, the infected compartment of a subset
+of them touches only those slices::
+
+    store = TrajectoryStore('vax_sweep')
+    sirsv_model = functools.partial(sirsv_model_with_weibull_random_vaccination, store=store)
+    ...
+    runs = store.select(scenario='parameter_sweep', random_seed=42)
+    I = store.column('I', runs)
+
+For horizons of decades, a :class:`TrajectoryStream` lets a model write its compartments to
+a ``.npy`` file in chunks while it runs, optionally as float32 and keeping only every n-th
+day, instead of holding the full trajectories in memory.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from vaxsim.cache import _canonical
+
+DEFAULT_STORE_DIR = os.path.join("output/saved_variables", "store")
+COMPARTMENTS = ('S', 'I', 'R', 'V')
+
+
+def params_hash(params):
+    """Hexadecimal SHA-256 digest identifying a parameter dictionary."""
+    payload = json.dumps(_canonical(params), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def run_metadata(params, scenario, model, random_seed, **extra):
+    """Index metadata of one model run.
+
+    Parameters
+    ----------
+    params : dict
+        Model parameters, stored as their :func:`params_hash`
+    scenario : str
+        Name of simulation scenario
+    model : str
+        Model variant, e.g. 'random', 'targeted' or 'ensemble'
+    random_seed : int
+        Random seed of the run
+    **extra
+        Further JSON-serialisable entries, e.g. the seeding method or replicate number
+
+    Returns
+    -------
+    dict
+    """
+    return {'params_hash': params_hash(params), 'scenario': scenario, 'model': model,
+            'random_seed': None if random_seed is None else int(random_seed), **_canonical(extra)}
+
+
+class TrajectoryStore:
+    """Append-only, memory-mapped store of the compartment trajectories of a study.
+
+    Parameters
+    ----------
+    study : str
+        Name of the study, used as the directory name
+    directory : str or Path, optional
+        Parent directory of the studies, by default output/saved_variables/store
+    dtype : str or numpy.dtype, optional
+        Data type the trajectories are stored as, by default float64
+    """
+
+    def __init__(self, study, directory=DEFAULT_STORE_DIR, dtype=np.float64):
+        self.study = study
+        self.path = Path(directory) / study
+        self.dtype = np.dtype(dtype)
+        self._records = []
+        self._index_size = 0
+        self._buffer = None
+
+    def __fspath__(self):
+        # Identifies the store in result cache keys
+        return os.fspath(self.path)
+
+    def __getstate__(self):
+        # Worker processes re-read the index and re-map the data file
+        return {**self.__dict__, '_records': [], '_index_size': 0, '_buffer': None}
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def data_path(self):
+        return self.path / 'trajectories.bin'
+
+    @property
+    def index_path(self):
+        return self.path / 'index.jsonl'
+
+    @contextlib.contextmanager
+    def _locked(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / '.lock', 'a') as lock:
+            try:
+                import fcntl
+            except ImportError:  # pragma: no cover - no advisory locks, single writer only
+                fcntl = None
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Read the index lines appended since the last call."""
+        try:
+            size = self.index_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == self._index_size:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_size)
+            chunk = f.read(size - self._index_size)
+        # Only complete lines; a line being written by another process is read next time
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        self._records.extend(json.loads(line) for line in complete.splitlines())
+        self._index_size += len(complete)
+
+    @property
+    def records(self):
+        """Index records of the stored runs, in the order they were appended."""
+        self._refresh()
+        return self._records
+
+    def append(self, S, I, R, V, **metadata):
+        """Append the trajectories of one run and return its run number.
+
+        Parameters
+        ----------
+        S, I, R, V : numpy.ndarray
+            Compartment trajectories of equal shape, e.g. (days,)
+        **metadata
+            JSON-serialisable index entries, e.g. from :func:`run_metadata`
+
+        Returns
+        -------
+        int
+        """
+        block = np.stack([np.asarray(compartment, dtype=self.dtype) for compartment in (S, I, R, V)])
+        with self._locked():
+            self._refresh()
+            with open(self.data_path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(block).tobytes())
+            record = {'offset': offset, 'dtype': self.dtype.str, 'shape': list(block.shape[1:]),
+                      'metadata': _canonical(metadata)}
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+            self._refresh()
+            return len(self._records) - 1
+
+    def select(self, **criteria):
+        """Run numbers whose metadata equal every given criterion, e.g. ``select(scenario='baseline')``."""
+        criteria = _canonical(criteria)
+        return [run for run, record in enumerate(self.records)
+                if all(record['metadata'].get(key) == value for key, value in criteria.items())]
+
+    def metadata(self, run):
+        """Metadata of a run."""
+        return self.records[run]['metadata']
+
+    def _map(self, end):
+        if self._buffer is None or len(self._buffer) < end:
+            self._buffer = np.memmap(self.data_path, dtype=np.uint8, mode='r')
+        return self._buffer
+
+    def trajectory(self, run, compartment=None):
+        """Read-only memory-mapped view of a run.
+
+        Parameters
+        ----------
+        run : int
+            Run number
+        compartment : str, optional
+            'S', 'I', 'R' or 'V' for a single compartment, by default None for the
+            (compartments, ...) block
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        record = self.records[run]
+        dtype = np.dtype(record['dtype'])
+        shape = (len(COMPARTMENTS), *record['shape'])
+        size = int(np.prod(shape)) * dtype.itemsize
+        block = self._map(record['offset'] + size)[record['offset']:record['offset'] + size]
+        block = block.view(dtype).reshape(shape)
+        return block if compartment is None else block[COMPARTMENTS.index(compartment)]
+
+    def column(self, compartment, runs=None):
+        """Stack one compartment of several runs of equal shape.
+
+        Parameters
+        ----------
+        compartment : str
+            'S', 'I', 'R' or 'V'
+        runs : iterable of int, optional
+            Run numbers, by default all runs
+
+        Returns
+        -------
+        numpy.ndarray
+            (runs, ...) array
+
+        Raises
+        ------
+        ValueError
+            If the runs differ in shape
+        """
+        runs = range(len(self)) if runs is None else list(runs)
+        trajectories = [self.trajectory(run, compartment) for run in runs]
+        if len({trajectory.shape for trajectory in trajectories}) > 1:
+            raise ValueError(f"Runs of study {self.study!r} differ in shape; read them with trajectory()")
+        if not trajectories:
+            return np.empty((0,), dtype=self.dtype)
+        return np.array(trajectories)
+
+    def latest(self, **criteria):
+        """Run number of the most recently appended run matching ``criteria``.
+
+        Raises
+        ------
+        KeyError
+            If no run matches
+        """
+        runs = self.select(**criteria)
+        if not runs:
+            raise KeyError(f"No run of study {self.study!r} matches {criteria}")
+        return runs[-1]
+
+
+class TrajectoryStream:
+    """Chunked ``.npy`` output of one simulation, written while the simulation runs.
+
+    A model given a stream keeps only ``chunk_days`` days of its compartments in memory and
+    hands every full chunk to :meth:`write`, so its memory use does not grow with the
+    horizon. The file holds a (saved days, compartments, ...) array, where the trailing axes
+    are e.g. the replicates of an ensemble, and can be read back lazily with :meth:`load`.
+
+    Parameters
+    ----------
+    path : str or Path
+        ``.npy`` file to write
+    dtype : str or numpy.dtype, optional
+        Data type the trajectories are saved as, e.g. float32 to halve the file, by default
+        float64
+    every : int, optional
+        Keep every ``every``-th day starting with day 0, e.g. 7 for weekly values, by default 1
+    chunk_days : int, optional
+        Days simulated between two writes, by default 1024
+    """
+
+    def __init__(self, path, dtype=np.float64, every=1, chunk_days=1024):
+        if every < 1 or chunk_days < 1:
+            raise ValueError("every and chunk_days must be positive.")
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.every = every
+        self.chunk_days = chunk_days
+        self._file = None
+
+    def open(self, days, shape=()):
+        """Start a file for ``days`` days of compartments of the given per-day ``shape``."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False,
+                  'shape': (len(range(0, days, self.every)), len(COMPARTMENTS), *shape)}
+        np.lib.format.write_array_header_1_0(self._file, header)
+
+    def kept(self, start_day, num_days):
+        """Indices of the saved days among ``num_days`` days starting at ``start_day``."""
+        return np.arange(-start_day % self.every, num_days, self.every)
+
+    def write(self, start_day, S, I, R, V):
+        """Append consecutive days of the compartments, with days along the first axis."""
+        keep = self.kept(start_day, len(S))
+        block = np.stack([np.asarray(compartment)[keep] for compartment in (S, I, R, V)], axis=1)
+        self._file.write(np.ascontiguousarray(block, dtype=self.dtype).tobytes())
+
+    def close(self):
+        """Finish the file."""
+        self._file.close()
+        self._file = None
+
+    def load(self):
+        """Read-only memory-mapped (saved days, compartments, ...) array of the file."""
+        return np.load(self.path, mmap_mode='r')
+
+    def compartments(self):
+        """Memory-mapped S, I, R and V with the saved days along the last axis."""
+        data = self.load()
+        return tuple(np.moveaxis(data[:, k], 0, -1) for k in range(len(COMPARTMENTS)))
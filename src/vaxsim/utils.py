@@ -1,14 +1,17 @@
 import logging
 import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from scipy.integrate import simpson
 from tqdm import tqdm
 import yaml
 
+# matplotlib, pandas and scipy are imported inside the functions that use them, so the
+# simulation models and their worker processes import this module without them.
+
 
 def load_params():
     """Load model parameters from params.yaml."""
@@ -33,6 +36,8 @@ def auc_below_threshold(S, I, R, V, days, herd_threshold=0.416):
     Returns:
     auc_normalised: Area under the curve normalized by the total number of days.
     """
+    from scipy.integrate import simpson
+
     N = S + I + R + V
     protected = (R + V) / (N - I)
     t = np.arange(days) / 30
@@ -59,6 +64,149 @@ def compute_total_infections(I):
     return np.sum(daily_infections)
 
 
+def summarise_ensemble(trajectories, quantiles=(0.025, 0.5, 0.975)):
+    """Helper function to compute the mean and quantile bands of ensemble trajectories.
+
+    Args:
+    trajectories: Array of shape (replicates, days).
+    quantiles: Quantile levels of the bands.
+
+    Returns:
+    mean: Mean trajectory of shape (days,).
+    bands: Quantile trajectories of shape (len(quantiles), days).
+    """
+    return trajectories.mean(axis=0), np.quantile(trajectories, quantiles, axis=0)
+
+
+@dataclass
+class ObservationSet:
+    """Seromonitoring and DIVA observations indexed by simulation day.
+
+    Built once from the observed data with :meth:`from_frame`, so that evaluating a loss
+    only gathers the model predictions on the observed days.
+
+    Attributes:
+    sero_days: Simulation days of the seromonitoring observations.
+    sero_values: Observed protected fractions.
+    diva_days: Simulation days of the DIVA observations.
+    diva_values: Observed DIVA positive fractions, before scaling.
+    """
+    sero_days: np.ndarray
+    sero_values: np.ndarray
+    diva_days: np.ndarray
+    diva_values: np.ndarray
+
+    @classmethod
+    def from_frame(cls, data, start_date='2020-01-01'):
+        """
+        Builds the observation set of a data frame.
+
+        Args:
+        data: Data frame with a date index and 'sero_eff' and 'diva' columns.
+        start_date: Date of simulation day 0.
+
+        Returns:
+        observations: ObservationSet of the non-missing observations.
+
+        Raises:
+        ValueError: If either column has no observations.
+        """
+        import pandas as pd
+
+        start_date = pd.to_datetime(start_date)
+        columns = []
+        for column in ('sero_eff', 'diva'):
+            valid = data[column].dropna()
+            if valid.empty:
+                raise ValueError(f"No '{column}' observations to compare with.")
+            columns += [np.asarray((valid.index - start_date).days, dtype=int), valid.to_numpy(dtype=float)]
+        return cls(*columns)
+
+    @property
+    def max_day(self):
+        """Last observed simulation day."""
+        return int(max(self.sero_days.max(), self.diva_days.max()))
+
+
+def batch_model_loss(S, I, R, V, observations, scale_diva=0.5):
+    """
+    Computes the loss of one or many trajectories against the observations in one call.
+
+    Args:
+    S, I, R, V: Compartment arrays of shape (days,) or (particles, days).
+    observations: ObservationSet of the observed data.
+    scale_diva: Scaling factor for DIVA predictions, a float or an array of shape (particles,).
+
+    Returns:
+    loss: Sum of squared errors per trajectory, shape () or (particles,). Trajectories that end
+    before the last observation get a loss of 1e6.
+    """
+    S, I, R, V = (np.asarray(compartment) for compartment in (S, I, R, V))
+    if S.shape[-1] <= observations.max_day:
+        return np.full(S.shape[:-1], 1e6)
+
+    def predictions(days):
+        # Only the observed days of the trajectories are read
+        S_days, I_days, R_days, V_days = S[..., days], I[..., days], R[..., days], V[..., days]
+        N = S_days + I_days + R_days + V_days
+        return (R_days + V_days) / (N - I_days), R_days / (N - I_days)
+
+    sero_pred, _ = predictions(observations.sero_days)
+    _, diva_pred = predictions(observations.diva_days)
+    scale_diva = np.asarray(scale_diva, dtype=float)[..., None]
+
+    sero_error = ((observations.sero_values - sero_pred) ** 2).sum(axis=-1)
+    diva_error = ((scale_diva * observations.diva_values - diva_pred) ** 2).sum(axis=-1)
+    return sero_error + diva_error
+
+
+class RunningLoss:
+    """
+    Running sum of squared errors of a simulation, to stop it once the loss exceeds epsilon.
+
+    Passed to a model as its ``stop_condition``, it is called with the compartments of each
+    day and adds the errors of the observations on that day. The running sum only grows, so
+    a run stopped above epsilon would have been rejected by its full loss as well, while
+    accepted runs are never stopped and get their exact loss from model_loss.
+
+    Args:
+    observations: ObservationSet of the observed data.
+    scale_diva: Scaling factor for DIVA predictions.
+    epsilon: Loss above which the simulation is stopped.
+
+    Attributes:
+    loss: Sum of the squared errors of the days seen so far, a lower bound of the full loss.
+    rejected: Whether the loss exceeded epsilon.
+    """
+
+    def __init__(self, observations, scale_diva=0.5, epsilon=np.inf):
+        self.epsilon = epsilon
+        self.loss = 0.0
+        self.rejected = False
+        self._sero = self._by_day(observations.sero_days, observations.sero_values)
+        self._diva = self._by_day(observations.diva_days, scale_diva * observations.diva_values)
+
+    @staticmethod
+    def _by_day(days, values):
+        grouped = {}
+        for day, value in zip(days.tolist(), values):
+            grouped.setdefault(day, []).append(value)
+        return {day: np.array(day_values) for day, day_values in grouped.items()}
+
+    def __call__(self, day, S, I, R, V):
+        sero = self._sero.get(day)
+        diva = self._diva.get(day)
+        if sero is None and diva is None:
+            return False
+        N = S + I + R + V
+        if sero is not None:
+            self.loss += ((sero - (R + V) / (N - I)) ** 2).sum()
+        if diva is not None:
+            self.loss += ((diva - R / (N - I)) ** 2).sum()
+        self.rejected = bool(self.loss > self.epsilon)
+        return self.rejected
+
+
 def model_loss(S, I, R, V, data, scale_diva=0.5):
     """Calculate loss between model predictions and observed data.
 
@@ -75,8 +223,9 @@ def model_loss(S, I, R, V, data, scale_diva=0.5):
         Recovered population over time
     V : array-like
         Vaccinated population over time
-    data : pd.DataFrame
-        Data containing 'sero_eff' and 'diva' columns
+    data : pd.DataFrame or ObservationSet
+        Data containing 'sero_eff' and 'diva' columns, or its :class:`ObservationSet`.
+        Pass the observation set when evaluating many losses, so the data is indexed once.
     scale_diva : float, optional
         Scaling factor for DIVA predictions, by default 0.5
 
@@ -93,80 +242,105 @@ def model_loss(S, I, R, V, data, scale_diva=0.5):
     where N = S + I + R + V
     """
     try:
-        start_date = pd.to_datetime('2020-01-01')
+        observations = data if isinstance(data, ObservationSet) else ObservationSet.from_frame(data)
+    except ValueError as e:
+        logging.error(f"Error in loss calculation: {e!s}")
+        return 1e6
+    total_error = float(batch_model_loss(S, I, R, V, observations, scale_diva))
+    logging.debug(f"Current loss: {total_error:.6f}")
+    return total_error
 
-        valid_sero = data['sero_eff'].dropna()
-        valid_diva = data['diva'].dropna()
-        sero_days = (valid_sero.index - start_date).days.astype(int)
-        diva_days = (valid_diva.index - start_date).days.astype(int)
 
-        max_day = max(max(sero_days), max(diva_days))
-        if len(S) > max_day + 1:
-            S = S[:max_day + 1]
-            I = I[:max_day + 1]
-            R = R[:max_day + 1] 
-            V = V[:max_day + 1]
+def scenario_metrics(S, I, R, V, herd_threshold=0.416):
+    """
+    Helper function to compute the summary metrics of one scenario trajectory.
 
-        N = S + I + R + V
-        sero_pred = (R + V) / (N - I)
-        diva_pred = R / (N - I)
+    Args:
+    S: Susceptible population array over time.
+    I: Infected population array over time.
+    R: Recovered population array over time.
+    V: Vaccinated population array over time.
+    herd_threshold: Threshold for the protected fraction.
 
-        matched_sero = sero_pred[sero_days]
-        matched_diva = diva_pred[diva_days]
+    Returns:
+    metrics: Dictionary with the total infections (compute_total_infections), the minimum
+    protected fraction over the last 365 days ('NA' for an empty population) and the
+    cumulative vulnerability (auc_below_threshold).
+    """
+    S, I, R, V = (np.asarray(compartment) for compartment in (S, I, R, V))
 
-        sero_error = ((valid_sero.values - matched_sero) ** 2).sum()
-        diva_error = ((scale_diva * valid_diva.values - matched_diva) ** 2).sum()
+    last_365_days = slice(-365, None)
+    total_population = S[last_365_days] + I[last_365_days] + R[last_365_days] + V[last_365_days]
+    protected_fraction = np.min((R[last_365_days] + V[last_365_days]) / total_population) if total_population.any() else 'NA'
 
-        total_error = sero_error + diva_error
-        print(f"Current loss: {total_error:.6f}")
-        return total_error
+    return {
+        'total_infections': compute_total_infections(I),
+        'protected_fraction': protected_fraction,
+        'cumulative_vulnerability': auc_below_threshold(S, I, R, V, len(I), herd_threshold=herd_threshold),
+    }
 
-    except (ValueError, ZeroDivisionError, IndexError) as e:
-        print(f"Error in loss calculation: {e!s}")
-        return 1e6
+
+def _run_scenario(sirsv_model, scenario, scenario_params):
+    """Run one scenario and return its summary metrics, or None if the run failed."""
+    try:
+        logging.info(f"Running scenario: {scenario} with params: {scenario_params}")
+        S, I, R, V = sirsv_model(scenario_params, scenario)
+        return scenario_metrics(S, I, R, V, herd_threshold=0.416)
+    except Exception as e:
+        logging.error(f"Error running scenario {scenario}: {e}")
+        return None
 
 
-def analyse_scenarios(sirsv_model, params, output_dir='output', model_type='random'):
+def analyse_scenarios(sirsv_model, params, output_dir='output', model_type='random', workers=1):
     """
     Analyses each scenario to compute total infections, percentage of infections averted, and protected fraction.
     Saves the results as both a CSV file and a PNG image.
 
+    Scenarios run on ``workers`` processes and are reduced to their summary metrics as they
+    finish, so only the metrics travel back from the workers; the table is rendered once all
+    scenarios are in. Every scenario uses the model's default random seed, so the results do
+    not depend on ``workers``.
+
     Parameters:
+        sirsv_model (callable): Model function, called as ``sirsv_model(params, scenario)``. It must be
+            picklable (a module-level function or a ``functools.partial`` of one) when ``workers > 1``.
         params (dict): Dictionary containing parameters for each scenario.
         output_dir (str): Directory to save the output files (CSV and PNG).
+        model_type (str): Type of vaccination strategy, used in the output file names.
+        workers (int): Number of worker processes; 1 runs the scenarios serially in this process.
     """
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
     results = []
 
-    # Run simulations for each scenario
     filtered_scenarios = {k: v for k, v in params.items() if k == 'baseline' or k.startswith('scenario_')}
 
-    # Run simulations for each scenario
-    simulation_results = {}
-    for scenario, scenario_params in filtered_scenarios.items():
-        try:
-            # Run model with current scenario parameters
-            logging.info(f"Running scenario: {scenario} with params: {scenario_params}")
-            S, I, R, V = sirsv_model(scenario_params, scenario)
-
-            # Store simulation results
-            simulation_results[scenario] = {'S': S, 'I': I, 'R': R, 'V': V}
-
-        except Exception as e:
-            logging.error(f"Error running scenario {scenario}: {e}")
+    # Run simulations for each scenario, keeping only their metrics
+    scenario_results = {}
+    with tqdm(total=len(filtered_scenarios), desc="Scenario progress") as pbar:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_run_scenario, sirsv_model, scenario, scenario_params): scenario
+                           for scenario, scenario_params in filtered_scenarios.items()}
+                for future in as_completed(futures):
+                    scenario_results[futures[future]] = future.result()
+                    pbar.update(1)
+        else:
+            for scenario, scenario_params in filtered_scenarios.items():
+                scenario_results[scenario] = _run_scenario(sirsv_model, scenario, scenario_params)
+                pbar.update(1)
+    simulation_results = {scenario: scenario_results[scenario] for scenario in filtered_scenarios
+                          if scenario_results[scenario] is not None}
 
     # Baseline scenario results for comparison
-    baseline_data = simulation_results.get('baseline', {})
-    baseline_infections = compute_total_infections(np.array(baseline_data.get('I', [])))
-
-    # Analyze and compile results
-    for scenario, data in simulation_results.items():
-        I = np.array(data.get('I', []))
-        R = np.array(data.get('R', []))
-        V = np.array(data.get('V', []))
-        S = np.array(data.get('S', []))
+    baseline_infections = simulation_results.get('baseline', {}).get('total_infections', 0)
 
-        # Calculate total infections
-        total_infections = compute_total_infections(I)
+    # Compile results in the order of params.yaml
+    for scenario, metrics in simulation_results.items():
+        total_infections = metrics['total_infections']
+        protected_fraction = metrics['protected_fraction']
+        cumulative_vulnerability = metrics['cumulative_vulnerability']
 
         # Calculate percentage of infections averted
         I0 = params[scenario].get('I0', 'NA')
@@ -178,12 +352,6 @@ def analyse_scenarios(sirsv_model, params, output_dir='output', model_type='rand
                 if baseline_infections > total_infections and scenario != 'baseline' else 'NA'
             )
 
-        # Calculate protected fraction using the last 365 days
-        last_365_days = slice(-365, None)
-        total_population = S[last_365_days] + I[last_365_days] + R[last_365_days] + V[last_365_days]
-        protected_fraction = np.min((R[last_365_days] + V[last_365_days]) / total_population) if total_population.any() else 'NA'
-        cumulative_vulnerability = auc_below_threshold(S, I, R, V, len(I), herd_threshold=0.416)
-
         # Append results for this scenario
         vax_rate = params[scenario].get('vax_rate', 'NA')
         vax_period = params[scenario].get('vax_period', 'NA')
@@ -258,84 +426,100 @@ def analyse_scenarios(sirsv_model, params, output_dir='output', model_type='rand
     logging.info(f"Results saved to CSV, PNG, and LaTeX files in {output_dir}.")
 
 
-def run_parameter_sweep(sirsv_model, base_params, param1_name, param1_range, param2_name, param2_range,
-                        diagonal=False, analysis_function='auc', model_type='random'):
-    results = []
+def _run_sweep_point(sirsv_model, base_params, param1_name, param2_name, param_values, analysis_function, random_seed):
+    """Run the model at one parameter sweep grid point and analyse the trajectory.
+
+    Returns the result dictionary, or None if the run failed or produced NaN values.
+    """
+    param1_value, param2_value = param_values
+    current_params = base_params.copy()
+    current_params[param1_name] = param1_value
+    current_params[param2_name] = param2_value
 
-    # Function mapping for analysis type
-    analysis_func = auc_below_threshold if analysis_function == 'auc' else equilibrium_min_protected_fraction
+    try:
+        S, I, R, V = sirsv_model(current_params, "parameter_sweep", random_seed=random_seed)
+
+        # Check for NaN values in results
+        if np.isnan(S).any() or np.isnan(I).any() or np.isnan(R).any() or np.isnan(V).any():
+            logging.warning(f"NaN detected for param1={param1_value} and param2={param2_value}. Skipping this run.")
+            return None
+
+        # Perform analysis using the selected function
+        if analysis_function == 'auc':
+            analysis_result = auc_below_threshold(S, I, R, V, len(I))
+        else:
+            analysis_result = equilibrium_min_protected_fraction(S, I, R, V)
+
+        return {
+            param1_name: param1_value,
+            param2_name: param2_value,
+            analysis_function: analysis_result
+        }
+
+    except Exception as e:
+        logging.error(f"Error occurred for param1={param1_value} and param2={param2_value}: {e}")
+        return None
 
+
+def run_parameter_sweep(sirsv_model, base_params, param1_name, param1_range, param2_name, param2_range,
+                        diagonal=False, analysis_function='auc', model_type='random', workers=1, chunksize=1,
+                        random_seed=42):
+    """Run the model over a grid of two parameters and analyse each trajectory.
+
+    Parameters
+    ----------
+    sirsv_model : callable
+        Model function, called as ``sirsv_model(params, "parameter_sweep", random_seed=...)``.
+        It must be picklable (a module-level function or a ``functools.partial`` of one)
+        when ``workers > 1``.
+    base_params : dict
+        Parameters shared by all grid points
+    param1_name, param2_name : str
+        Names of the swept parameters
+    param1_range, param2_range : array-like
+        Values of the swept parameters
+    diagonal : bool, optional
+        Sweep only the points where both parameters take the same value, by default False
+    analysis_function : str, optional
+        'auc' for :func:`auc_below_threshold`, anything else for
+        :func:`equilibrium_min_protected_fraction`, by default 'auc'
+    model_type : str, optional
+        Type of vaccination strategy, by default 'random'
+    workers : int, optional
+        Number of worker processes; 1 runs the grid serially in this process, by default 1
+    chunksize : int, optional
+        Number of grid points sent to a worker at a time, by default 1
+    random_seed : int, optional
+        Random seed of every grid point, so results do not depend on ``workers``, by default 42
+
+    Returns
+    -------
+    list of dict
+        One dictionary per successful grid point with both parameter values and the analysis
+        result under the ``analysis_function`` key, in grid order.
+    """
     if diagonal:
         # Ensure param1_range and param2_range are of equal length for diagonal sweep
         param_range = np.minimum(param1_range, param2_range)
-        total_combinations = len(param_range)
+        grid = [(value, value) for value in param_range]
     else:
-        total_combinations = len(param1_range) * len(param2_range)
-
-    with tqdm(total=total_combinations, desc="Parameter sweep progress") as pbar:
-        if diagonal:
-            # Diagonal sweep (where param1_value == param2_value)
-            for value in param_range:
-                current_params = base_params.copy()
-                current_params[param1_name] = value
-                current_params[param2_name] = value
-                logging.info(f"Running params: {param1_name}, {param2_name}")
-
-                try:
-                    S, I, R, V = sirsv_model(current_params, "parameter_sweep")
-
-                    # Check for NaN values in results
-                    if np.isnan(S).any() or np.isnan(I).any() or np.isnan(R).any() or np.isnan(V).any():
-                        logging.warning(f"NaN detected for param1={value} and param2={value}. Skipping this run.")
-                        pbar.update(1)
-                        continue
-
-                    # Perform analysis using the selected function
-                    analysis_result = analysis_func(S, I, R, V)
-
-                    equilibrium_values = {
-                        param1_name: value,
-                        param2_name: value,
-                        analysis_function: analysis_result
-                    }
-                    results.append(equilibrium_values)
-
-                except Exception as e:
-                    logging.error(f"Error occurred for param1={value} and param2={value}: {e}")
-
-                pbar.update(1)
-
-        else:
-            # Regular sweep with independent param1 and param2 ranges
-            for param1_value in param1_range:
-                for param2_value in param2_range:
-                    current_params = base_params.copy()
-                    current_params[param1_name] = param1_value
-                    current_params[param2_name] = param2_value
-
-                    try:
-                        S, I, R, V = sirsv_model(current_params, "parameter_sweep")
-
-                        # Check for NaN values in results
-                        if np.isnan(S).any() or np.isnan(I).any() or np.isnan(R).any() or np.isnan(V).any():
-                            logging.warning(f"NaN detected for param1={param1_value} and param2={param2_value}. Skipping this run.")
-                            pbar.update(1)
-                            continue
-
-                        # Perform analysis using the selected function
-                        analysis_result = analysis_func(S, I, R, V)
-
-                        equilibrium_values = {
-                            param1_name: param1_value,
-                            param2_name: param2_value,
-                            analysis_function: analysis_result
-                        }
-                        results.append(equilibrium_values)
-
-                    except Exception as e:
-                        logging.error(f"Error occurred for param1={param1_value} and param2={param2_value}: {e}")
+        grid = [(param1_value, param2_value) for param1_value in param1_range for param2_value in param2_range]
 
+    results = []
+    with tqdm(total=len(grid), desc="Parameter sweep progress") as pbar:
+        point_args = (repeat(sirsv_model), repeat(base_params), repeat(param1_name), repeat(param2_name), grid,
+                      repeat(analysis_function), repeat(random_seed))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(_run_sweep_point, *point_args, chunksize=chunksize):
+                    if result is not None:
+                        results.append(result)
                     pbar.update(1)
+        else:
+            for result in map(_run_sweep_point, *point_args):
+                if result is not None:
+                    results.append(result)
+                pbar.update(1)
 
     return results
 
@@ -393,6 +577,81 @@ def generate_seed_schedule(method, min_day=None, max_day=None, days=None, num_se
         raise ValueError("Invalid method. Choose 'random' or 'event_series'.")
 
 
+def build_seed_counts(method, days, seed_rate=0, min_day=1, max_day=None, num_seeds=3, event_series=None,
+                      events=None, rng=None, size=None, expected=False):
+    """
+    Builds the number of infections seeded on each day of a simulation.
+
+    The counts are built once before the daily loop, which then looks up ``counts[t]``
+    instead of searching a list of seeding days.
+
+    Args:
+        method (str): How infections are seeded:
+            "none": no seeding.
+            "continuous": seed_rate infections every day.
+            "random": seed_rate infections on each of num_seeds distinct days drawn from [min_day, max_day).
+            "event_series": event_series[t] * seed_rate infections on day t, so a binary series seeds
+                            seed_rate infections on every marked day and larger values scale the rate.
+            "events": count infections on day for every (day, count) pair in events; counts on the same
+                      day add up, so several events with different rates can be combined.
+            "poisson": Poisson-distributed importations with mean seed_rate per day, or mean
+                       event_series[t] on day t if event_series is given.
+        days (int): Number of simulated days.
+        seed_rate (float, optional): Number of infections per seeding event, or the mean daily
+                                     importations for "poisson".
+        min_day (int, optional): The minimum day for seeding in the "random" method.
+        max_day (int, optional): The maximum day (exclusive) for the "random" method. Defaults to days.
+        num_seeds (int, optional): Number of seeding days for the "random" method.
+        event_series (array-like, optional): Per-day seeding multipliers for "event_series", or per-day
+                                             importation rates for "poisson". Entries beyond days are ignored.
+        events (iterable of (int, float), optional): Seeding events for the "events" method.
+        rng (np.random.Generator, optional): Generator for the "poisson" draws. The global NumPy
+                                             generator is used if None.
+        size (tuple of int, optional): Leading shape of independent "poisson" draws, e.g. (num_replicates,).
+        expected (bool, optional): Use the mean importation rate instead of Poisson draws, as in a
+                                   mean-field run.
+
+    Returns:
+        np.ndarray: Seed counts per day, shape (*size, days) for "poisson" and (days,) otherwise.
+
+    Raises:
+        ValueError: If required parameters are missing, an event falls outside the simulation or an
+                    invalid method is provided.
+    """
+    def per_day(series):
+        series = np.asarray(series, dtype=float)[:days]
+        return np.pad(series, (0, days - len(series)))
+
+    if method == "none":
+        return np.zeros(days)
+    elif method == "continuous":
+        return np.full(days, float(seed_rate))
+    elif method == "random":
+        counts = np.zeros(days)
+        counts[random.sample(range(min_day, days if max_day is None else max_day), num_seeds)] = seed_rate
+        return counts
+    elif method == "event_series":
+        if event_series is None:
+            raise ValueError("For 'event_series' method, event_series must be specified.")
+        return per_day(event_series) * seed_rate
+    elif method == "events":
+        if events is None:
+            raise ValueError("For 'events' method, events must be specified.")
+        counts = np.zeros(days)
+        for day, count in events:
+            if not 0 <= day < days:
+                raise ValueError(f"Seeding event on day {day} is outside the simulation of {days} days.")
+            counts[day] += count
+        return counts
+    elif method == "poisson":
+        rates = np.full(days, float(seed_rate)) if event_series is None else per_day(event_series)
+        if expected:
+            return rates if size is None else np.broadcast_to(rates, (*size, days)).copy()
+        return (np.random if rng is None else rng).poisson(rates, size=None if size is None else (*size, days)).astype(float)
+    else:
+        raise ValueError("Invalid method. Choose 'none', 'continuous', 'random', 'event_series', 'events' or 'poisson'.")
+
+
 def find_local_minima(data, days):
     """
     Finds local minima in a list of data points and returns a binary event series.
@@ -410,3 +669,49 @@ def find_local_minima(data, days):
             event_series[i] = 1
     return event_series
 
+
+
+def load_movement_matrix(file_path, patches=None, source='source', target='target', rate='rate'):
+    """
+    Loads daily animal movements between patches from an edge-list CSV file as a sparse matrix.
+
+    Every row of the file is one link: the daily probability that an animal in the source
+    patch moves to the target patch. Repeated links are summed and self-loops are dropped.
+
+    Args:
+        file_path: Path of the CSV file.
+        patches: Patch identifiers in model order, or None if the file uses patch indices 0, 1, ...
+        source: Column holding the source patch.
+        target: Column holding the target patch.
+        rate: Column holding the daily movement probability.
+
+    Returns:
+        movement: scipy.sparse.csr_matrix of shape (patches, patches); movement[i, j] is the daily
+        probability that an animal in patch i moves to patch j.
+    """
+    import pandas as pd
+    import scipy.sparse
+
+    edges = pd.read_csv(file_path)
+    if patches is None:
+        sources = edges[source].to_numpy(dtype=np.int64)
+        targets = edges[target].to_numpy(dtype=np.int64)
+        num_patches = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+    else:
+        index = pd.Index(patches)
+        sources, targets = index.get_indexer(edges[source]), index.get_indexer(edges[target])
+        unknown = set(edges[source][sources < 0]) | set(edges[target][targets < 0])
+        if unknown:
+            raise ValueError(f"Movement file refers to unknown patches: {sorted(map(str, unknown))[:10]}")
+        num_patches = len(index)
+    rates = edges[rate].to_numpy(dtype=float)
+    if (rates < 0).any():
+        raise ValueError("Movement rates must be non-negative.")
+
+    keep = sources != targets
+    movement = scipy.sparse.csr_matrix((rates[keep], (sources[keep], targets[keep])), shape=(num_patches, num_patches))
+    movement.sum_duplicates()
+    leaving = np.asarray(movement.sum(axis=1)).ravel()
+    if (leaving > 1).any():
+        raise ValueError(f"Daily movement probabilities leaving patch {int(np.argmax(leaving))} sum to more than one.")
+    return movement
@@ -0,0 +1,700 @@
+"""Waning engines tracking the remaining immunity time of vaccinated and recovered animals.
+
+Every engine is created for one Weibull immunity distribution and exposes the same small
+interface used by the daily simulation loop:
+
+- ``add(n, offset=0)`` immunises ``n`` animals with decay times ``int(scale * weibull(shape)) + offset``
+- ``add_decay_times(decay_times)`` registers animals with the given remaining immunity (days)
+- ``wane()`` advances the clock by one day and returns the number of animals whose immunity waned
+- ``reset_random(n)`` / ``reset_lowest(n)`` re-vaccinate ``n`` animals with fresh decay times
+  ``scale * weibull(shape)``
+- ``decay_times()`` returns the remaining immunity of every tracked animal (for diagnostics)
+- ``day_counts()`` returns the number of tracked animals per day until expiry
+- ``len(engine)`` is the number of animals currently tracked
+- ``state_dict()`` returns the engine state as NumPy values, restored by :func:`restore_waning_engine`
+
+An animal registered with a remaining immunity of ``d`` days wanes on the ``ceil(d)``-th call
+to ``wane()`` after it was added, counting the call made on the same day as day zero.
+
+:class:`DecayTimeCohorts` keeps head counts per cohort instead of decay times, so its
+``decay_times()`` and ``day_counts()`` are expected values and it cannot ``add_decay_times``.
+"""
+
+import random
+
+import numpy as np
+
+
+def _add_to_ring(ring, head, values):
+    """Add ``values``, indexed by days from ``head``, to the ring buffer ``ring`` in place.
+
+    Both arrays are indexed by day along their last axis.
+    """
+    size = values.shape[-1]
+    split = min(size, ring.shape[-1] - head)
+    ring[..., head:head + split] += values[..., :split]
+    ring[..., :size - split] += values[..., split:]
+
+
+def weibull_support(shape, scale, tail=1e-12):
+    """Number of daily buckets holding all but ``tail`` of the Weibull immunity duration."""
+    return int(np.ceil(scale * (-np.log(tail)) ** (1 / shape))) + 2
+
+
+def discretised_weibull_pmf(shape, scale, support, offset=0, rounding='floor'):
+    """Probability of each number of days until expiry for a discretised Weibull decay time.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter
+    scale : float
+        Weibull scale parameter
+    support : int
+        Number of daily buckets; the mass beyond the last bucket is folded into it
+    offset : int, optional
+        Days added to every decay time, by default 0. Decay times of zero or less wane on
+        the next day and are folded into the first bucket.
+    rounding : str, optional
+        'floor' for ``int(scale * weibull(shape)) + offset`` (new cohorts) or 'ceil' for
+        ``scale * weibull(shape)`` kept fractional (re-vaccinations), by default 'floor'
+
+    Returns
+    -------
+    numpy.ndarray
+        Probabilities of 0 to ``support - 1`` days until expiry
+    """
+    k = np.arange(support)
+    upper = k - offset + 1 if rounding == 'floor' else k
+    cumulative = 1 - np.exp(-(np.maximum(upper, 0) / scale) ** shape)
+    cumulative[-1] = 1.0
+    return np.diff(cumulative, prepend=0.0)
+
+
+class _WeibullDecayTimes:
+    """Draw Weibull decay times for the stochastic engines."""
+
+    def __init__(self, shape, scale):
+        self.shape = shape
+        self.scale = scale
+
+    def _draw(self, n):
+        return self.scale * np.random.weibull(self.shape, n)
+
+    def add(self, n, offset=0):
+        self.add_decay_times(self._draw(int(n)).astype(int) + offset)
+
+    def reset_random(self, n):
+        self._reset_random(int(n), self._draw(int(n)))
+
+    def reset_lowest(self, n):
+        self._reset_lowest(int(n), self._draw(int(n)))
+
+
+class DecayTimeArray(_WeibullDecayTimes):
+    """Per-animal remaining immunity times stored in a growable int32 NumPy buffer.
+
+    One entry per animal is kept in ``buffer[:size]``, in insertion order. Daily waning drops
+    the expired entries and decrements the rest with a single vectorised compare/compact, and
+    the buffer doubles in size when new cohorts do not fit. Fractional decay times are stored
+    rounded up, which wanes them on the same day as the fractional value would.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+    capacity : int, optional
+        Initial number of entries preallocated, by default 1024
+    """
+
+    def __init__(self, shape, scale, capacity=1024):
+        super().__init__(shape, scale)
+        self.buffer = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, size):
+        capacity = len(self.buffer)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        buffer = np.empty(capacity, dtype=np.int32)
+        buffer[:self.size] = self.buffer[:self.size]
+        self.buffer = buffer
+
+    def add_decay_times(self, decay_times):
+        self._reserve(self.size + len(decay_times))
+        self.buffer[self.size:self.size + len(decay_times)] = np.ceil(decay_times)
+        self.size += len(decay_times)
+
+    def wane(self):
+        live = self.buffer[:self.size]
+        active = live > 0
+        remaining = np.count_nonzero(active)
+        if remaining < self.size:
+            self.buffer[:remaining] = live[active]
+        self.buffer[:remaining] -= 1
+        num_waned = self.size - remaining
+        self.size = remaining
+        return num_waned
+
+    def _reset_random(self, n, decay_times):
+        indices_to_reset = random.sample(range(self.size), n)
+        self.buffer[indices_to_reset] = np.ceil(decay_times)
+
+    def _reset_lowest(self, n, decay_times):
+        indices_to_reset = np.argsort(self.buffer[:self.size])[:n]
+        self.buffer[indices_to_reset] = np.ceil(decay_times)
+
+    def decay_times(self):
+        return self.buffer[:self.size]
+
+    def day_counts(self):
+        return np.bincount(np.maximum(self.buffer[:self.size], 0))
+
+    def state_dict(self):
+        return {'engine': 'array', 'shape': self.shape, 'scale': self.scale, 'decay_times': self.buffer[:self.size].copy()}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        engine = cls(float(state['shape']), float(state['scale']), capacity=max(len(state['decay_times']), 1024))
+        engine.buffer[:len(state['decay_times'])] = state['decay_times']
+        engine.size = len(state['decay_times'])
+        return engine
+
+
+class DecayTimeHistogram(_WeibullDecayTimes):
+    """Remaining immunity times stored as head counts per day until expiry.
+
+    The counts live in a ring buffer indexed by expiry day: bucket ``(head + d) % capacity``
+    holds the animals that wane ``d`` days from now. Daily waning pops a single bucket and new
+    cohorts are added with a bincount of their decay times, so the cost of a day no longer
+    depends on the number of animals tracked. The buffer doubles in size whenever a decay time
+    exceeds its capacity.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+    capacity : int, optional
+        Initial number of buckets, by default 1024
+    """
+
+    def __init__(self, shape, scale, capacity=1024):
+        super().__init__(shape, scale)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+        self.total = 0
+
+    def __len__(self):
+        return int(self.total)
+
+    def _ordered(self):
+        """Return the counts indexed by days until expiry."""
+        return np.roll(self.counts, -self.head)
+
+    def _grow(self, size):
+        capacity = len(self.counts)
+        while capacity < size:
+            capacity *= 2
+        counts = np.zeros(capacity, dtype=np.int64)
+        counts[:len(self.counts)] = self._ordered()
+        self.counts = counts
+        self.head = 0
+
+    def _update(self, ordered_counts, sign):
+        if len(ordered_counts) > len(self.counts):
+            self._grow(len(ordered_counts))
+        _add_to_ring(self.counts, self.head, sign * ordered_counts)
+        self.total += sign * int(ordered_counts.sum())
+
+    def add_decay_times(self, decay_times):
+        if len(decay_times) == 0:
+            return
+        days_to_expiry = np.maximum(np.ceil(decay_times), 0).astype(np.int64)
+        self._update(np.bincount(days_to_expiry), 1)
+
+    def wane(self):
+        num_waned = int(self.counts[self.head])
+        self.counts[self.head] = 0
+        self.head = (self.head + 1) % len(self.counts)
+        self.total -= num_waned
+        return num_waned
+
+    def _reset_random(self, n, decay_times):
+        ordered = self._ordered()
+        selected = np.random.choice(self.total, n, replace=False)
+        buckets = np.searchsorted(np.cumsum(ordered), selected, side='right')
+        self._update(np.bincount(buckets, minlength=len(ordered)), -1)
+        self.add_decay_times(decay_times)
+
+    def _reset_lowest(self, n, decay_times):
+        ordered = self._ordered()
+        counted_before = np.cumsum(ordered) - ordered
+        removed = np.clip(n - counted_before, 0, ordered)
+        self._update(removed, -1)
+        self.add_decay_times(decay_times)
+
+    def decay_times(self):
+        ordered = self._ordered()
+        return np.repeat(np.arange(len(ordered)), ordered)
+
+    def day_counts(self):
+        return self._ordered()
+
+    def state_dict(self):
+        return {'engine': 'histogram', 'shape': self.shape, 'scale': self.scale, 'counts': self._ordered()}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        engine = cls(float(state['shape']), float(state['scale']), capacity=len(state['counts']))
+        engine.counts[:] = state['counts']
+        engine.total = int(engine.counts.sum())
+        return engine
+
+
+class DecayTimeExpected:
+    """Expected head counts per day until expiry, used by the deterministic mean-field mode.
+
+    Tracks the same quantity as :class:`DecayTimeHistogram`, but cohorts are spread over the
+    discretised Weibull distribution instead of being sampled, so the counts are expectations
+    and no random numbers are drawn. Without re-vaccination this is the convolution of the
+    daily inflows with the discretised Weibull survival function.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+    tail : float, optional
+        Probability mass beyond the last bucket, folded into it, by default 1e-12
+    """
+
+    def __init__(self, shape, scale, tail=1e-12):
+        self.shape = shape
+        self.scale = scale
+        self.counts = np.zeros(weibull_support(shape, scale, tail))
+        self.head = 0
+        self._pmfs = {}
+
+    def __len__(self):
+        return int(round(self.counts.sum()))
+
+    def _pmf(self, offset, rounding):
+        key = (offset, rounding)
+        if key not in self._pmfs:
+            self._pmfs[key] = discretised_weibull_pmf(self.shape, self.scale, len(self.counts), offset, rounding)
+        return self._pmfs[key]
+
+    def _ordered(self):
+        return np.roll(self.counts, -self.head)
+
+    def _update(self, ordered_counts, sign):
+        _add_to_ring(self.counts, self.head, sign * ordered_counts)
+
+    def add(self, n, offset=0):
+        self._update(n * self._pmf(offset, 'floor'), 1)
+
+    def wane(self):
+        num_waned = self.counts[self.head]
+        self.counts[self.head] = 0.0
+        self.head = (self.head + 1) % len(self.counts)
+        return num_waned
+
+    def reset_random(self, n):
+        total = self.counts.sum()
+        if total > 0:
+            self.counts *= max(1 - n / total, 0.0)
+        self._update(n * self._pmf(0, 'ceil'), 1)
+
+    def reset_lowest(self, n):
+        ordered = self._ordered()
+        counted_before = np.cumsum(ordered) - ordered
+        self._update(np.clip(n - counted_before, 0, ordered), -1)
+        self._update(n * self._pmf(0, 'ceil'), 1)
+
+    def decay_times(self):
+        ordered = np.round(self._ordered()).astype(np.int64)
+        return np.repeat(np.arange(len(ordered)), ordered)
+
+    def day_counts(self):
+        return self._ordered()
+
+    def state_dict(self):
+        return {'engine': 'expected', 'shape': self.shape, 'scale': self.scale, 'counts': self._ordered()}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        engine = cls(float(state['shape']), float(state['scale']))
+        engine.counts = np.array(state['counts'], dtype=float)
+        return engine
+
+
+class BatchedDecayTimeHistogram:
+    """Head counts per day until expiry for a batch of independent replicates.
+
+    The stochastic counterpart of :class:`DecayTimeExpected` for ensemble runs: ``counts`` has
+    one row per replicate and all rows share the ring buffer head. Cohort sizes and
+    re-vaccination counts are arrays with one entry per replicate, and ``wane()`` returns the
+    number of animals waned in each replicate. Small cohorts are sampled by drawing decay times
+    and counting them per replicate; large cohorts are spread over the buckets with multinomial
+    draws, so the cost does not grow with the head count.
+
+    Head counts per replicate and per block of ``BLOCK`` buckets are kept up to date by every
+    update, so :meth:`totals` and :meth:`move` never scan the full (replicates, support)
+    histogram: the daily cost of moving animals grows with the number of moving animals and
+    sending replicates, not with the number of replicates times the support.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+    num_replicates : int
+        Number of replicates simulated together
+    rng : numpy.random.Generator
+        Random number generator shared by the batch
+    tail : float, optional
+        Probability mass beyond the last bucket, folded into it, by default 1e-12
+    """
+
+    BLOCK = 32
+
+    def __init__(self, shape, scale, num_replicates, rng, tail=1e-12):
+        self.shape = shape
+        self.scale = scale
+        self.rng = rng
+        support = weibull_support(shape, scale, tail)
+        self.counts = np.zeros((num_replicates, support), dtype=np.int64)
+        self.head = 0
+        self._pmfs = {rounding: discretised_weibull_pmf(shape, scale, support, rounding=rounding)
+                      for rounding in ('floor', 'ceil')}
+        # Head counts per block of BLOCK buckets (by buffer position) and per replicate
+        self._block_starts = np.arange(0, support, self.BLOCK)
+        self.block_counts = np.zeros((num_replicates, len(self._block_starts)), dtype=np.int64)
+        self._totals = np.zeros(num_replicates, dtype=np.int64)
+
+    def totals(self):
+        return self._totals.copy()
+
+    def _recount(self, rows=slice(None)):
+        """Recompute the block counts and totals of ``rows`` after a dense update of their buckets."""
+        self.block_counts[rows] = np.add.reduceat(self.counts[rows], self._block_starts, axis=1)
+        self._totals[rows] = self.block_counts[rows].sum(axis=1)
+
+    def _ordered(self, rows=slice(None)):
+        return np.roll(self.counts[rows], -self.head, axis=1)
+
+    def _remove(self, rows, removed):
+        """Remove head counts ordered by days until expiry from the replicates ``rows``."""
+        counts = self.counts[rows]
+        _add_to_ring(counts, self.head, -removed)
+        self.counts[rows] = counts
+        self._recount(rows)
+
+    def _add_sampled(self, n, rounding):
+        """Add ``n[k]`` animals with freshly sampled decay times to every replicate ``k``."""
+        n = np.asarray(n, dtype=np.int64)
+        num_replicates, support = self.counts.shape
+        if n.sum() > num_replicates * support:
+            _add_to_ring(self.counts, self.head, self.rng.multinomial(n, self._pmfs[rounding]))
+            self._recount()
+            return
+        decay_times = self.scale * self.rng.weibull(self.shape, n.sum())
+        days = np.ceil(decay_times) if rounding == 'ceil' else np.floor(decay_times)
+        buckets = (self.head + np.minimum(days.astype(np.int64), support - 1)) % support
+        replicates = np.repeat(np.arange(num_replicates), n)
+        np.add.at(self.counts.reshape(-1), replicates * support + buckets, 1)
+        np.add.at(self.block_counts, (replicates, buckets // self.BLOCK), 1)
+        self._totals += n
+
+    def add(self, n):
+        self._add_sampled(n, 'floor')
+
+    def add_decay_times(self, decay_times):
+        """Add animals with the given remaining immunity (days) to every replicate."""
+        support = self.counts.shape[1]
+        days_to_expiry = np.minimum(np.maximum(np.ceil(decay_times), 0).astype(np.int64), support - 1)
+        _add_to_ring(self.counts, self.head, np.bincount(days_to_expiry, minlength=support)[None, :])
+        self._recount()
+
+    def wane(self):
+        num_waned = self.counts[:, self.head].copy()
+        self.counts[:, self.head] = 0
+        self.block_counts[:, self.head // self.BLOCK] -= num_waned
+        self._totals -= num_waned
+        self.head = (self.head + 1) % self.counts.shape[1]
+        return num_waned
+
+    def reset_random(self, n):
+        rows = np.flatnonzero(n)
+        ordered = self._ordered(rows)
+        removed = np.array([self.rng.multivariate_hypergeometric(counts, int(n[k]))
+                            for k, counts in zip(rows, ordered)]).reshape(ordered.shape)
+        self._remove(rows, removed)
+        self._add_sampled(n, 'ceil')
+
+    def reset_lowest(self, n):
+        rows = np.flatnonzero(n)
+        ordered = self._ordered(rows)
+        counted_before = np.cumsum(ordered, axis=1) - ordered
+        removed = np.clip(np.asarray(n, dtype=np.int64)[rows, None] - counted_before, 0, ordered)
+        self._remove(rows, removed)
+        self._add_sampled(n, 'ceil')
+
+    def move(self, sources, targets):
+        """Move animals between replicates, e.g. the patches of a metapopulation.
+
+        For every ``i`` one animal of replicate ``sources[i]``, drawn without replacement, moves
+        to replicate ``targets[i]`` and keeps its days until expiry. A replicate cannot lose
+        more animals than it holds.
+        """
+        sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        if len(sources) == 0:
+            return
+        support = self.counts.shape[1]
+        block, num_blocks = self.BLOCK, self.block_counts.shape[1]
+        totals = self._totals
+        # Draw distinct animals per source replicate, redrawing repeats
+        positions = self.rng.integers(0, totals[sources])
+        while True:
+            keys = sources * (totals.max() + 1) + positions
+            first = np.unique(keys, return_index=True)[1]
+            if len(first) == len(keys):
+                break
+            repeated = np.ones(len(keys), dtype=bool)
+            repeated[first] = False
+            positions[repeated] = self.rng.integers(0, totals[sources[repeated]])
+        # Locate the animals through the block counts of the sending replicates only
+        senders, sender = np.unique(sources, return_inverse=True)
+        block_counts = self.block_counts[senders].reshape(-1)
+        cumulative = np.cumsum(block_counts)
+        before = cumulative[num_blocks - 1::num_blocks] - totals[senders]
+        blocks = np.searchsorted(cumulative, before[sender] + positions, side='right')
+        in_block = before[sender] + positions - (cumulative[blocks] - block_counts[blocks])
+        days = (blocks - sender * num_blocks)[:, None] * block + np.arange(block)
+        window = np.where(days < support, self.counts[sources[:, None], np.minimum(days, support - 1)], 0)
+        days = days[:, 0] + (np.cumsum(window, axis=1) <= in_block[:, None]).sum(axis=1)
+        np.add.at(self.counts, (sources, days), -1)
+        np.add.at(self.counts, (targets, days), 1)
+        np.add.at(self.block_counts, (sources, days // block), -1)
+        np.add.at(self.block_counts, (targets, days // block), 1)
+        np.add.at(self._totals, sources, -1)
+        np.add.at(self._totals, targets, 1)
+
+
+def _sample_head_counts(counts, n):
+    """Draw ``n`` animals without replacement from groups of ``counts`` animals.
+
+    Equivalent to a multivariate hypergeometric draw, using the global NumPy state: distinct
+    animal indices are drawn until ``n`` (or, for large ``n``, the animals left behind) are
+    found, so the work scales with the smaller of the two rather than with the population.
+    """
+    total = int(counts.sum())
+    n = min(n, total)
+    complement = n > total // 2
+    k = total - n if complement else n
+    chosen = np.empty(0, dtype=np.int64)
+    while len(chosen) < k:
+        chosen = np.unique(np.concatenate([chosen, np.random.randint(0, total, k - len(chosen), dtype=np.int64)]))
+    picked = np.bincount(np.searchsorted(np.cumsum(counts), chosen, side='right'), minlength=len(counts))
+    return counts - picked if complement else picked
+
+
+class DecayTimeCohorts:
+    """Head counts per cohort of animals immunised on the same day, waned with binomial draws.
+
+    Instead of drawing a decay time for every animal, the engine keeps the number of animals
+    in each cohort, indexed by age in days, and every day draws the number that wane in each
+    cohort from the conditional Weibull hazard ``P(expiry = age | expiry >= age)`` with one
+    vectorised binomial call. The work per day scales with the number of cohorts, bounded by
+    the support of the Weibull distribution, rather than with the number of animals. The
+    number waned per day has the same distribution as for the per-animal engines.
+
+    Cohorts whose decay times follow a different discretisation (the offset of new cohorts or
+    the fractional decay times of re-vaccinations) are kept in separate rings. Random
+    re-vaccination removes animals from all cohorts with a multivariate hypergeometric draw.
+    Without individual decay times the engine cannot tell which animals are closest to waning,
+    so targeted re-vaccination (``reset_lowest``) and ``add_decay_times`` raise TypeError.
+
+    Random numbers come from the global NumPy state, like the per-animal engines.
+
+    Parameters
+    ----------
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+    tail : float, optional
+        Probability mass beyond the oldest age, which wanes on that day, by default 1e-12
+    """
+
+    def __init__(self, shape, scale, tail=1e-12):
+        self.shape = shape
+        self.scale = scale
+        self.support = weibull_support(shape, scale, tail)
+        self._ages = np.arange(self.support)
+        self.day = 0
+        self.cohorts = {}
+        self._hazards = {}
+
+    def __len__(self):
+        return int(sum(counts.sum() for counts in self.cohorts.values()))
+
+    def _hazard(self, key):
+        """Conditional probability of waning at each age for decay times discretised as ``key``."""
+        if key not in self._hazards:
+            offset, rounding = key
+            pmf = discretised_weibull_pmf(self.shape, self.scale, self.support, offset, rounding)
+            surviving = np.cumsum(pmf[::-1])[::-1]
+            hazard = np.divide(pmf, surviving, out=np.ones_like(pmf), where=surviving > 0)
+            hazard[-1] = 1.0
+            self._hazards[key] = hazard
+        return self._hazards[key]
+
+    def _ring(self, key):
+        if key not in self.cohorts:
+            self.cohorts[key] = np.zeros(self.support, dtype=np.int64)
+        return self.cohorts[key]
+
+    def _slots(self):
+        """Ring slot holding each age, which is also the age held in each slot."""
+        return (self.day - self._ages) % self.support
+
+    def _add_cohort(self, n, key):
+        if n > 0:
+            self._ring(key)[self.day % self.support] += int(n)
+
+    def add(self, n, offset=0):
+        self._add_cohort(n, (offset, 'floor'))
+
+    def add_decay_times(self, decay_times):
+        raise TypeError("DecayTimeCohorts tracks cohorts, not individual decay times")
+
+    def wane(self):
+        ages = self._slots()
+        num_waned = 0
+        for key, counts in self.cohorts.items():
+            live = np.flatnonzero(counts)
+            if len(live):
+                waned = np.random.binomial(counts[live], self._hazard(key)[ages[live]])
+                counts[live] -= waned
+                num_waned += int(waned.sum())
+        self.day += 1
+        return num_waned
+
+    def _by_age(self):
+        """Cohort counts of every ring stacked and ordered from the youngest to the oldest age."""
+        keys = list(self.cohorts)
+        order = self._slots()
+        return keys, np.array([self.cohorts[key][order] for key in keys]).reshape(len(keys), self.support)
+
+    def _remove(self, keys, removed):
+        order = self._slots()
+        for key, counts in zip(keys, removed):
+            self.cohorts[key][order] -= counts
+
+    def reset_random(self, n):
+        keys, by_age = self._by_age()
+        removed = _sample_head_counts(by_age.reshape(-1), int(n)).reshape(by_age.shape)
+        self._remove(keys, removed)
+        self._add_cohort(n, (0, 'ceil'))
+
+    def reset_lowest(self, n):
+        raise TypeError("DecayTimeCohorts tracks cohorts, not individual decay times; "
+                        "it cannot select the animals with the lowest remaining immunity")
+
+    def day_counts(self):
+        """Expected number of animals per day until expiry."""
+        expected = np.zeros(self.support)
+        keys, by_age = self._by_age()
+        for key, counts in zip(keys, by_age):
+            offset, rounding = key
+            pmf = discretised_weibull_pmf(self.shape, self.scale, self.support, offset, rounding)
+            surviving = np.cumsum(pmf[::-1])[::-1]
+            for age in np.flatnonzero(counts):
+                if surviving[age] > 0:
+                    expected[:self.support - age] += counts[age] * pmf[age:] / surviving[age]
+        return expected
+
+    def decay_times(self):
+        counts = np.round(self.day_counts()).astype(np.int64)
+        return np.repeat(np.arange(len(counts)), counts)
+
+    def state_dict(self):
+        keys, by_age = self._by_age()
+        return {'engine': 'cohort', 'shape': self.shape, 'scale': self.scale, 'support': self.support, 'day': self.day,
+                'offsets': np.array([key[0] for key in keys], dtype=np.int64),
+                'roundings': np.array([key[1] for key in keys], dtype=str).reshape(len(keys)),
+                'counts_by_age': by_age}
+
+    @classmethod
+    def from_state_dict(cls, state):
+        engine = cls(float(state['shape']), float(state['scale']))
+        engine.support = int(state['support'])
+        engine._ages = np.arange(engine.support)
+        engine.day = int(state['day'])
+        order = engine._slots()
+        for offset, rounding, counts in zip(state['offsets'], state['roundings'], state['counts_by_age']):
+            engine._ring((int(offset), str(rounding)))[order] = counts
+        return engine
+
+
+WANING_ENGINES = {
+    'array': DecayTimeArray,
+    'histogram': DecayTimeHistogram,
+    'cohort': DecayTimeCohorts,
+}
+
+
+def restore_waning_engine(state):
+    """Recreate a waning engine from the output of its ``state_dict()``.
+
+    Parameters
+    ----------
+    state : dict
+        Engine state; the 'engine' entry names the engine ('array', 'histogram', 'cohort' or 'expected')
+
+    Returns
+    -------
+    object
+        Waning engine instance
+    """
+    engines = {**WANING_ENGINES, 'expected': DecayTimeExpected}
+    return engines[str(state['engine'])].from_state_dict(state)
+
+
+def create_waning_engine(waning, shape, scale):
+    """Create an empty waning engine.
+
+    Parameters
+    ----------
+    waning : str
+        Engine name, one of ``WANING_ENGINES`` ('array', 'histogram' or 'cohort')
+    shape : float
+        Weibull shape parameter of the immunity duration
+    scale : float
+        Weibull scale parameter of the immunity duration
+
+    Returns
+    -------
+    object
+        Waning engine instance
+
+    Raises
+    ------
+    ValueError
+        If the engine name is unknown.
+    """
+    if waning not in WANING_ENGINES:
+        raise ValueError(f"Invalid waning engine '{waning}'. Choose one of {list(WANING_ENGINES)}.")
+    return WANING_ENGINES[waning](shape, scale)
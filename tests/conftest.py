@@ -0,0 +1,19 @@
+import pytest
+
+from vaxsim.utils import load_params
+
+
+@pytest.fixture
+def small_params():
+    """Baseline parameters scaled to a population of about 10,000 animals over two years."""
+    params = dict(load_params()['baseline'])
+    for compartment in ('S0', 'R0', 'V0'):
+        params[compartment] //= 100
+    params['days'] = 730
+    return params
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    # Models write their output files relative to the working directory
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from vaxsim.cache import ResultCache
+
+
+def test_eviction_keeps_the_limit_and_spares_other_writers_temporary_files(tmp_path):
+    in_progress = tmp_path / 'key.999.npz.tmp'
+    in_progress.write_bytes(b'\0' * 10_000)
+    cache = ResultCache(tmp_path, max_bytes=5_000)
+    for key in range(10):
+        cache.put(f'key{key}', np.arange(100.0) + key)
+
+    assert in_progress.exists()
+    assert sum(path.stat().st_size for path in tmp_path.glob('*.npz')) <= 5_000
+    np.testing.assert_array_equal(ResultCache(tmp_path).get('key9'), np.arange(100.0) + 9)
+    assert ResultCache(tmp_path).get('key0') is None
@@ -0,0 +1,22 @@
+import numpy as np
+
+from vaxsim.model import sirsv_model_with_weibull
+
+NUM_SEEDS = 200
+
+
+def test_mean_field_matches_stochastic_ensemble_mean(small_params):
+    runs = np.array([sirsv_model_with_weibull(small_params, 'baseline', random_seed=seed, instrumentation='fast')
+                     for seed in range(NUM_SEEDS)])
+    mean_field = np.array(sirsv_model_with_weibull(small_params, 'baseline', mode='mean_field',
+                                                   instrumentation='fast'))
+
+    mean = runs.mean(axis=0)
+    standard_error = runs.std(axis=0, ddof=1) / np.sqrt(NUM_SEEDS)
+    population = small_params['S0'] + small_params['I0'] + small_params['R0'] + small_params['V0']
+    # The stochastic model rounds daily vaccinations and immunised cohorts down to whole
+    # animals, which the mean field does not; allow 0.2% of the population for it
+    tolerance = 4 * standard_error + 0.002 * population
+    for name, expected, actual, allowed in zip('SIRV', mean, mean_field, tolerance):
+        deviation = np.abs(actual - expected)
+        assert np.all(deviation <= allowed), f"{name} deviates by {deviation.max():.1f} animals"
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from vaxsim.model import SimulationState, sirsv_model_ensemble, sirsv_model_metapopulation, sirsv_model_with_weibull
+from vaxsim.store import TrajectoryStream
+
+
+def assert_trajectories_equal(actual, expected):
+    for name, values, reference in zip('SIRV', actual, expected):
+        np.testing.assert_array_equal(values, reference, err_msg=name)
+
+
+@pytest.mark.parametrize('waning', ['array', 'histogram', 'cohort'])
+@pytest.mark.parametrize('mode', ['stochastic', 'mean_field', 'chain_binomial'])
+def test_resume_from_snapshot_matches_uninterrupted_run(small_params, tmp_path, waning, mode):
+    snapshots = []
+    expected = sirsv_model_with_weibull(small_params, 'baseline', waning=waning, mode=mode, seed_method='random',
+                                        instrumentation='fast', snapshot_days=[400], on_snapshot=snapshots.append)
+    snapshots[0].save(tmp_path / 'state.npz')
+    state = SimulationState.load(tmp_path / 'state.npz')
+
+    resumed = sirsv_model_with_weibull(small_params, 'baseline', waning=waning, mode=mode, seed_method='random',
+                                       instrumentation='fast', initial_state=state)
+    assert_trajectories_equal(resumed, expected)
+
+
+@pytest.mark.parametrize('chunk_days, every', [(1, 1), (100, 1), (64, 7), (5000, 3)])
+@pytest.mark.parametrize('mode', ['stochastic', 'mean_field', 'chain_binomial'])
+def test_streamed_output_matches_in_memory_run(small_params, tmp_path, mode, chunk_days, every):
+    expected = sirsv_model_with_weibull(small_params, 'baseline', mode=mode, ordering='calibration',
+                                        seed_method='random', instrumentation='fast')
+    stream = TrajectoryStream(tmp_path / 'run.npy', chunk_days=chunk_days, every=every)
+    streamed = sirsv_model_with_weibull(small_params, 'baseline', mode=mode, ordering='calibration',
+                                        seed_method='random', instrumentation='fast', output=stream)
+    assert_trajectories_equal(streamed, [values[::every] for values in expected])
+    assert_trajectories_equal(stream.compartments(), streamed)
+
+
+@pytest.mark.parametrize('mode', ['stochastic', 'chain_binomial'])
+def test_streamed_ensemble_matches_in_memory_ensemble(small_params, tmp_path, mode):
+    expected = sirsv_model_ensemble(small_params, 'baseline', num_replicates=8, mode=mode, save_variables=False)
+    streamed = sirsv_model_ensemble(small_params, 'baseline', num_replicates=8, mode=mode,
+                                    output=TrajectoryStream(tmp_path / 'ensemble.npy', chunk_days=100))
+    assert_trajectories_equal([streamed[name] for name in 'SIRV'], [expected[name] for name in 'SIRV'])
+    for name in 'SIRV':
+        np.testing.assert_allclose(streamed['mean'][name], expected['mean'][name])
+
+
+def test_metapopulation_accepts_nested_list_mixing(small_params):
+    small_params['I0'] = [5, 0]
+    mixing = [[0.9, 0.1], [0.1, 0.9]]
+    expected = sirsv_model_metapopulation(small_params, 'patches', mixing=np.array(mixing), save_variables=False)
+    actual = sirsv_model_metapopulation(small_params, 'patches', mixing=mixing, save_variables=False)
+    assert_trajectories_equal([actual[name] for name in 'SIRV'], [expected[name] for name in 'SIRV'])
@@ -0,0 +1,18 @@
+import functools
+import os
+
+from vaxsim.model import sirsv_model_with_weibull_random_vaccination
+from vaxsim.plot import plot_parameter_sweep
+from vaxsim.utils import run_parameter_sweep
+
+
+def test_parameter_sweep_results_are_plotted(small_params):
+    small_params['days'] = 365
+    sirsv_model = functools.partial(sirsv_model_with_weibull_random_vaccination, save_variables=False,
+                                    instrumentation='fast')
+    results = run_parameter_sweep(sirsv_model, small_params, 'vax_rate', [0.005, 0.02], 'vax_period', [90, 180],
+                                  analysis_function='auc')
+    assert len(results) == 4
+
+    plot_parameter_sweep(results, 'vax_rate', 'vax_period', output_variable='auc')
+    assert os.path.exists('output/sweep/parameter_sweep_vax_rate_vax_period_auc_1_random.png')
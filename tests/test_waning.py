@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+from vaxsim import waning
+from vaxsim.model import sirsv_model_with_weibull
+
+
+class DecayTimeList(waning._WeibullDecayTimes):
+    """Reference engine replaced by DecayTimeArray: one float per animal in a Python list."""
+
+    def __init__(self, shape, scale):
+        super().__init__(shape, scale)
+        self.times = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def add_decay_times(self, decay_times):
+        self.times.extend(decay_times.tolist())
+
+    def wane(self):
+        before = len(self.times)
+        self.times = [x - 1 for x in self.times if x > 0]
+        return before - len(self.times)
+
+    def _reset_random(self, n, decay_times):
+        for i, decay_time in zip(random.sample(range(len(self.times)), n), decay_times):
+            self.times[i] = decay_time
+
+    def _reset_lowest(self, n, decay_times):
+        for i, decay_time in zip(np.argsort(self.times)[:n], decay_times):
+            self.times[i] = decay_time
+
+    def decay_times(self):
+        return np.array(self.times)
+
+
+@pytest.mark.parametrize('revaccination', ['random', 'targeted'])
+@pytest.mark.parametrize('ordering', ['scenario', 'calibration'])
+def test_array_engine_matches_list_reference(small_params, monkeypatch, revaccination, ordering):
+    monkeypatch.setitem(waning.WANING_ENGINES, 'list', DecayTimeList)
+    expected = sirsv_model_with_weibull(small_params, 'baseline', revaccination=revaccination, waning='list',
+                                        ordering=ordering, instrumentation='fast')
+    actual = sirsv_model_with_weibull(small_params, 'baseline', revaccination=revaccination, waning='array',
+                                      ordering=ordering, instrumentation='fast')
+    for name, reference, values in zip('SIRV', expected, actual):
+        np.testing.assert_array_equal(values, reference, err_msg=name)
+
+
+def test_cohort_engine_rejects_targeted_revaccination(small_params):
+    with pytest.raises(ValueError, match="cohort"):
+        sirsv_model_with_weibull(small_params, 'baseline', revaccination='targeted', waning='cohort',
+                                 instrumentation='fast')
+    with pytest.raises(TypeError):
+        waning.DecayTimeCohorts(3, 220).reset_lowest(1)
+
+
+def test_batched_histogram_keeps_block_counts_and_totals_in_step():
+    rng = np.random.default_rng(0)
+    decay_times = waning.BatchedDecayTimeHistogram(3, 220, 6, rng)
+    decay_times.add(np.array([0, 5, 50, 500, 5_000, 50_000]))
+    for day in range(400):
+        decay_times.wane()
+        decay_times.add(rng.integers(0, 20, 6))
+        if day % 90 == 0:
+            decay_times.reset_random(np.minimum(decay_times.totals(), 30))
+            decay_times.reset_lowest(np.minimum(decay_times.totals(), 30))
+        movers = np.minimum(rng.integers(0, 10, 6), decay_times.totals())
+        decay_times.move(np.repeat(np.arange(6), movers), np.repeat((np.arange(6) + 1) % 6, movers))
+
+        block_counts = np.add.reduceat(decay_times.counts, np.arange(0, decay_times.counts.shape[1], decay_times.BLOCK),
+                                       axis=1)
+        np.testing.assert_array_equal(decay_times.block_counts, block_counts)
+        np.testing.assert_array_equal(decay_times.totals(), decay_times.counts.sum(axis=1))
+    assert (decay_times.counts >= 0).all()